@@ -1,7 +1,9 @@
 from django.conf import settings
 from rest_framework.routers import DefaultRouter, SimpleRouter
 
+from geodata_mart.maps.api.views import JobViewSet
 from geodata_mart.users.api.views import UserViewSet
+from geodata_mart.webhooks.api.views import WebhookEndpointViewSet
 
 if settings.DEBUG:
     router = DefaultRouter()
@@ -9,6 +11,8 @@ else:
     router = SimpleRouter()
 
 router.register("users", UserViewSet)
+router.register("jobs", JobViewSet)
+router.register("webhooks", WebhookEndpointViewSet)
 
 
 app_name = "api"
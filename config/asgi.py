@@ -29,10 +29,13 @@ django_application = get_asgi_application()
 
 # Import websocket application here, so apps from django_application are loaded first
 from config.websocket import websocket_application  # noqa isort:skip
+from config.sse import match_events_path, sse_application  # noqa isort:skip
 
 
 async def application(scope, receive, send):
-    if scope["type"] == "http":
+    if scope["type"] == "http" and match_events_path(scope):
+        await sse_application(scope, receive, send)
+    elif scope["type"] == "http":
         await django_application(scope, receive, send)
     elif scope["type"] == "websocket":
         await websocket_application(scope, receive, send)
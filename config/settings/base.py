@@ -101,6 +101,8 @@ LOCAL_APPS = [
     "geodata_mart.vendors",
     "geodata_mart.maps",
     "geodata_mart.credits",
+    "geodata_mart.webhooks",
+    "geodata_mart.diagnostics",
 ]
 # https://docs.djangoproject.com/en/dev/ref/settings/#installed-apps
 INSTALLED_APPS = DJANGO_APPS + THIRD_PARTY_APPS + LOCAL_APPS
@@ -156,6 +158,8 @@ MIDDLEWARE = [
     "django.middleware.common.CommonMiddleware",
     "django.middleware.csrf.CsrfViewMiddleware",
     "django.contrib.auth.middleware.AuthenticationMiddleware",
+    "geodata_mart.diagnostics.middleware.ProfilingMiddleware",
+    "geodata_mart.diagnostics.middleware.SlowQueryMiddleware",
     "django.contrib.messages.middleware.MessageMiddleware",
     # "django.middleware.common.BrokenLinkEmailsMiddleware",
     "django.middleware.clickjacking.XFrameOptionsMiddleware",
@@ -287,6 +291,8 @@ if USE_TZ:
 CELERY_BROKER_URL = env("CELERY_BROKER_URL")
 # https://docs.celeryq.dev/en/stable/userguide/configuration.html#std:setting-result_backend
 CELERY_RESULT_BACKEND = CELERY_BROKER_URL
+# Redis instance used for job progress and state event channels
+REDIS_URL = env("REDIS_URL", default=CELERY_BROKER_URL)
 # https://docs.celeryq.dev/en/stable/userguide/configuration.html#std:setting-accept_content
 CELERY_ACCEPT_CONTENT = ["json"]
 # https://docs.celeryq.dev/en/stable/userguide/configuration.html#std:setting-task_serializer
@@ -299,6 +305,25 @@ CELERY_TASK_SOFT_TIME_LIMIT = 15 * 60
 CELERY_TASK_TIME_LIMIT = CELERY_TASK_SOFT_TIME_LIMIT + (3 * 60)
 # https://docs.celeryq.dev/en/stable/userguide/configuration.html#beat-scheduler
 CELERY_BEAT_SCHEDULER = "django_celery_beat.schedulers:DatabaseScheduler"
+# https://docs.celeryq.dev/en/stable/userguide/periodic-tasks.html#beat-entries
+CELERY_BEAT_SCHEDULE = {
+    "deliver-webhooks": {
+        "task": "geodata_mart.webhooks.tasks.deliver_webhooks",
+        "schedule": 60.0,
+    },
+    "verify-managed-files": {
+        "task": "geodata_mart.maps.files.verify_managed_files",
+        "schedule": 6 * 60 * 60.0,
+    },
+    "clean-up-jobs": {
+        "task": "geodata_mart.maps.maintenance.clean_up_jobs",
+        "schedule": 15 * 60.0,
+    },
+    "enforce-result-retention": {
+        "task": "geodata_mart.maps.retention.enforce_result_retention",
+        "schedule": 60 * 60.0,
+    },
+}
 # django-allauth
 # ------------------------------------------------------------------------------
 ACCOUNT_ALLOW_REGISTRATION = env.bool("DJANGO_ACCOUNT_ALLOW_REGISTRATION", True)
@@ -353,3 +378,116 @@ SPECTACULAR_SETTINGS = {
 }
 
 VERSATILEIMAGEFIELD_SETTINGS = {"progressive_jpeg": True}
+# Renditions generated in the background when an image is uploaded, so that
+# they already exist when first requested by the catalog and detail pages
+VERSATILEIMAGEFIELD_RENDITION_KEY_SETS = {
+    "preview_image": [
+        ("gallery", "thumbnail__400x400"),
+        ("detail", "crop__800x400"),
+    ],
+}
+
+# Project coverage
+# ------------------------------------------------------------------------------
+# Number of polygons unioned at a time when ingesting coverage files
+COVERAGE_CHUNK_SIZE = env.int("COVERAGE_CHUNK_SIZE", default=500)
+# Simplification tolerance in degrees for coverage displayed on maps
+COVERAGE_SIMPLIFY_TOLERANCE = env.float("COVERAGE_SIMPLIFY_TOLERANCE", default=0.001)
+
+# Content addressed storage
+# ------------------------------------------------------------------------------
+# Store result and download files once per content hash, shared between records
+CONTENT_ADDRESSED_STORAGE = env.bool("CONTENT_ADDRESSED_STORAGE", default=False)
+# Directory within the QGIS data root holding content addressed files
+CONTENT_ADDRESSED_ROOT = "blobs"
+
+# Clip jobs
+# ------------------------------------------------------------------------------
+# Base and maximum delay in seconds before retrying a failed clip job, which
+# resumes from the layers already checkpointed in the job output directory
+CLIP_RETRY_DELAY = env.int("CLIP_RETRY_DELAY", default=60)
+CLIP_RETRY_MAX_DELAY = env.int("CLIP_RETRY_MAX_DELAY", default=15 * 60)
+# Record task ids for dispatched jobs without sending them to the broker, so
+# the web tier can be load tested without workers
+JOB_DISPATCH_STUB = env.bool("JOB_DISPATCH_STUB", default=False)
+# How workers run clip jobs: "inline" starts QGIS in the task for each job,
+# while "zygote" starts QGIS once per worker process and runs each job in a
+# process forked from it, so that a crash only fails the job
+CLIP_EXECUTION_MODE = env("CLIP_EXECUTION_MODE", default="inline")
+# Seconds between checks for cancellation of a running clip job
+JOB_CANCEL_POLL_INTERVAL = env.float("JOB_CANCEL_POLL_INTERVAL", default=2.0)
+# Seconds a processing job may go without updates before it is checked for
+# a live task, and seconds to wait for workers to reply to that check
+JOB_STALE_AFTER = env.int("JOB_STALE_AFTER", default=10 * 60)
+JOB_INSPECT_TIMEOUT = env.float("JOB_INSPECT_TIMEOUT", default=5.0)
+# Seconds a job scratch directory must be idle before it is removed, and the
+# longer retention for failed jobs that may still be resumed
+JOB_SCRATCH_GRACE = env.int("JOB_SCRATCH_GRACE", default=60 * 60)
+JOB_SCRATCH_RETENTION = env.int("JOB_SCRATCH_RETENTION", default=24 * 60 * 60)
+
+# Metrics
+# ------------------------------------------------------------------------------
+# Bearer token Prometheus authenticates with to scrape /metrics, which is
+# otherwise only available to staff
+METRICS_TOKEN = env("METRICS_TOKEN", default="")
+
+# Tracing
+# ------------------------------------------------------------------------------
+# Dotted path of the span exporter class, such as
+# geodata_mart.utils.tracing.FileExporter, or empty to disable exporting
+TRACING_EXPORTER = env("TRACING_EXPORTER", default="")
+# File the file exporter appends spans to as JSON lines
+TRACING_FILE = env("TRACING_FILE", default=str(ROOT_DIR / "traces.jsonl"))
+
+# Profiling
+# ------------------------------------------------------------------------------
+# Fraction of requests to profile, from 0 (none) to 1 (all)
+PROFILING_SAMPLE_RATE = env.float("PROFILING_SAMPLE_RATE", default=0.0)
+# Staff can profile any request by sending this header
+PROFILING_HEADER = env("PROFILING_HEADER", default="X-Profile")
+# Seconds between stack samples of a profiled request
+PROFILING_INTERVAL = env.float("PROFILING_INTERVAL", default=0.005)
+# Number of distinct queries kept with each profile, slowest first
+PROFILING_MAX_QUERIES = env.int("PROFILING_MAX_QUERIES", default=50)
+# Seconds between stack samples of jobs with profiling enabled
+JOB_PROFILING_INTERVAL = env.float("JOB_PROFILING_INTERVAL", default=0.01)
+# Also sample job workers with py-spy to include native QGIS frames, which
+# needs the SYS_PTRACE capability in the worker container
+JOB_PROFILING_NATIVE = env.bool("JOB_PROFILING_NATIVE", default=False)
+JOB_PROFILING_PYSPY = env("JOB_PROFILING_PYSPY", default="py-spy")
+
+# Slow queries
+# ------------------------------------------------------------------------------
+# Seconds a query run by a view or task must take to be captured, or 0 to
+# disable capture
+SLOW_QUERY_THRESHOLD = env.float("SLOW_QUERY_THRESHOLD", default=0.5)
+# Fraction of repeated slow queries stored as samples, in addition to the
+# first run of each query
+SLOW_QUERY_SAMPLE_RATE = env.float("SLOW_QUERY_SAMPLE_RATE", default=0.1)
+# Re-run sampled SELECT queries with EXPLAIN (ANALYZE, BUFFERS) in a Celery
+# task, limited to the timeout in seconds
+SLOW_QUERY_EXPLAIN = env.bool("SLOW_QUERY_EXPLAIN", default=True)
+SLOW_QUERY_EXPLAIN_TIMEOUT = env.float("SLOW_QUERY_EXPLAIN_TIMEOUT", default=5.0)
+
+# Result retention
+# ------------------------------------------------------------------------------
+# Total bytes of result files to retain before evicting the least recently
+# downloaded, and days after the last download that results are evicted.
+# Either limit is disabled when set to 0, and both are disabled by default.
+RESULT_STORAGE_BUDGET = env.int("RESULT_STORAGE_BUDGET", default=0)
+RESULT_MAX_AGE_DAYS = env.int("RESULT_MAX_AGE_DAYS", default=0)
+# Message priority for regenerating evicted results, which the Redis broker
+# serves after default priority (0) jobs
+RESULT_REGENERATION_PRIORITY = 9
+
+# Webhooks
+# ------------------------------------------------------------------------------
+# Seconds to wait for a webhook endpoint to respond
+WEBHOOK_TIMEOUT = env.int("WEBHOOK_TIMEOUT", default=10)
+# Maximum number of deliveries sent per delivery run
+WEBHOOK_BATCH_SIZE = env.int("WEBHOOK_BATCH_SIZE", default=100)
+# Deliveries are abandoned after this many failed attempts
+WEBHOOK_MAX_ATTEMPTS = env.int("WEBHOOK_MAX_ATTEMPTS", default=8)
+# Base and maximum delay in seconds for exponential retry backoff
+WEBHOOK_RETRY_DELAY = env.int("WEBHOOK_RETRY_DELAY", default=30)
+WEBHOOK_RETRY_MAX_DELAY = env.int("WEBHOOK_RETRY_MAX_DELAY", default=6 * 60 * 60)
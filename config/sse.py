@@ -0,0 +1,184 @@
+"""
+Server-Sent Events stream for job progress.
+
+Serves ``/events/jobs/<job_id>/`` directly from the ASGI event loop so that
+browsers watching long running jobs hold an idle coroutine rather than a
+sync web worker. Events are relayed from the per-job Redis channel that the
+Celery tasks publish progress and state changes to.
+"""
+import asyncio
+import json
+import re
+from http.cookies import SimpleCookie
+from importlib import import_module
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+
+from geodata_mart.maps.models import Job
+from geodata_mart.maps.progress import get_jobs_progress, job_channel
+from geodata_mart.utils.metrics import increment
+from geodata_mart.utils.redis_client import get_async_redis
+
+JOB_EVENTS_PATH = re.compile(
+    r"^/events/jobs/(?P<job_id>[0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12})/$"
+)
+KEEPALIVE_SECONDS = 15
+
+# Job states after which no further events are expected
+TERMINAL_STATES = {
+    Job.JobStateChoices.ABANDONED,
+    Job.JobStateChoices.PROCESSED,
+    Job.JobStateChoices.COMPLETED,
+    Job.JobStateChoices.FAILED,
+    Job.JobStateChoices.UNKNOWN,
+    Job.JobStateChoices.STALE,
+}
+
+
+class EventSession:
+    """Minimal request stand-in for resolving the user from a session cookie"""
+
+    def __init__(self, scope):
+        cookies = SimpleCookie()
+        for name, value in scope.get("headers", []):
+            if name == b"cookie":
+                cookies.load(value.decode("latin-1"))
+        morsel = cookies.get(settings.SESSION_COOKIE_NAME)
+        engine = import_module(settings.SESSION_ENGINE)
+        self.session = engine.SessionStore(morsel.value if morsel else None)
+
+
+@sync_to_async
+def get_job_snapshot(scope, job_id):
+    """Return the current job progress if the session user may watch the job"""
+    from django.contrib.auth import get_user
+
+    user = get_user(EventSession(scope))
+    if not user.is_authenticated:
+        return None
+    jobs = Job.objects.filter(job_id=job_id)
+    if not user.is_staff:
+        jobs = jobs.filter(user_id=user)
+    jobs = list(jobs.values("job_id", "state", "tasks"))
+    if not jobs:
+        return None
+    return get_jobs_progress(jobs)[str(job_id)]
+
+
+def is_terminal(data):
+    return data.get("state") in TERMINAL_STATES
+
+
+def format_event(event, data):
+    """Encode an event, flagging whether it ends the stream for the browser"""
+    data = {**data, "terminal": is_terminal(data)}
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n".encode()
+
+
+async def send_response(send, status, body=b""):
+    await send(
+        {
+            "type": "http.response.start",
+            "status": status,
+            "headers": [(b"content-type", b"text/plain; charset=utf-8")],
+        }
+    )
+    await send({"type": "http.response.body", "body": body})
+
+
+async def watch_disconnect(receive, disconnected):
+    while True:
+        message = await receive()
+        if message["type"] == "http.disconnect":
+            disconnected.set()
+            return
+
+
+async def job_events_application(scope, receive, send, job_id):
+    if scope["method"] != "GET":
+        await send_response(send, 405)
+        return
+
+    # Subscribe before reading the snapshot, so that no event published
+    # after the snapshot was taken is missed
+    redis = get_async_redis()
+    pubsub = redis.pubsub()
+    try:
+        await subscribe(pubsub, job_channel(job_id))
+        snapshot = await get_job_snapshot(scope, job_id)
+        if snapshot is None:
+            await send_response(send, 404)
+            return
+        await stream_job_events(receive, send, pubsub, job_id, snapshot)
+    finally:
+        await pubsub.unsubscribe()
+        await pubsub.close()
+        await redis.close()
+
+
+async def subscribe(pubsub, channel):
+    """Subscribe to a channel and wait until the subscription is confirmed"""
+    await pubsub.subscribe(channel)
+    while True:
+        message = await pubsub.get_message(timeout=KEEPALIVE_SECONDS)
+        if message is None or message["type"] == "subscribe":
+            return
+
+
+async def stream_job_events(receive, send, pubsub, job_id, snapshot):
+    """Send the job snapshot, then relay job events until a terminal state"""
+    await send(
+        {
+            "type": "http.response.start",
+            "status": 200,
+            "headers": [
+                (b"content-type", b"text/event-stream"),
+                (b"cache-control", b"no-cache"),
+                (b"x-accel-buffering", b"no"),
+            ],
+        }
+    )
+    await send(
+        {
+            "type": "http.response.body",
+            "body": format_event("snapshot", {"job_id": job_id, **snapshot}),
+            "more_body": True,
+        }
+    )
+    if is_terminal(snapshot):
+        await send({"type": "http.response.body", "body": b""})
+        return
+
+    disconnected = asyncio.Event()
+    watcher = asyncio.ensure_future(watch_disconnect(receive, disconnected))
+    await sync_to_async(increment)("progress_watchers", 1)
+    try:
+        while not disconnected.is_set():
+            message = await pubsub.get_message(
+                ignore_subscribe_messages=True, timeout=KEEPALIVE_SECONDS
+            )
+            if message is None:
+                body = b": keepalive\n\n"
+                data = None
+            else:
+                data = json.loads(message["data"])
+                body = format_event(data.pop("event"), data)
+            await send({"type": "http.response.body", "body": body, "more_body": True})
+            if data and is_terminal(data):
+                break
+        if not disconnected.is_set():
+            await send({"type": "http.response.body", "body": b""})
+    finally:
+        await sync_to_async(increment)("progress_watchers", -1)
+        watcher.cancel()
+
+
+def match_events_path(scope):
+    """Return the job id for job event stream requests, otherwise None"""
+    match = JOB_EVENTS_PATH.match(scope["path"])
+    return match.group("job_id") if match else None
+
+
+async def sse_application(scope, receive, send):
+    await job_events_application(scope, receive, send, match_events_path(scope))
@@ -12,6 +12,7 @@ from django.conf.urls.i18n import i18n_patterns
 from geodata_mart.maps import views as map_views
 from geodata_mart.vendors import views as vendor_views
 from geodata_mart.views import geodata as geodata_view
+from geodata_mart.views import metrics as metrics_view
 
 urlpatterns = i18n_patterns(
     path("", map_views.gallery, name="gallery"),
@@ -37,6 +38,9 @@ if settings.DEBUG:
     # Static file serving when using Gunicorn + Uvicorn for local web socket development
     urlpatterns += staticfiles_urlpatterns()
 
+# Prometheus metrics
+urlpatterns += [path("metrics", metrics_view, name="metrics")]
+
 # API URLS
 urlpatterns += [
     # API base url
@@ -33,14 +33,18 @@ from qgis.core import (
     QgsWkbTypes,
     QgsProcessingParameterString,
     QgsProcessingParameterCrs,
+    QgsRasterLayer,
 )
 from PyQt5.QtCore import QVariant
 from qgis import processing
 
 # import processing
 import os
+import json
+import time
+import hashlib
 from pathlib import Path
-from datetime import date
+from datetime import date, datetime
 from math import floor
 
 
@@ -65,6 +69,7 @@ class GdmClipProjectLayers(QgsProcessingAlgorithm):
     OUTPUT_CRS = "OUTPUT_CRS"
     PROJECT_CRS = "PROJECT_CRS"
     PROGRESS_RECORDER = "PROGRESS_RECORDER"
+    TRACEPARENT = "TRACEPARENT"
     OUTPUT = "OUTPUT"
 
     def tr(self, string):
@@ -216,6 +221,16 @@ class GdmClipProjectLayers(QgsProcessingAlgorithm):
             )
         )
 
+        self.addParameter(
+            QgsProcessingParameterString(
+                name=self.TRACEPARENT,
+                description=self.tr(
+                    "W3C trace context of the calling job. GeoData Mart Use Only."
+                ),
+                optional=True,
+            )
+        )
+
         # Output geopackage
         self.addParameter(
             QgsProcessingParameterString(
@@ -287,6 +302,8 @@ class GdmClipProjectLayers(QgsProcessingAlgorithm):
 
             with ZipFile(file_name, "w") as zip:
                 for file in file_paths:
+                    if feedback.isCanceled():
+                        break
                     zip.write(file, arcname=os.path.basename(file))
 
             # zip = ZipFile(file_name, "rb")
@@ -323,10 +340,185 @@ class GdmClipProjectLayers(QgsProcessingAlgorithm):
         except Exception as e:
             feedback.reportError(str(e), fatalError=False)
 
-    def initializeOutputs(self, parameters, context, feedback):
+    # #####  CHECKPOINTS  #####
+    # A manifest of completed layers is kept alongside the output geopackage,
+    # so that a retried or resubmitted job only clips the layers that are
+    # still outstanding instead of starting over.
+
+    def getManifestPath(self):
+        return os.path.join(self.output_path, self.jobid + ".manifest.json")
+
+    def getParameterFingerprint(self, parameters):
+        """Hash the parameters that determine the content of clipped outputs"""
+        values = [
+            str(self.getParameterValue(parameters, name) or "")
+            for name in ["LAYERS", "EXCLUDES", "CLIP_GEOM", "OUTPUT_CRS", "PROJECT_CRS"]
+        ]
+        return hashlib.sha256("|".join(values).encode()).hexdigest()
+
+    def loadManifest(self, parameters, feedback):
+        """
+        Load the checkpoint manifest for the job, discarding it if it was
+        written for different request parameters or cannot be read.
+        """
+        fingerprint = self.getParameterFingerprint(parameters)
+        self.manifest = {"fingerprint": fingerprint, "layers": {}}
+        try:
+            with open(self.getManifestPath()) as f:
+                manifest = json.load(f)
+        except (OSError, ValueError):
+            return False
+        if manifest.get("fingerprint") != fingerprint:
+            feedback.pushInfo("Discarding checkpoints for different parameters")
+            return False
+        self.manifest = manifest
+        feedback.pushInfo(f"Resuming with {len(manifest['layers'])} completed layers")
+        return True
+
+    def writeManifest(self):
+        """Atomically replace the manifest file with the current checkpoints"""
+        manifest_path = self.getManifestPath()
+        with open(manifest_path + ".tmp", "w") as f:
+            json.dump(self.manifest, f)
+        os.replace(manifest_path + ".tmp", manifest_path)
+
+    def checkpointLayer(self, layer, layer_type, source, **stats):
+        """Record a layer output as complete once it has been written"""
+        self.manifest["layers"][layer.id()] = dict(
+            name=layer.name(),
+            type=layer_type,
+            source=source,
+            completed=datetime.now().isoformat(),
+            **stats,
+        )
+        self.writeManifest()
+
+    def validateCheckpoint(self, layer, feedback):
+        """
+        Check that the recorded output for a layer still exists and matches
+        what was written, returning the checkpoint entry if it can be reused.
+        """
+        checkpoint = self.manifest["layers"].get(layer.id())
+        if not checkpoint:
+            return None
+        if checkpoint["type"] == "vector":
+            output = QgsVectorLayer(checkpoint["source"], "checkpoint", "ogr")
+            valid = output.isValid() and (
+                output.featureCount() == checkpoint["feature_count"]
+            )
+        else:
+            output = QgsRasterLayer(checkpoint["source"], "checkpoint", "gdal")
+            valid = (
+                output.isValid()
+                and os.path.getsize(checkpoint["source"]) == checkpoint["size"]
+            )
+        del output
+        if not valid:
+            feedback.pushWarning(f"Checkpoint for {layer.name()} is invalid")
+            del self.manifest["layers"][layer.id()]
+            return None
+        return checkpoint
+
+    def restoreLayer(self, parameters, context, feedback, layer, checkpoint):
+        """Point a layer at its checkpointed output instead of clipping again"""
+        source_options = QgsDataProvider.ProviderOptions()
+        source_options.transformContext = QgsProject.instance().transformContext()
+        layer.setDataSource(
+            checkpoint["source"],
+            layer.name().replace('"', ""),
+            "ogr" if checkpoint["type"] == "vector" else "gdal",
+            source_options,
+        )
+        layer.reload()
+        steps = 2 if checkpoint["type"] == "vector" and self.output_crs else 1
+        for step in range(steps):
+            self.incrementProgress(
+                feedback, msg=f"Layer {layer.name()} restored from checkpoint"
+            )
+        feedback.pushInfo(f"Restored {layer.name()} from {checkpoint['source']}")
+        QgsProject.instance().write()
+
+    # #####  METRICS  #####
+    # Stage and per layer timings are collected on the algorithm instance,
+    # so the calling task can read them back and store them with the job,
+    # including for runs that fail part way through. Spans are recorded with
+    # wall clock times for the task to export within the trace of the job.
+
+    def recordSpan(self, name, seconds, **attributes):
+        """Record a span of the given duration ending now"""
+        end = time.time()
+        self.metrics["spans"].append(
+            {"name": name, "start": end - seconds, "end": end, "attributes": attributes}
+        )
+
+    def recordStage(self, name, started):
+        """Accumulate the time since started for a stage and return the time now"""
+        now = time.perf_counter()
+        stages = self.metrics["stages"]
+        stages[name] = round(stages.get(name, 0) + now - started, 6)
+        self.recordSpan(name, now - started)
+        return now
+
+    def runChild(self, algorithm, parameters, layer=None, **kwargs):
+        """Run a child processing algorithm, recording it as a span"""
+        started = time.perf_counter()
+        try:
+            return processing.run(algorithm, parameters, **kwargs)
+        finally:
+            self.recordSpan(
+                algorithm,
+                time.perf_counter() - started,
+                layer=layer.name() if layer else None,
+            )
+
+    def getOutputSize(self):
+        """Total size in bytes of the files in the output directory"""
+        size = 0
+        for root, directories, files in os.walk(self.output_path):
+            for filename in files:
+                try:
+                    size += os.path.getsize(os.path.join(root, filename))
+                except OSError:
+                    continue
+        return size
+
+    def getFeatureCount(self, layer):
+        """Feature count of a vector layer, or None if unknown or not a vector"""
+        if layer.type() != QgsMapLayer.VectorLayer:
+            return None
+        count = layer.featureCount()
+        return count if count >= 0 else None
+
+    def recordLayer(self, layer, started, features_in, size_before, restored=False):
+        """Record the duration, feature counts and bytes written for a layer"""
+        checkpoint = self.manifest["layers"].get(layer.id(), {})
+        entry = {
+            "name": layer.name(),
+            "type": checkpoint.get("type", "other"),
+            "seconds": round(time.perf_counter() - started, 6),
+            "features_in": features_in,
+            "features_out": checkpoint.get("feature_count"),
+            "bytes_written": self.getOutputSize() - size_before,
+            "restored": restored,
+            "completed": bool(checkpoint),
+        }
+        self.metrics["layers"].append(entry)
+        self.recordSpan(
+            "clip_layer",
+            entry["seconds"],
+            layer=entry["name"],
+            type=entry["type"],
+            features_in=features_in,
+            features_out=entry["features_out"],
+            bytes_written=entry["bytes_written"],
+            restored=restored,
+        )
+
+    def initializeOutputs(self, parameters, context, feedback, resume=False):
         """
         Remove existing zip outputs matching the expected output path,
-        and instantiate a new geopackage with select metadata
+        and instantiate a new geopackage with select metadata. When resuming
+        from checkpoints the existing geopackage is kept.
 
         Raises:
             QgsProcessingException: Issues with removal or creation indicating permissions issues
@@ -334,7 +526,10 @@ class GdmClipProjectLayers(QgsProcessingAlgorithm):
         feedback.pushInfo(f"Initializing Outputs")
         output_gpkg = os.path.join(self.output_path, self.jobid + ".gpkg")
         output_zip = os.path.join(self.output_path, self.jobid + ".zip")
-        if os.path.exists(output_gpkg):
+        if resume and os.path.exists(output_gpkg):
+            feedback.pushInfo(f"Resuming with existing {output_gpkg}")
+            output_gpkg = None
+        elif os.path.exists(output_gpkg):
             try:
                 os.remove(output_gpkg)
                 feedback.pushInfo(f"Existing {output_gpkg} has been removed")
@@ -355,6 +550,9 @@ class GdmClipProjectLayers(QgsProcessingAlgorithm):
             except Exception as e:
                 feedback.reportError(str(e), fatalError=True)
 
+        if output_gpkg is None:
+            return
+
         try:
             md = QgsProviderRegistry.instance().providerMetadata("ogr")
             conn = md.createConnection(output_gpkg, {})
@@ -423,7 +621,7 @@ class GdmClipProjectLayers(QgsProcessingAlgorithm):
             clip_layer.setCrs(QgsCoordinateReferenceSystem("EPSG:4326"))
 
             if self.output_crs:
-                clipping_geometry = processing.run(
+                clipping_geometry = self.runChild(
                     "native:reprojectlayer",
                     {
                         "INPUT": clip_layer,
@@ -492,13 +690,14 @@ class GdmClipProjectLayers(QgsProcessingAlgorithm):
         output_gpkg = os.path.join(self.output_path, self.jobid + ".gpkg")
 
         try:
-            clipped_vector = processing.run(
+            clipped_vector = self.runChild(
                 "native:clip",
                 {
                     "INPUT": layer,
                     "OVERLAY": clip_layer,
                     "OUTPUT": QgsProcessing.TEMPORARY_OUTPUT,
                 },
+                layer=layer,
                 context=context,
                 feedback=feedback,
             )["OUTPUT"]
@@ -509,13 +708,14 @@ class GdmClipProjectLayers(QgsProcessingAlgorithm):
             )
 
             if self.output_crs:
-                output_vector = processing.run(
+                output_vector = self.runChild(
                     "native:reprojectlayer",
                     {
                         "INPUT": clipped_vector,
                         "TARGET_CRS": QgsCoordinateReferenceSystem(self.output_crs),
                         "OUTPUT": QgsProcessing.TEMPORARY_OUTPUT,
                     },
+                    layer=layer,
                     context=context,
                     feedback=feedback,
                 )["OUTPUT"]
@@ -547,6 +747,12 @@ class GdmClipProjectLayers(QgsProcessingAlgorithm):
 
             if filesave_error[0] == QgsVectorFileWriter.NoError:
                 feedback.pushInfo(f"Clipped result saved to {output_gpkg}|{layer_name}")
+                self.checkpointLayer(
+                    layer,
+                    "vector",
+                    f"{output_gpkg}|layername={layer_name}",
+                    feature_count=output_vector.featureCount(),
+                )
             else:
                 feedback.reportError(str(filesave_error), fatalError=False)
 
@@ -606,7 +812,7 @@ class GdmClipProjectLayers(QgsProcessingAlgorithm):
                 crs = QgsCoordinateReferenceSystem(self.output_crs)
             else:
                 crs = None
-            clipped_raster = processing.run(
+            clipped_raster = self.runChild(
                 "gdal:cliprasterbymasklayer",
                 {
                     "INPUT": layer,
@@ -627,10 +833,15 @@ class GdmClipProjectLayers(QgsProcessingAlgorithm):
                     "EXTRA": "",
                     "OUTPUT": output_img,
                 },
+                layer=layer,
                 context=context,
                 feedback=feedback,
             )["OUTPUT"]
 
+            self.checkpointLayer(
+                layer, "raster", clipped_raster, size=os.path.getsize(clipped_raster)
+            )
+
             self.incrementProgress(
                 feedback,
                 msg=f"Raster layer {layer.name()} clipped",
@@ -693,6 +904,11 @@ class GdmClipProjectLayers(QgsProcessingAlgorithm):
         Run processing algorithm
         """
 
+        self.metrics = {"stages": {}, "layers": [], "spans": []}
+        started = time.perf_counter()
+        traceparent = self.getParameterValue(parameters, "TRACEPARENT")
+        if traceparent:
+            feedback.pushInfo(f"Trace context {traceparent}")
         self.output_crs = self.getParameterValue(parameters, "OUTPUT_CRS")
         self.project_crs = self.getParameterValue(parameters, "PROJECT_CRS")
 
@@ -834,8 +1050,12 @@ class GdmClipProjectLayers(QgsProcessingAlgorithm):
         )
 
         Path(self.output_path).mkdir(parents=True, exist_ok=True)
+        started = self.recordStage("prepare", started)
 
-        self.initializeOutputs(parameters, context, feedback)
+        resume = self.loadManifest(parameters, feedback)
+        self.initializeOutputs(parameters, context, feedback, resume=resume)
+        if not resume:
+            self.writeManifest()
 
         # Save a copy of the project
         # TODO replace projectName with reasonable vendor-project identifier
@@ -850,17 +1070,31 @@ class GdmClipProjectLayers(QgsProcessingAlgorithm):
             QgsProject.instance().setCrs(QgsCoordinateReferenceSystem(self.project_crs))
         # Save changes
         QgsProject.instance().write()
+        started = self.recordStage("initialize_outputs", started)
 
         clipping_geometry = self.generateClippingGeometry(parameters, context, feedback)
 
         self.setProjectExtent(parameters, context, feedback, clipping_geometry)
+        started = self.recordStage("clipping_geometry", started)
 
         for layer in QgsProject.instance().mapLayers().values():
+            if feedback.isCanceled():
+                break
             if (
                 not layer.shortName() in exclude_layers
                 and (not layer.name() in exclude_layers)
                 and (not layer.source() in exclude_layers)
             ):
+                layer_started = time.perf_counter()
+                features_in = self.getFeatureCount(layer)
+                size_before = self.getOutputSize()
+                checkpoint = self.validateCheckpoint(layer, feedback)
+                if checkpoint:
+                    self.restoreLayer(parameters, context, feedback, layer, checkpoint)
+                    self.recordLayer(
+                        layer, layer_started, features_in, size_before, restored=True
+                    )
+                    continue
                 feedback.pushInfo(f"Processing Layer {layer.name()}")
                 self.clipLayer(
                     parameters,
@@ -869,23 +1103,60 @@ class GdmClipProjectLayers(QgsProcessingAlgorithm):
                     layer,
                     clipping_geometry,
                 )
-            if feedback.isCanceled():
-                break
+                self.recordLayer(layer, layer_started, features_in, size_before)
 
         # Close the project to prevent write locks and permissions issues
         QgsProject.instance().clear()
+        started = self.recordStage("layers", started)
+
+        if feedback.isCanceled():
+            # Cancelled jobs are abandoned, so checkpoints are not kept
+            self.removeOutputs(
+                parameters,
+                context,
+                feedback,
+                [
+                    ".gpkg",
+                    ".gpkg-shm",
+                    ".gpkg-wal",
+                    ".gpkg-journal",
+                    ".tif",
+                    ".zip",
+                    ".manifest.json",
+                ],
+            )
+            raise QgsProcessingException("Processing was canceled")
+
         # Package the outputs
         output_zip_path = str(os.path.join(self.output_path, self.jobid + ".zip"))
-        exclude_files_ext = [".gpkg-shm", ".gpkg-wal", ".gpkg-wal", ".gpkg-journal"]
+        exclude_files_ext = [
+            ".gpkg-shm",
+            ".gpkg-wal",
+            ".gpkg-wal",
+            ".gpkg-journal",
+            ".manifest.json",
+            ".manifest.json.tmp",
+        ]
         zip = self.zipOutputs(
             parameters, context, feedback, exclude_files_ext, output_zip_path
         )
+        started = self.recordStage("zip", started)
+        if os.path.exists(output_zip_path):
+            self.metrics["output_bytes"] = os.path.getsize(output_zip_path)
         if self.progress_recorder:
             self.progress_recorder.set_progress(
                 90, 100, description="QGIS Processing Complete"
             )  # current, total, description
         # Remove obsolete files
-        remove_files_ext = [".gpkg", ".gpkg-shm", ".gpkg-wal", ".gpkg-journal", ".tif"]
+        remove_files_ext = [
+            ".gpkg",
+            ".gpkg-shm",
+            ".gpkg-wal",
+            ".gpkg-journal",
+            ".tif",
+            ".manifest.json",
+        ]
         self.removeOutputs(parameters, context, feedback, remove_files_ext)
+        self.recordStage("cleanup", started)
 
         return {self.OUTPUT: output_zip_path}
@@ -0,0 +1,198 @@
+from django.contrib import admin
+from django.http import HttpResponse
+from django.shortcuts import get_object_or_404
+from django.urls import path, reverse
+from django.utils.html import format_html, format_html_join
+from django.utils.translation import gettext_lazy as _
+
+from geodata_mart.diagnostics import models
+from geodata_mart.utils.profiling import get_top_functions
+
+
+@admin.register(models.RequestProfile)
+class RequestProfileAdmin(admin.ModelAdmin):
+    """Profiles of sampled and requested page loads"""
+
+    list_display = (
+        "id",
+        "created_date",
+        "method",
+        "path",
+        "view_name",
+        "status_code",
+        "duration",
+        "query_count",
+        "query_seconds",
+        "sample_count",
+        "trigger",
+    )
+    list_display_links = ("id", "path")
+    list_filter = ("trigger", "method", "status_code", "view_name")
+    search_fields = ("path", "view_name", "user__username")
+    date_hierarchy = "created_date"
+    ordering = ("-created_date",)
+    raw_id_fields = ("user",)
+    exclude = ("queries", "stacks")
+    readonly_fields = (
+        "path",
+        "method",
+        "view_name",
+        "status_code",
+        "user",
+        "trigger",
+        "duration",
+        "query_count",
+        "query_seconds",
+        "sample_interval",
+        "sample_count",
+        "created_date",
+        "flame_graph",
+        "top_functions",
+        "slowest_queries",
+    )
+
+    def has_add_permission(self, request):
+        return False
+
+    def get_urls(self):
+        return [
+            path(
+                "<int:pk>/stacks/",
+                self.admin_site.admin_view(self.download_stacks),
+                name="diagnostics_requestprofile_stacks",
+            )
+        ] + super().get_urls()
+
+    def download_stacks(self, request, pk):
+        """Serve the collapsed stacks for a flame graph tool"""
+        profile = get_object_or_404(models.RequestProfile, pk=pk)
+        response = HttpResponse(profile.stacks, content_type="text/plain")
+        response["Content-Disposition"] = f'attachment; filename="profile-{pk}.folded"'
+        return response
+
+    @admin.display(description=_("Flame graph"))
+    def flame_graph(self, obj):
+        if not obj.stacks:
+            return "-"
+        return format_html(
+            '<a href="{}">{}</a> ({})',
+            reverse("admin:diagnostics_requestprofile_stacks", args=[obj.pk]),
+            _("Download collapsed stacks"),
+            _("open with speedscope or flamegraph.pl"),
+        )
+
+    @admin.display(description=_("Top functions"))
+    def top_functions(self, obj):
+        """Functions that were running in the most samples"""
+        functions = get_top_functions(obj.stacks)
+        if not functions:
+            return "-"
+        return format_html(
+            "<table><tr><th>Function</th><th>Self</th><th>Total</th></tr>{}</table>",
+            format_html_join(
+                "", "<tr><td>{}</td><td>{}</td><td>{}</td></tr>", functions
+            ),
+        )
+
+    @admin.display(description=_("Slowest queries"))
+    def slowest_queries(self, obj):
+        """Distinct queries ordered by the total time spent running them"""
+        if not obj.queries:
+            return "-"
+        return format_html(
+            "<table><tr><th>Count</th><th>Seconds</th><th>SQL</th></tr>{}</table>",
+            format_html_join(
+                "",
+                "<tr><td>{}</td><td>{}</td><td><code>{}</code></td></tr>",
+                (
+                    (query.get("count"), query.get("seconds"), query.get("sql"))
+                    for query in obj.queries
+                ),
+            ),
+        )
+
+
+class SlowQueryInline(admin.TabularInline):
+    model = models.SlowQuery
+    fields = ("created_date", "seconds", "source", "params", "query_plan")
+    readonly_fields = fields
+    ordering = ("-created_date",)
+    extra = 0
+    max_num = 0
+    can_delete = False
+
+    @admin.display(description=_("Query plan"))
+    def query_plan(self, obj):
+        return format_html("<pre>{}</pre>", obj.plan) if obj.plan else "-"
+
+
+@admin.register(models.SlowQueryFingerprint)
+class SlowQueryFingerprintAdmin(admin.ModelAdmin):
+    """Slow queries grouped by their normalised SQL"""
+
+    list_display = (
+        "id",
+        "short_sql",
+        "count",
+        "total_seconds",
+        "mean_seconds",
+        "max_seconds",
+        "last_source",
+        "last_seen_date",
+    )
+    list_display_links = ("id", "short_sql")
+    list_filter = ("last_seen_date",)
+    search_fields = ("normalized_sql", "last_source", "samples__source")
+    ordering = ("-total_seconds",)
+    readonly_fields = (
+        "fingerprint",
+        "normalized_sql",
+        "count",
+        "total_seconds",
+        "mean_seconds",
+        "max_seconds",
+        "last_source",
+        "first_seen_date",
+        "last_seen_date",
+    )
+    inlines = [SlowQueryInline]
+
+    def has_add_permission(self, request):
+        return False
+
+    @admin.display(description=_("SQL"))
+    def short_sql(self, obj):
+        return str(obj)
+
+    @admin.display(description=_("Mean Time (s)"))
+    def mean_seconds(self, obj):
+        return obj.mean_seconds
+
+
+@admin.register(models.SlowQuery)
+class SlowQueryAdmin(admin.ModelAdmin):
+    """Sampled runs of slow queries with their query plans"""
+
+    list_display = ("id", "created_date", "seconds", "source", "fingerprint")
+    list_display_links = ("id", "created_date")
+    list_filter = ("source", "created_date")
+    search_fields = ("sql", "source")
+    date_hierarchy = "created_date"
+    ordering = ("-created_date",)
+    exclude = ("plan",)
+    readonly_fields = (
+        "fingerprint",
+        "sql",
+        "params",
+        "seconds",
+        "source",
+        "created_date",
+        "query_plan",
+    )
+
+    def has_add_permission(self, request):
+        return False
+
+    @admin.display(description=_("Query plan"))
+    def query_plan(self, obj):
+        return format_html("<pre>{}</pre>", obj.plan) if obj.plan else "-"
@@ -0,0 +1,14 @@
+from django.apps import AppConfig
+from django.utils.translation import gettext_lazy as _
+
+
+class DiagnosticsConfig(AppConfig):
+    default_auto_field = "django.db.models.BigAutoField"
+    name = "geodata_mart.diagnostics"
+    verbose_name = _("Diagnostics")
+
+    def ready(self):
+        try:
+            import geodata_mart.diagnostics.signals  # noqa F401
+        except ImportError:
+            pass
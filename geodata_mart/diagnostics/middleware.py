@@ -0,0 +1,132 @@
+import logging
+import random
+import time
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.db import DatabaseError, connections
+
+from geodata_mart.diagnostics.models import RequestProfile
+from geodata_mart.diagnostics.queries import finish_capture, set_source, start_capture
+from geodata_mart.utils.profiling import StackSampler
+
+logger = logging.getLogger(__name__)
+
+
+class QueryRecorder:
+    """Database execute wrapper that times queries, grouped by their SQL"""
+
+    def __init__(self):
+        self.count = 0
+        self.seconds = 0
+        self.queries = {}
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            seconds = time.perf_counter() - started
+            self.count += 1
+            self.seconds += seconds
+            query = self.queries.setdefault(sql, {"sql": sql, "count": 0, "seconds": 0})
+            query["count"] += 1
+            query["seconds"] += seconds
+
+    def get_slowest(self, count=None):
+        """Distinct queries ordered by the total time spent running them"""
+        queries = sorted(
+            self.queries.values(), key=lambda query: query["seconds"], reverse=True
+        )
+        return [
+            dict(query, seconds=round(query["seconds"], 6)) for query in queries[:count]
+        ]
+
+
+class ProfilingMiddleware:
+    """Profile a sample of requests, or requests that staff ask to profile
+
+    ``PROFILING_SAMPLE_RATE`` sets the fraction of requests profiled, and
+    staff can profile any request by sending the ``PROFILING_HEADER``
+    header. The stacks of the request thread are sampled while the rest of
+    the middleware and the view run, and the database queries are timed, then
+    both are stored as a ``RequestProfile``.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        trigger = self.get_trigger(request)
+        if trigger is None:
+            return self.get_response(request)
+
+        recorder = QueryRecorder()
+        sampler = StackSampler(interval=settings.PROFILING_INTERVAL)
+        response = None
+        with ExitStack() as stack:
+            for connection in connections.all():
+                stack.enter_context(connection.execute_wrapper(recorder))
+            stack.enter_context(sampler)
+            response = self.get_response(request)
+
+        profile = self.save_profile(request, response, trigger, sampler, recorder)
+        if profile and trigger == RequestProfile.TriggerChoices.HEADER:
+            response["X-Profile-Id"] = str(profile.pk)
+        return response
+
+    def get_trigger(self, request):
+        if settings.PROFILING_HEADER in request.headers:
+            user = getattr(request, "user", None)
+            if user is not None and user.is_staff:
+                return RequestProfile.TriggerChoices.HEADER
+        if random.random() < settings.PROFILING_SAMPLE_RATE:
+            return RequestProfile.TriggerChoices.SAMPLE
+        return None
+
+    def save_profile(self, request, response, trigger, sampler, recorder):
+        """Store the profile, logging rather than raising failures"""
+        user = getattr(request, "user", None)
+        match = getattr(request, "resolver_match", None)
+        try:
+            return RequestProfile.objects.create(
+                path=request.path[:2048],
+                method=request.method,
+                view_name=(match.view_name if match else "")[:255],
+                status_code=response.status_code,
+                user=user if user is not None and user.is_authenticated else None,
+                trigger=trigger,
+                duration=sampler.duration,
+                query_count=recorder.count,
+                query_seconds=round(recorder.seconds, 6),
+                queries=recorder.get_slowest(settings.PROFILING_MAX_QUERIES),
+                sample_interval=sampler.interval,
+                sample_count=sampler.samples,
+                stacks=sampler.folded(),
+            )
+        except DatabaseError as e:
+            logger.warning(f"Unable to save profile of {request.path}: {e}")
+            return None
+
+
+class SlowQueryMiddleware:
+    """Capture slow queries run while handling a request
+
+    Queries are attributed to the view once the URL is resolved, and are
+    stored after the response is ready, outside the request transaction.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        tokens = start_capture(f"path:{request.path[:240]}")
+        try:
+            return self.get_response(request)
+        finally:
+            finish_capture(tokens)
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        match = request.resolver_match
+        if match:
+            set_source(f"view:{match.view_name}"[:255])
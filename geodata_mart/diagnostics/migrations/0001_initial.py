@@ -0,0 +1,42 @@
+# Generated by Django 3.2.13 on 2026-10-19 15:12
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RequestProfile',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('path', models.CharField(max_length=2048, verbose_name='Path')),
+                ('method', models.CharField(max_length=10, verbose_name='Method')),
+                ('view_name', models.CharField(blank=True, max_length=255, verbose_name='View Name')),
+                ('status_code', models.PositiveSmallIntegerField(null=True, verbose_name='Status Code')),
+                ('trigger', models.CharField(choices=[('SAMPLE', 'Sampled'), ('HEADER', 'Requested')], default='SAMPLE', max_length=10, verbose_name='Trigger')),
+                ('duration', models.FloatField(verbose_name='Duration (s)')),
+                ('query_count', models.PositiveIntegerField(default=0, verbose_name='Query Count')),
+                ('query_seconds', models.FloatField(default=0, verbose_name='Query Time (s)')),
+                ('queries', models.JSONField(blank=True, default=list, verbose_name='Queries')),
+                ('sample_interval', models.FloatField(verbose_name='Sample Interval (s)')),
+                ('sample_count', models.PositiveIntegerField(default=0, verbose_name='Sample Count')),
+                ('stacks', models.TextField(blank=True, verbose_name='Collapsed Stacks')),
+                ('created_date', models.DateTimeField(auto_now_add=True, db_index=True, verbose_name='Created Date')),
+                ('user', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='request_profiles', to=settings.AUTH_USER_MODEL, verbose_name='User')),
+            ],
+            options={
+                'verbose_name': 'Request Profile',
+                'verbose_name_plural': 'Request Profiles',
+                'ordering': ['-created_date'],
+            },
+        ),
+    ]
@@ -0,0 +1,52 @@
+# Generated by Django 3.2.13 on 2026-10-19 18:07
+
+from django.db import migrations, models
+import django.db.models.deletion
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('diagnostics', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SlowQueryFingerprint',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('fingerprint', models.CharField(max_length=40, unique=True, verbose_name='Fingerprint')),
+                ('normalized_sql', models.TextField(verbose_name='Normalised SQL')),
+                ('count', models.PositiveIntegerField(default=0, verbose_name='Count')),
+                ('total_seconds', models.FloatField(default=0, verbose_name='Total Time (s)')),
+                ('max_seconds', models.FloatField(default=0, verbose_name='Maximum Time (s)')),
+                ('last_source', models.CharField(blank=True, max_length=255, verbose_name='Last Source')),
+                ('first_seen_date', models.DateTimeField(auto_now_add=True, verbose_name='First Seen Date')),
+                ('last_seen_date', models.DateTimeField(db_index=True, default=django.utils.timezone.now, verbose_name='Last Seen Date')),
+            ],
+            options={
+                'verbose_name': 'Slow Query Fingerprint',
+                'verbose_name_plural': 'Slow Query Fingerprints',
+                'ordering': ['-total_seconds'],
+            },
+        ),
+        migrations.CreateModel(
+            name='SlowQuery',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('sql', models.TextField(verbose_name='SQL')),
+                ('params', models.TextField(blank=True, verbose_name='Parameters')),
+                ('seconds', models.FloatField(verbose_name='Time (s)')),
+                ('source', models.CharField(blank=True, help_text='View or task that ran the query', max_length=255, verbose_name='Source')),
+                ('plan', models.TextField(blank=True, verbose_name='Query Plan')),
+                ('created_date', models.DateTimeField(auto_now_add=True, db_index=True, verbose_name='Created Date')),
+                ('fingerprint', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='samples', to='diagnostics.slowqueryfingerprint', verbose_name='Fingerprint')),
+            ],
+            options={
+                'verbose_name': 'Slow Query',
+                'verbose_name_plural': 'Slow Queries',
+                'ordering': ['-created_date'],
+            },
+        ),
+    ]
@@ -0,0 +1,119 @@
+from django.db import models
+from django.utils import timezone
+from django.utils.translation import gettext_lazy as _
+
+
+class RequestProfile(models.Model):
+    """Sampled stacks and database queries of a profiled request
+
+    Stacks are stored in the collapsed format, which flame graph tools such
+    as flamegraph.pl and speedscope read directly.
+    """
+
+    class TriggerChoices(models.TextChoices):
+        """Reasons a request was profiled"""
+
+        SAMPLE = "SAMPLE", _("Sampled")
+        HEADER = "HEADER", _("Requested")
+
+    path = models.CharField(_("Path"), max_length=2048)
+    method = models.CharField(_("Method"), max_length=10)
+    view_name = models.CharField(_("View Name"), max_length=255, blank=True)
+    status_code = models.PositiveSmallIntegerField(_("Status Code"), null=True)
+    user = models.ForeignKey(
+        "users.User",
+        on_delete=models.SET_NULL,
+        verbose_name=_("User"),
+        related_name="request_profiles",
+        blank=True,
+        null=True,
+    )
+    trigger = models.CharField(
+        _("Trigger"),
+        max_length=10,
+        choices=TriggerChoices.choices,
+        default=TriggerChoices.SAMPLE,
+    )
+    duration = models.FloatField(_("Duration (s)"))
+    query_count = models.PositiveIntegerField(_("Query Count"), default=0)
+    query_seconds = models.FloatField(_("Query Time (s)"), default=0)
+    queries = models.JSONField(_("Queries"), default=list, blank=True)
+    sample_interval = models.FloatField(_("Sample Interval (s)"))
+    sample_count = models.PositiveIntegerField(_("Sample Count"), default=0)
+    stacks = models.TextField(_("Collapsed Stacks"), blank=True)
+    created_date = models.DateTimeField(
+        auto_now_add=True, verbose_name=_("Created Date"), db_index=True
+    )
+
+    class Meta:
+        verbose_name = _("Request Profile")
+        verbose_name_plural = _("Request Profiles")
+        ordering = ["-created_date"]
+
+    def __str__(self):
+        return f"{self.method} {self.path}"
+
+
+class SlowQueryFingerprint(models.Model):
+    """Slow queries grouped by their normalised SQL
+
+    Counts and timings include every run over the slow query threshold,
+    including those that were not stored as samples.
+    """
+
+    fingerprint = models.CharField(_("Fingerprint"), max_length=40, unique=True)
+    normalized_sql = models.TextField(_("Normalised SQL"))
+    count = models.PositiveIntegerField(_("Count"), default=0)
+    total_seconds = models.FloatField(_("Total Time (s)"), default=0)
+    max_seconds = models.FloatField(_("Maximum Time (s)"), default=0)
+    last_source = models.CharField(_("Last Source"), max_length=255, blank=True)
+    first_seen_date = models.DateTimeField(
+        auto_now_add=True, verbose_name=_("First Seen Date")
+    )
+    last_seen_date = models.DateTimeField(
+        default=timezone.now, verbose_name=_("Last Seen Date"), db_index=True
+    )
+
+    class Meta:
+        verbose_name = _("Slow Query Fingerprint")
+        verbose_name_plural = _("Slow Query Fingerprints")
+        ordering = ["-total_seconds"]
+
+    def __str__(self):
+        return self.normalized_sql[:100]
+
+    @property
+    def mean_seconds(self):
+        return round(self.total_seconds / self.count, 6) if self.count else None
+
+
+class SlowQuery(models.Model):
+    """Sampled run of a slow query, with the view or task that ran it"""
+
+    fingerprint = models.ForeignKey(
+        SlowQueryFingerprint,
+        on_delete=models.CASCADE,
+        verbose_name=_("Fingerprint"),
+        related_name="samples",
+    )
+    sql = models.TextField(_("SQL"))
+    params = models.TextField(_("Parameters"), blank=True)
+    seconds = models.FloatField(_("Time (s)"))
+    source = models.CharField(
+        _("Source"),
+        max_length=255,
+        help_text=_("View or task that ran the query"),
+        blank=True,
+    )
+    plan = models.TextField(_("Query Plan"), blank=True)
+    created_date = models.DateTimeField(
+        auto_now_add=True, verbose_name=_("Created Date"), db_index=True
+    )
+
+    class Meta:
+        verbose_name = _("Slow Query")
+        verbose_name_plural = _("Slow Queries")
+        ordering = ["-created_date"]
+
+    def __str__(self):
+        return f"{self.source or '-'}: {self.seconds}s"
@@ -0,0 +1,208 @@
+"""Capture of slow database queries
+
+An execute wrapper is added to every database connection, which times each
+query and keeps those over ``SLOW_QUERY_THRESHOLD`` seconds, or none when it
+is 0, while a request or task is running. They are only written once the
+request or task ends, outside its transaction, so that recording never
+affects the queries being measured.
+
+Queries are grouped by a fingerprint of their normalised SQL, with literal
+values and parameter lists removed. Each fingerprint counts every slow run,
+while only a sample of runs are stored with their parameters and the view or
+task that ran them. An ``EXPLAIN (ANALYZE, BUFFERS)`` plan of each sample is
+added by a Celery task, so that requests never wait for the query to run
+again.
+"""
+import hashlib
+import logging
+import random
+import re
+import time
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.db import DatabaseError, connections, transaction
+from django.db.models import F
+from django.db.models.functions import Greatest
+from django.utils import timezone
+from kombu.exceptions import OperationalError
+
+logger = logging.getLogger(__name__)
+
+# view or task name, and the slow queries it has run, while one is running
+query_source = ContextVar("query_source", default=None)
+slow_queries = ContextVar("slow_queries", default=None)
+
+STRING_PATTERN = re.compile(r"'(?:[^']|'')*'")
+NUMBER_PATTERN = re.compile(r"\b\d+(?:\.\d+)?\b")
+PLACEHOLDER_PATTERN = re.compile(r"%s")
+LIST_PATTERN = re.compile(r"\(\s*\?(?:\s*,\s*\?)+\s*\)")
+WHITESPACE_PATTERN = re.compile(r"\s+")
+
+
+def normalize_sql(sql):
+    """Replace literal values in SQL so that similar queries compare equal"""
+    sql = STRING_PATTERN.sub("?", sql)
+    sql = NUMBER_PATTERN.sub("?", sql)
+    sql = PLACEHOLDER_PATTERN.sub("?", sql)
+    sql = LIST_PATTERN.sub("(...)", sql)
+    return WHITESPACE_PATTERN.sub(" ", sql).strip()
+
+
+def get_fingerprint(normalized_sql):
+    return hashlib.sha1(normalized_sql.encode()).hexdigest()
+
+
+def record_slow_query(execute, sql, params, many, context):
+    """Execute wrapper keeping queries over the threshold for the current source"""
+    started = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        seconds = time.perf_counter() - started
+        queries = slow_queries.get()
+        threshold = settings.SLOW_QUERY_THRESHOLD
+        if queries is not None and threshold and seconds >= threshold:
+            queries.append(
+                {
+                    "sql": sql,
+                    "params": params,
+                    "many": many,
+                    "alias": context["connection"].alias,
+                    "seconds": seconds,
+                    "executed_sql": get_executed_sql(context, sql, params, many),
+                }
+            )
+
+
+def get_executed_sql(context, sql, params, many):
+    """SQL sent to PostgreSQL with the parameters bound, to explain it later
+
+    psycopg2 keeps the last query on the cursor, so this does not query the
+    database. Returns None for other databases and for ``executemany``.
+    """
+    connection = context["connection"]
+    if connection.vendor != "postgresql" or many:
+        return None
+    try:
+        return connection.ops.last_executed_query(context["cursor"], sql, params)
+    except (AttributeError, DatabaseError):
+        return None
+
+
+def install_query_recorder(sender, connection, **kwargs):
+    """Add the slow query wrapper to a new database connection"""
+    if record_slow_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(record_slow_query)
+
+
+def start_capture(source):
+    """Start keeping slow queries for a view or task
+
+    Returns:
+        tuple: tokens to pass to ``finish_capture``
+    """
+    return query_source.set(source), slow_queries.set([])
+
+
+def finish_capture(tokens):
+    """Stop keeping slow queries and store those that were captured"""
+    queries, source = slow_queries.get(), query_source.get()
+    query_source.reset(tokens[0])
+    slow_queries.reset(tokens[1])
+    if queries:
+        store_slow_queries(queries, source)
+
+
+def set_source(source):
+    """Attribute queries captured from now on to a more specific source"""
+    if slow_queries.get() is not None:
+        query_source.set(source)
+
+
+def is_explainable(query):
+    """Whether a captured query is a single SELECT that can be explained
+
+    ANALYZE runs the statement, so only SELECT statements are explained.
+    """
+    sql = query.get("executed_sql")
+    return bool(sql) and sql.lstrip().upper().startswith("SELECT")
+
+
+def explain(sql, alias):
+    """Run a query under EXPLAIN (ANALYZE, BUFFERS) and return its plan
+
+    The query is run in a transaction that is rolled back, with
+    ``SLOW_QUERY_EXPLAIN_TIMEOUT`` as the statement timeout.
+
+    Args:
+        sql (str): a SELECT statement with its parameters bound
+        alias (str): database the query was run on
+
+    Returns:
+        str: the query plan, or an empty string if it could not be explained
+    """
+    try:
+        with transaction.atomic(using=alias):
+            with connections[alias].cursor() as cursor:
+                cursor.execute(
+                    "SET LOCAL statement_timeout = %s",
+                    [int(settings.SLOW_QUERY_EXPLAIN_TIMEOUT * 1000)],
+                )
+                cursor.execute(f"EXPLAIN (ANALYZE, BUFFERS) {sql}")
+                plan = "\n".join(row[0] for row in cursor.fetchall())
+            transaction.set_rollback(True, using=alias)
+        return plan
+    except DatabaseError as e:
+        logger.warning(f"Unable to explain slow query: {e}")
+        return ""
+
+
+def store_slow_queries(queries, source):
+    """Add captured queries to their fingerprints and store a sample of them
+
+    Failures are logged rather than raised, so capture never fails requests
+    or tasks.
+    """
+    from geodata_mart.diagnostics.models import SlowQuery, SlowQueryFingerprint
+    from geodata_mart.diagnostics.tasks import explain_slow_query
+
+    now = timezone.now()
+    for query in queries:
+        normalized_sql = normalize_sql(query["sql"])
+        seconds = round(query["seconds"], 6)
+        try:
+            fingerprint, created = SlowQueryFingerprint.objects.get_or_create(
+                fingerprint=get_fingerprint(normalized_sql),
+                defaults={
+                    "normalized_sql": normalized_sql,
+                    "count": 1,
+                    "total_seconds": seconds,
+                    "max_seconds": seconds,
+                    "last_source": source or "",
+                },
+            )
+            if not created:
+                SlowQueryFingerprint.objects.filter(pk=fingerprint.pk).update(
+                    count=F("count") + 1,
+                    total_seconds=F("total_seconds") + seconds,
+                    max_seconds=Greatest("max_seconds", seconds),
+                    last_source=source or "",
+                    last_seen_date=now,
+                )
+            if created or random.random() < settings.SLOW_QUERY_SAMPLE_RATE:
+                sample = SlowQuery.objects.create(
+                    fingerprint=fingerprint,
+                    sql=query["sql"],
+                    params=repr(query["params"]),
+                    seconds=seconds,
+                    source=source or "",
+                )
+                if settings.SLOW_QUERY_EXPLAIN and is_explainable(query):
+                    explain_slow_query.delay(
+                        sample.pk, query["executed_sql"], query["alias"]
+                    )
+        except DatabaseError as e:
+            logger.warning(f"Unable to store slow query: {e}")
+        except OperationalError as e:
+            logger.warning(f"Unable to queue explain of slow query: {e}")
@@ -0,0 +1,28 @@
+from celery.signals import task_postrun, task_prerun
+from django.db.backends.signals import connection_created
+
+from geodata_mart.diagnostics.queries import (
+    finish_capture,
+    install_query_recorder,
+    start_capture,
+)
+
+connection_created.connect(install_query_recorder)
+
+# capture tokens of running tasks by task id
+task_captures = {}
+
+
+@task_prerun.connect
+def start_task_capture(sender=None, task_id=None, task=None, **kwargs):
+    """Capture slow queries run by a task, unless the task opts out"""
+    if not getattr(task, "capture_slow_queries", True):
+        return
+    task_captures[task_id] = start_capture(f"task:{task.name}")
+
+
+@task_postrun.connect
+def finish_task_capture(sender=None, task_id=None, **kwargs):
+    tokens = task_captures.pop(task_id, None)
+    if tokens:
+        finish_capture(tokens)
@@ -0,0 +1,15 @@
+from celery import shared_task
+
+from geodata_mart.diagnostics.models import SlowQuery
+from geodata_mart.diagnostics.queries import explain
+
+
+@shared_task(capture_slow_queries=False)
+def explain_slow_query(slow_query_id, sql, alias="default"):
+    """Add the EXPLAIN (ANALYZE, BUFFERS) plan of a slow query to its sample
+
+    The explained query is itself slow, so queries run by this task are not
+    captured.
+    """
+    plan = explain(sql, alias)
+    return SlowQuery.objects.filter(pk=slow_query_id).update(plan=plan)
@@ -0,0 +1,139 @@
+"""Sampling request profiler"""
+import time
+
+import pytest
+from django.contrib.auth.models import AnonymousUser
+from django.http import HttpResponse
+from django.test import RequestFactory
+from django.urls import reverse
+
+from geodata_mart.diagnostics.middleware import ProfilingMiddleware, QueryRecorder
+from geodata_mart.diagnostics.models import RequestProfile
+from geodata_mart.users.models import User
+from geodata_mart.users.tests.factories import UserFactory
+from geodata_mart.utils.profiling import (
+    StackSampler,
+    get_top_functions,
+    parse_folded,
+)
+
+pytestmark = pytest.mark.django_db
+
+
+def busy_wait(seconds):
+    end = time.perf_counter() + seconds
+    while time.perf_counter() < end:
+        pass
+
+
+def test_sampler_records_the_profiled_thread():
+    with StackSampler(interval=0.001) as sampler:
+        busy_wait(0.1)
+
+    assert sampler.samples > 0
+    assert sum(sampler.stacks.values()) == sampler.samples
+    assert any(stack.endswith(":busy_wait") for stack in sampler.stacks)
+    assert sampler.duration >= 0.1
+
+
+def test_folded_stacks_round_trip():
+    sampler = StackSampler()
+    sampler.stacks.update({"app:main;app:load": 3, "app:main;app:render": 5})
+
+    folded = sampler.folded()
+
+    assert folded.splitlines()[0] == "app:main;app:render 5"
+    assert parse_folded(folded) == sampler.stacks
+    assert get_top_functions(folded) == [("app:render", 5, 5), ("app:load", 3, 3)]
+
+
+def test_query_recorder_groups_queries():
+    recorder = QueryRecorder()
+
+    def execute(sql, params, many, context):
+        return sql
+
+    recorder(execute, "SELECT 1", None, False, {})
+    recorder(execute, "SELECT 1", None, False, {})
+    recorder(execute, "SELECT 2", None, False, {})
+
+    assert recorder.count == 3
+    assert [query["count"] for query in recorder.get_slowest()] in ([2, 1], [1, 2])
+    assert len(recorder.get_slowest(1)) == 1
+
+
+def view(request):
+    User.objects.count()
+    busy_wait(0.02)
+    return HttpResponse("ok")
+
+
+def get_request(user=None, **headers):
+    request = RequestFactory().get("/en/data/", **headers)
+    request.user = user or AnonymousUser()
+    return request
+
+
+def test_requests_are_not_profiled_by_default(settings):
+    settings.PROFILING_SAMPLE_RATE = 0
+
+    response = ProfilingMiddleware(view)(get_request())
+
+    assert response.status_code == 200
+    assert not RequestProfile.objects.exists()
+
+
+def test_sampled_request_is_profiled(settings, user: User):
+    settings.PROFILING_SAMPLE_RATE = 1
+    settings.PROFILING_INTERVAL = 0.001
+
+    response = ProfilingMiddleware(view)(get_request(user))
+
+    profile = RequestProfile.objects.get()
+    assert "X-Profile-Id" not in response
+    assert profile.trigger == RequestProfile.TriggerChoices.SAMPLE
+    assert profile.path == "/en/data/"
+    assert profile.status_code == 200
+    assert profile.user == user
+    assert profile.query_count >= 1
+    assert "users_user" in profile.queries[0]["sql"]
+    assert profile.sample_count > 0
+    assert "busy_wait" in profile.stacks
+
+
+def test_profile_header_requires_staff(settings, user: User):
+    settings.PROFILING_SAMPLE_RATE = 0
+
+    ProfilingMiddleware(view)(get_request(user, HTTP_X_PROFILE="1"))
+    assert not RequestProfile.objects.exists()
+
+    staff = UserFactory(is_staff=True)
+    response = ProfilingMiddleware(view)(get_request(staff, HTTP_X_PROFILE="1"))
+
+    profile = RequestProfile.objects.get()
+    assert profile.trigger == RequestProfile.TriggerChoices.HEADER
+    assert response["X-Profile-Id"] == str(profile.pk)
+
+
+def test_admin_serves_collapsed_stacks(client):
+    staff = UserFactory(is_staff=True, is_superuser=True)
+    profile = RequestProfile.objects.create(
+        path="/en/data/",
+        method="GET",
+        duration=0.1,
+        sample_interval=0.005,
+        sample_count=2,
+        stacks="app:main;app:render 2",
+    )
+    client.force_login(staff)
+
+    detail = client.get(
+        reverse("admin:diagnostics_requestprofile_change", args=[profile.pk])
+    )
+    stacks = client.get(
+        reverse("admin:diagnostics_requestprofile_stacks", args=[profile.pk])
+    )
+
+    assert detail.status_code == 200
+    assert b"app:render" in detail.content
+    assert stacks.content == b"app:main;app:render 2"
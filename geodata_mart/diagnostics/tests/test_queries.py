@@ -0,0 +1,124 @@
+"""Slow query capture"""
+import pytest
+from django.db import connection
+from django.http import HttpResponse
+from django.test import RequestFactory
+from django.urls import resolve
+
+from geodata_mart.diagnostics.middleware import SlowQueryMiddleware
+from geodata_mart.diagnostics.models import SlowQuery, SlowQueryFingerprint
+from geodata_mart.diagnostics.queries import (
+    finish_capture,
+    install_query_recorder,
+    normalize_sql,
+    start_capture,
+)
+from geodata_mart.diagnostics.signals import finish_task_capture, start_task_capture
+from geodata_mart.diagnostics.tasks import explain_slow_query
+from geodata_mart.users.models import User
+
+pytestmark = pytest.mark.django_db
+
+
+@pytest.fixture
+def explained(monkeypatch):
+    """Record queued explain tasks instead of sending them"""
+    explained = []
+    monkeypatch.setattr(
+        explain_slow_query, "delay", lambda *args: explained.append(args)
+    )
+    return explained
+
+
+@pytest.fixture
+def capture_all(settings, explained):
+    settings.SLOW_QUERY_THRESHOLD = 1e-9
+    settings.SLOW_QUERY_SAMPLE_RATE = 0
+    install_query_recorder(None, connection)
+
+
+def test_normalize_sql_removes_literals():
+    assert (
+        normalize_sql(
+            "SELECT  \"id\" FROM t1 WHERE id IN (%s, %s, %s) AND name = 'it''s' LIMIT 21"
+        )
+        == 'SELECT "id" FROM t1 WHERE id IN (...) AND name = ? LIMIT ?'
+    )
+    assert normalize_sql("SELECT * FROM t WHERE id IN (1, 2)") == normalize_sql(
+        "SELECT * FROM t WHERE id IN (3, 4, 5)"
+    )
+
+
+def test_queries_are_not_captured_without_threshold(settings):
+    settings.SLOW_QUERY_THRESHOLD = 0
+    install_query_recorder(None, connection)
+
+    tokens = start_capture("task:test")
+    User.objects.count()
+    finish_capture(tokens)
+
+    assert not SlowQueryFingerprint.objects.exists()
+
+
+def test_queries_are_grouped_by_fingerprint(capture_all, explained):
+    tokens = start_capture("task:test")
+    User.objects.filter(pk=1).exists()
+    User.objects.filter(pk=2).exists()
+    finish_capture(tokens)
+
+    fingerprint = SlowQueryFingerprint.objects.get(
+        normalized_sql__contains="users_user"
+    )
+    assert fingerprint.count == 2
+    assert fingerprint.last_source == "task:test"
+    assert fingerprint.max_seconds <= fingerprint.total_seconds
+    # only the first run is sampled at a sample rate of 0
+    sample = fingerprint.samples.get()
+    assert sample.source == "task:test"
+    assert sample.params == "(1,)"
+    # the plan is added by a task rather than while capturing
+    assert sample.plan == ""
+    _, sql, alias = next(args for args in explained if args[0] == sample.pk)
+    assert "= 1" in sql
+    assert alias == "default"
+
+
+def test_explain_task_stores_plan(capture_all, explained):
+    tokens = start_capture("task:test")
+    User.objects.filter(pk=1).exists()
+    finish_capture(tokens)
+    sample = SlowQuery.objects.get(sql__contains="users_user")
+
+    explain_slow_query(*next(args for args in explained if args[0] == sample.pk))
+
+    sample.refresh_from_db()
+    assert "actual time" in sample.plan
+
+
+def test_queries_are_attributed_to_views(capture_all):
+    def get_response(request):
+        middleware.process_view(request, None, (), {})
+        User.objects.count()
+        return HttpResponse()
+
+    middleware = SlowQueryMiddleware(get_response)
+    request = RequestFactory().get("/en/data/")
+    request.resolver_match = resolve("/en/data/")
+
+    middleware(request)
+
+    sample = SlowQuery.objects.get(sql__contains="users_user")
+    assert sample.source == f"view:{request.resolver_match.view_name}"
+
+
+def test_queries_are_attributed_to_tasks(capture_all):
+    class Task:
+        name = "geodata_mart.maps.tasks.process_job_gdmclip"
+
+    start_task_capture(task_id="task-1", task=Task())
+    User.objects.count()
+    finish_task_capture(task_id="task-1")
+
+    assert SlowQuery.objects.get(sql__contains="users_user").source == (
+        "task:geodata_mart.maps.tasks.process_job_gdmclip"
+    )
@@ -1,6 +1,12 @@
 from django.contrib import admin
 from django.contrib import messages
+from django.utils.html import format_html, format_html_join
 from geodata_mart.maps import models
+from geodata_mart.maps.catalog import sync_project_layers
+from geodata_mart.maps.coverage import ingest_project_coverage
+from geodata_mart.maps.files import verify_queryset
+from geodata_mart.utils.profiling import get_top_functions
+from geodata_mart.utils.timing import get_slowest_layers
 
 
 @admin.register(models.MetaTags)
@@ -95,6 +101,7 @@ class ResultFileAdmin(admin.ModelAdmin):
         "set_state_8",
         "set_state_9",
         "remove_file_object",
+        "verify_file_metadata",
     ]
 
     @admin.display(
@@ -116,6 +123,11 @@ class ResultFileAdmin(admin.ModelAdmin):
             except Exception as e:
                 self.message_user(request, e, level=messages.ERROR)
 
+    @admin.action(description="Verify stored file size and checksum")
+    def verify_file_metadata(self, request, queryset):
+        changed = verify_queryset(queryset)
+        self.message_user(request, f"Verified files, {changed} records updated")
+
     @admin.action(description="Set selected file status to Unspecified")
     def set_state_0(self, request, queryset):
         queryset.update(state=0)
@@ -212,11 +224,19 @@ class JobAdmin(admin.ModelAdmin):
         "parameters",
         "tasks",
         "comment",
+        "processing_seconds",
         "created_date",
         "updated_date",
     )
     list_display_links = ("id", "job_id")
-    list_filter = ("project_id", "user_id", "state", "created_date", "updated_date")
+    list_filter = (
+        "project_id",
+        "user_id",
+        "state",
+        "profile",
+        "created_date",
+        "updated_date",
+    )
     search_fields = ("project_id", "user_id", "comment")
     ordering = ("-created_date",)
     fields = [
@@ -228,8 +248,21 @@ class JobAdmin(admin.ModelAdmin):
         "parameters",
         "tasks",
         "comment",
+        "stage_timings",
+        "slowest_layers",
+        "crash_report",
+        "profile",
+        "profile_files",
     ]
+    readonly_fields = (
+        "stage_timings",
+        "slowest_layers",
+        "crash_report",
+        "profile_files",
+    )
     actions = [
+        "enable_profiling",
+        "disable_profiling",
         "set_state_0",
         "set_state_1",
         "set_state_2",
@@ -242,6 +275,91 @@ class JobAdmin(admin.ModelAdmin):
         "set_state_9",
     ]
 
+    @admin.display(description="Processing time (s)")
+    def processing_seconds(self, obj):
+        return (obj.metrics or {}).get("total_seconds")
+
+    @admin.display(description="Stage timings")
+    def stage_timings(self, obj):
+        """Seconds spent in each stage of the task and the clip algorithm"""
+        metrics = obj.metrics or {}
+        stages = list(metrics.get("stages", {}).items())
+        algorithm = metrics.get("algorithm") or {}
+        stages += [
+            (f"algorithm: {name}", seconds)
+            for name, seconds in algorithm.get("stages", {}).items()
+        ]
+        if not stages:
+            return "-"
+        return format_html(
+            "<table>{}</table>",
+            format_html_join("", "<tr><td>{}</td><td>{}</td></tr>", stages),
+        )
+
+    @admin.display(description="Slowest layers")
+    def slowest_layers(self, obj):
+        """Layers that took longest to clip, with their feature counts and output"""
+        layers = get_slowest_layers(obj.metrics)
+        if not layers:
+            return "-"
+        return format_html(
+            "<table><tr><th>Layer</th><th>Seconds</th><th>Features in</th>"
+            "<th>Features out</th><th>Bytes written</th></tr>{}</table>",
+            format_html_join(
+                "",
+                "<tr><td>{}</td><td>{}</td><td>{}</td><td>{}</td><td>{}</td></tr>",
+                (
+                    (
+                        layer.get("name"),
+                        layer.get("seconds"),
+                        layer.get("features_in"),
+                        layer.get("features_out"),
+                        layer.get("bytes_written"),
+                    )
+                    for layer in layers
+                ),
+            ),
+        )
+
+    @admin.display(description="Crash report")
+    def crash_report(self, obj):
+        """How the forked process of the latest attempt crashed, if it did"""
+        crash = (obj.metrics or {}).get("crash")
+        if not crash:
+            return "-"
+        return format_html(
+            "<div>{}</div><pre>{}</pre>", crash.get("error"), crash.get("traceback")
+        )
+
+    @admin.display(description="Profiles")
+    def profile_files(self, obj):
+        """Links to the profiles recorded for the job"""
+        profiles = obj.profiles.order_by("-created_date")
+        if not profiles:
+            return "-"
+        return format_html_join(
+            "",
+            '<div><a href="{}">Attempt {}</a> ({} samples, {})</div>',
+            (
+                (
+                    profile.file_object.url,
+                    profile.attempt,
+                    profile.sample_count,
+                    "native" if profile.native else "python",
+                )
+                for profile in profiles
+                if profile.file_object
+            ),
+        )
+
+    @admin.action(description="Profile processing of selected jobs")
+    def enable_profiling(self, request, queryset):
+        queryset.update(profile=True)
+
+    @admin.action(description="Stop profiling processing of selected jobs")
+    def disable_profiling(self, request, queryset):
+        queryset.update(profile=False)
+
     @admin.action(description="Set selected file status to Unspecified")
     def set_state_0(self, request, queryset):
         queryset.update(state=0)
@@ -283,6 +401,56 @@ class JobAdmin(admin.ModelAdmin):
         queryset.update(state=9)
 
 
+@admin.register(models.JobProfileFile)
+class JobProfileFileAdmin(admin.ModelAdmin):
+    """Review sampling profiles of processing jobs"""
+
+    list_display = (
+        "id",
+        "job_id",
+        "attempt",
+        "native",
+        "sample_count",
+        "duration",
+        "file_object",
+        "file_size",
+        "created_date",
+    )
+    list_display_links = ("id", "job_id")
+    list_filter = ("native", "created_date")
+    search_fields = ("file_name",)
+    ordering = ("-created_date",)
+    raw_id_fields = ("job_id",)
+    fields = [
+        "job_id",
+        "file_name",
+        "file_object",
+        "version",
+        "attempt",
+        "native",
+        "sample_count",
+        "duration",
+        "top_functions",
+    ]
+    readonly_fields = ("attempt", "native", "sample_count", "duration", "top_functions")
+
+    @admin.display(description="Top functions")
+    def top_functions(self, obj):
+        """Functions that were running in the most samples"""
+        if not obj.file_object or not obj.file_available():
+            return "-"
+        with obj.file_object.open("r") as f:
+            functions = get_top_functions(f.read())
+        if not functions:
+            return "-"
+        return format_html(
+            "<table><tr><th>Function</th><th>Self</th><th>Total</th></tr>{}</table>",
+            format_html_join(
+                "", "<tr><td>{}</td><td>{}</td><td>{}</td></tr>", functions
+            ),
+        )
+
+
 @admin.register(models.Layer)
 class LayerAdmin(admin.ModelAdmin):
     """Manage and review project layers"""
@@ -336,7 +504,21 @@ class LayerAdmin(admin.ModelAdmin):
         "comment",
         "siblings",
         "tags",
+        "crs",
+        "geometry_type",
+        "feature_count",
+        "pixel_count",
+        "source_size",
+        "synced_date",
     ]
+    readonly_fields = (
+        "crs",
+        "geometry_type",
+        "feature_count",
+        "pixel_count",
+        "source_size",
+        "synced_date",
+    )
     actions = [
         "set_state_0",
         "set_state_1",
@@ -452,8 +634,15 @@ class ProjectAdmin(admin.ModelAdmin):
         "set_state_1",
         "set_state_2",
         "set_state_3",
+        "sync_layers",
     ]
 
+    @admin.action(description="Sync layers from selected QGIS projects")
+    def sync_layers(self, request, queryset):
+        for project_id in queryset.values_list("pk", flat=True):
+            sync_project_layers.delay(project_id)
+        self.message_user(request, f"Layer sync queued for {queryset.count()} projects")
+
     @admin.action(description="Set selected project type to Unspecified")
     def set_state_0(self, request, queryset):
         queryset.update(state=0)
@@ -483,6 +672,14 @@ class ProjectCoverageFileAdmin(admin.ModelAdmin):
         "project_id",
         "state",
     ]
+    readonly_fields = ("state",)
+    actions = ["ingest_coverage"]
+
+    @admin.action(description="Reload project coverage from selected files")
+    def ingest_coverage(self, request, queryset):
+        queryset.update(state=models.ProjectCoverageFile.CoverageStateChoices.QUEUED)
+        for coverage_file_id in queryset.values_list("pk", flat=True):
+            ingest_project_coverage.delay(coverage_file_id)
 
 
 @admin.register(models.ProjectDataFile)
@@ -549,3 +746,22 @@ class DownloadableDataItemAdmin(ResultFileAdmin, admin.ModelAdmin):
         "version",
         "comment",
     ]
+
+
+@admin.register(models.ContentBlob)
+class ContentBlobAdmin(admin.ModelAdmin):
+    """Review content addressed files shared between managed file objects"""
+
+    list_display = (
+        "id",
+        "checksum",
+        "file_object",
+        "size_bytes",
+        "ref_count",
+        "created_date",
+        "updated_date",
+    )
+    list_display_links = ("id", "checksum")
+    search_fields = ("checksum", "file_object")
+    ordering = ("-updated_date",)
+    readonly_fields = ("checksum", "file_object", "size_bytes", "ref_count")
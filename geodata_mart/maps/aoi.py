@@ -0,0 +1,88 @@
+"""Server side validation of job areas of interest
+
+Clip geometries are buffered, enveloped and measured in PostGIS with
+geodesic area, so oversized or out of coverage requests are rejected when the
+job is created rather than after a worker has opened the project.
+"""
+from collections import namedtuple
+
+from django.contrib.gis.geos import GEOSException, GEOSGeometry
+from django.core.exceptions import ValidationError
+from django.db import connection
+
+from geodata_mart.maps.models import Project
+
+AreaOfInterest = namedtuple("AreaOfInterest", ["geom", "area"])
+
+AOI_SQL = f"""
+    SELECT
+        ST_AsText(aoi.geom),
+        ST_Area(aoi.geom::geography) / 1000000.0,
+        project.coverage IS NULL
+            OR ST_Intersects(project.coverage, aoi.geom::geography)
+    FROM (
+        SELECT ST_Envelope(
+            ST_Buffer(ST_GeomFromText(%s, 4326)::geography, %s)::geometry
+        ) AS geom
+    ) aoi, {Project._meta.db_table} project
+    WHERE project.id = %s
+"""
+
+
+def parse_aoi(wkt):
+    """Parse a WGS84 polygon from WKT, raising ValidationError when unusable"""
+    try:
+        geom = GEOSGeometry(wkt, srid=4326)
+    except (GEOSException, ValueError, TypeError):
+        raise ValidationError("The area of interest is not valid WKT.")
+    if geom.geom_type not in ("Polygon", "MultiPolygon") or geom.empty:
+        raise ValidationError("The area of interest must be a polygon.")
+    if not geom.valid:
+        raise ValidationError(f"The area of interest is invalid: {geom.valid_reason}")
+    xmin, ymin, xmax, ymax = geom.extent
+    if xmin < -180 or xmax > 180 or ymin < -90 or ymax > 90:
+        raise ValidationError("The area of interest must use WGS84 coordinates.")
+    return geom
+
+
+def normalize_aoi(project, wkt, buffer=None):
+    """Buffer, envelope and measure a requested clip area for a project
+
+    Args:
+        project: the project the job is requested for
+        wkt: the drawn area of interest as WGS84 WKT
+        buffer: buffer distance in km, checked against the project buffer
+            range. When omitted the geometry is treated as already buffered.
+
+    Returns:
+        AreaOfInterest: the normalised envelope and its geodesic area in km²
+    """
+    geom = parse_aoi(wkt)
+
+    if buffer in (None, ""):
+        buffer = 0.0
+    else:
+        try:
+            buffer = float(buffer)
+        except (TypeError, ValueError):
+            raise ValidationError("The buffer distance must be a number.")
+        if not project.buffer_min <= buffer <= project.buffer_max:
+            raise ValidationError(
+                f"The buffer distance must be between {project.buffer_min} "
+                f"and {project.buffer_max} km."
+            )
+
+    with connection.cursor() as cursor:
+        cursor.execute(AOI_SQL, [geom.wkt, buffer * 1000, project.pk])
+        envelope, area, in_coverage = cursor.fetchone()
+
+    if project.max_area and area > project.max_area:
+        raise ValidationError(
+            f"The requested area of {area:.2f} km² exceeds the maximum "
+            f"of {project.max_area} km²."
+        )
+    if not in_coverage:
+        raise ValidationError(
+            "The area of interest is outside of the project coverage."
+        )
+    return AreaOfInterest(GEOSGeometry(envelope, srid=4326), area)
@@ -0,0 +1,160 @@
+from django.core.exceptions import ValidationError
+from django.urls import reverse
+from rest_framework import serializers
+
+from geodata_mart.maps.aoi import normalize_aoi, parse_aoi
+from geodata_mart.maps.models import Job, Layer, Project, ResultFile
+
+
+class ResultFileSerializer(serializers.ModelSerializer):
+    """Result files with download links
+
+    Downloads go through the tracking view, which records the download for
+    retention and regenerates evicted results.
+    """
+
+    url = serializers.SerializerMethodField()
+    available = serializers.BooleanField(source="file_available", read_only=True)
+
+    class Meta:
+        model = ResultFile
+        fields = ["id", "file_name", "url", "available", "evicted_date", "created_date"]
+
+    def get_url(self, result):
+        url = reverse("maps:download_result", kwargs={"result_id": result.id})
+        request = self.context.get("request")
+        return request.build_absolute_uri(url) if request else url
+
+
+class JobSerializer(serializers.ModelSerializer):
+    """Compact job status
+
+    Task progress is resolved in bulk by the view and passed in the
+    ``progress`` context, keyed by job id.
+    """
+
+    project = serializers.PrimaryKeyRelatedField(source="project_id", read_only=True)
+    state_label = serializers.CharField(source="get_state_display", read_only=True)
+    progress = serializers.SerializerMethodField()
+
+    class Meta:
+        model = Job
+        fields = [
+            "job_id",
+            "project",
+            "state",
+            "state_label",
+            "progress",
+            "created_date",
+            "updated_date",
+        ]
+
+    def get_progress(self, job):
+        job_progress = self.context.get("progress", {}).get(str(job.job_id))
+        return job_progress["progress"] if job_progress else None
+
+
+class JobCreateSerializer(serializers.Serializer):
+    """Create a clipping job from layer ids and a clip geometry
+
+    The processing parameters are assembled in the same form as the map
+    page, so API and browser submissions are processed identically.
+    """
+
+    project = serializers.PrimaryKeyRelatedField(
+        queryset=Project.objects.select_related("vendor_id", "project_srs", "layer_srs")
+    )
+    layers = serializers.PrimaryKeyRelatedField(
+        queryset=Layer.objects.all(), many=True, required=False
+    )
+    excludes = serializers.PrimaryKeyRelatedField(
+        queryset=Layer.objects.all(), many=True, required=False
+    )
+    clip_geom = serializers.CharField(help_text="Clip geometry as WGS84 WKT")
+    buffer = serializers.FloatField(
+        required=False, help_text="Buffer distance in km applied to the clip geometry"
+    )
+    output_crs = serializers.CharField(required=False, allow_blank=True)
+    project_crs = serializers.CharField(required=False, allow_blank=True)
+    comment = serializers.CharField(required=False, allow_blank=True)
+
+    def validate_clip_geom(self, value):
+        try:
+            return parse_aoi(value).wkt
+        except ValidationError as e:
+            raise serializers.ValidationError(e.messages)
+
+    def validate(self, attrs):
+        project = attrs["project"]
+        layer_classes = {
+            "layers": [
+                Layer.LayerClass.UNSPECIFIED,
+                Layer.LayerClass.STANDARD,
+                Layer.LayerClass.OTHER,
+            ],
+            "excludes": [Layer.LayerClass.BASE, Layer.LayerClass.EXCLUDE],
+        }
+        for field, classes in layer_classes.items():
+            for layer in attrs.get(field, []):
+                if layer.project_id_id != project.id or layer.lyr_class not in classes:
+                    raise serializers.ValidationError(
+                        {field: f"Layer {layer.id} is not available in this project."}
+                    )
+
+        try:
+            attrs["aoi"] = normalize_aoi(
+                project, attrs["clip_geom"], attrs.get("buffer")
+            )
+        except ValidationError as e:
+            raise serializers.ValidationError({"clip_geom": e.messages})
+        # layers synced from the QGIS project record their extent, so requests
+        # that would clip to nothing can be rejected before queueing a job
+        for layer in attrs.get("layers", []):
+            if layer.bbox and not layer.bbox.intersects(attrs["aoi"].geom):
+                raise serializers.ValidationError(
+                    {"layers": f"Layer {layer.id} does not intersect the clip area."}
+                )
+
+        defaults = {
+            "output_crs": project.project_srs,
+            "project_crs": project.layer_srs,
+        }
+        allowed = {srs.idstring for srs in project.allowed_srs.all()}
+        for field, default in defaults.items():
+            default = default.idstring if default else ""
+            value = attrs.get(field) or default
+            if value and value != default and allowed and value not in allowed:
+                raise serializers.ValidationError(
+                    {field: f"{value} is not an allowed SRS for this project."}
+                )
+            attrs[field] = value
+        return attrs
+
+    def create(self, validated_data):
+        project = validated_data["project"]
+        user = self.context["request"].user
+        layers = validated_data.get("layers", [])
+        excludes = validated_data.get("excludes", [])
+        comment = validated_data.get("comment", "")
+        aoi = validated_data["aoi"]
+        job = Job.objects.create(
+            user_id=user,
+            project_id=project,
+            comment=comment,
+            aoi=aoi.geom,
+            aoi_area=aoi.area,
+            trace_parent=validated_data.get("trace_parent"),
+            parameters={
+                "PROJECTID": project.project_name,
+                "VENDORID": project.vendor_id.name,
+                "USERID": user.username,
+                "LAYERS": ",".join(layer.short_name for layer in layers),
+                "EXCLUDES": ",".join(layer.short_name for layer in excludes),
+                "CLIP_GEOM": aoi.geom.wkt,
+                "OUTPUT_CRS": validated_data["output_crs"],
+                "PROJECT_CRS": validated_data["project_crs"],
+                "COMMENT": comment,
+            },
+        )
+        job.layers.set(layers)
+        return job
@@ -0,0 +1,80 @@
+from rest_framework import status
+from rest_framework.decorators import action
+from rest_framework.mixins import CreateModelMixin, ListModelMixin, RetrieveModelMixin
+from rest_framework.pagination import CursorPagination
+from rest_framework.response import Response
+from rest_framework.viewsets import GenericViewSet
+
+from geodata_mart.maps.control import request_cancel
+from geodata_mart.maps.models import Job, ResultFile
+from geodata_mart.maps.progress import get_jobs_progress
+from geodata_mart.maps.dispatch import dispatch_job
+from geodata_mart.utils.tracing import trace
+
+from .serializers import JobCreateSerializer, JobSerializer, ResultFileSerializer
+
+
+class JobPagination(CursorPagination):
+    ordering = ("-created_date", "-id")
+    page_size = 25
+    page_size_query_param = "items"
+    max_page_size = 100
+
+
+class JobViewSet(CreateModelMixin, RetrieveModelMixin, ListModelMixin, GenericViewSet):
+    serializer_class = JobSerializer
+    queryset = Job.objects.all()
+    lookup_field = "job_id"
+    pagination_class = JobPagination
+
+    def get_queryset(self, *args, **kwargs):
+        return self.queryset.filter(user_id=self.request.user)
+
+    def get_serializer_class(self):
+        if self.action == "create":
+            return JobCreateSerializer
+        if self.action == "results":
+            return ResultFileSerializer
+        return JobSerializer
+
+    def get_status_data(self, jobs, many=False):
+        """Serialize jobs with their task progress fetched in one lookup"""
+        context = self.get_serializer_context()
+        context["progress"] = get_jobs_progress(jobs if many else [jobs])
+        return JobSerializer(jobs, many=many, context=context).data
+
+    def create(self, request, *args, **kwargs):
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        with trace("create_job", source="api") as span:
+            job = serializer.save(trace_parent=span.traceparent)
+            span.attributes["job_id"] = str(job.job_id)
+            dispatch_job(job)
+        job.refresh_from_db()
+        return Response(self.get_status_data(job), status=status.HTTP_201_CREATED)
+
+    def list(self, request, *args, **kwargs):
+        page = self.paginate_queryset(self.get_queryset())
+        return self.get_paginated_response(self.get_status_data(page, many=True))
+
+    def retrieve(self, request, *args, **kwargs):
+        return Response(self.get_status_data(self.get_object()))
+
+    @action(detail=True)
+    def results(self, request, *args, **kwargs):
+        job = self.get_object()
+        results = ResultFile.objects.filter(job_id=job).order_by("-created_date")
+        serializer = self.get_serializer(results, many=True)
+        return Response(serializer.data)
+
+    @action(detail=True, methods=["post"])
+    def cancel(self, request, *args, **kwargs):
+        job = self.get_object()
+        if job.state in [
+            Job.JobStateChoices.UNSPECIFIED,
+            Job.JobStateChoices.PROCESSING,
+        ]:
+            job.state = Job.JobStateChoices.ABANDONED
+            job.save()
+            request_cancel(job)
+        return Response(self.get_status_data(job))
@@ -0,0 +1,124 @@
+"""Project layer catalog synchronisation
+
+A worker opens the QGIS project for a project once and records what it
+learns about each layer, so that the web tier can filter layers by extent,
+estimate costs and reject unworkable requests without loading QGIS itself.
+"""
+from celery import shared_task
+from celery.utils.log import get_task_logger
+from django.contrib.gis.geos import Polygon
+from django.db import transaction
+from django.utils import timezone
+
+from geodata_mart.maps.models import Layer, Project
+
+logger = get_task_logger(__name__)
+
+SYNC_FIELDS = [
+    "bbox",
+    "crs",
+    "geometry_type",
+    "feature_count",
+    "pixel_count",
+    "source_size",
+    "synced_date",
+]
+
+
+def get_layer_type(kind):
+    """Map a QGIS layer kind to the layer type choice"""
+    return getattr(Layer.LayerType, kind.upper(), Layer.LayerType.OTHER)
+
+
+def get_layer_bbox(bbox):
+    """Build a WGS84 polygon from an (xmin, ymin, xmax, ymax) extent"""
+    if not bbox:
+        return None
+    xmin, ymin, xmax, ymax = bbox
+    if xmin == xmax or ymin == ymax:
+        # points and lines along an axis still need an area to intersect
+        xmin, ymin, xmax, ymax = xmin - 1e-9, ymin - 1e-9, xmax + 1e-9, ymax + 1e-9
+    return Polygon.from_bbox((xmin, ymin, xmax, ymax))
+
+
+def upsert_project_layers(project, summaries):
+    """Create or update project layers from QGIS layer summaries
+
+    Layers are matched on the short name used by the clip algorithm. Catalog
+    details are refreshed for existing layers, while names, abstracts and
+    classifications that have been curated in the admin are left untouched.
+
+    Returns:
+        tuple: counts of created and updated layers
+    """
+    synced_date = timezone.now()
+    existing = {layer.short_name: layer for layer in project.layer_set.all()}
+    created, updated = [], []
+
+    for summary in summaries:
+        short_name = summary["short_name"][:80]
+        values = {
+            "bbox": get_layer_bbox(summary["bbox"]),
+            "crs": summary["crs"],
+            "geometry_type": summary["geometry_type"],
+            "feature_count": summary["feature_count"],
+            "pixel_count": summary["pixel_count"],
+            "source_size": summary["source_size"],
+            "synced_date": synced_date,
+        }
+        layer = existing.get(short_name)
+        if layer is None:
+            layer = Layer(
+                short_name=short_name,
+                layer_name=(summary["layer_name"] or short_name)[:255],
+                abstract=(summary["abstract"] or "")[:255],
+                project_id=project,
+                lyr_type=get_layer_type(summary["kind"]),
+                **values,
+            )
+            existing[short_name] = layer
+            created.append(layer)
+        elif layer in created:
+            continue
+        else:
+            for field, value in values.items():
+                setattr(layer, field, value)
+            updated.append(layer)
+
+    with transaction.atomic():
+        Layer.objects.bulk_create(created)
+        Layer.objects.bulk_update(updated, SYNC_FIELDS)
+
+    return len(created), len(updated)
+
+
+@shared_task(ignore_result=True)
+def sync_project_layers(project_id):
+    """Synchronise the layer catalog of a project from its QGIS project file
+
+    Returns:
+        tuple: counts of created and updated layers
+    """
+    # QGIS is only available on workers
+    from geodata_mart.utils.qgis import readProjectLayers, startQgisApplication
+
+    project = (
+        Project.objects.select_related("qgis_project_file")
+        .filter(pk=project_id)
+        .first()
+    )
+    if not project or not project.qgis_project_file:
+        logger.warning(f"No QGIS project file for project {project_id}")
+        return 0, 0
+
+    qgs = startQgisApplication()
+    try:
+        summaries = readProjectLayers(project.qgis_project_file.file_object.path)
+    finally:
+        qgs.exitQgis()
+
+    created, updated = upsert_project_layers(project, summaries)
+    logger.info(
+        f"Synced project {project_id} layers: {created} created, {updated} updated"
+    )
+    return created, updated
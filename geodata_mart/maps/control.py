@@ -0,0 +1,89 @@
+"""Cooperative cancellation of processing jobs
+
+Cancelling a job revokes any queued task and sets a flag in Redis. Revoking
+only prevents queued tasks from starting, so running tasks poll the flag from
+a watcher thread and cancel the QGIS processing feedback, which the clip
+algorithm and the native algorithms it runs check between layers and within
+their feature loops.
+"""
+import logging
+import threading
+from os.path import join
+
+from django.conf import settings
+from django.db import transaction
+from redis.exceptions import RedisError
+
+from config import celery_app
+from geodata_mart.maps.models import project_storage
+from geodata_mart.utils.redis_client import get_redis
+
+logger = logging.getLogger(__name__)
+
+CANCEL_FLAG_TTL = 24 * 60 * 60
+
+
+def cancel_key(job_id):
+    return f"geodatamart:jobs:{job_id}:cancel"
+
+
+def get_job_output_path(job):
+    """Return the scratch directory the clip algorithm writes job outputs to"""
+    parameters = job.parameters or {}
+    path = join(project_storage.location, "output")
+    for name in ["USERID", "VENDORID", "PROJECTID"]:
+        if parameters.get(name):
+            path = join(path, str(parameters[name]))
+    return join(path, str(job.job_id))
+
+
+def request_cancel(job):
+    """Flag a job for cancellation and revoke its queued tasks on commit"""
+    job_id = str(job.job_id)
+    task_ids = list(job.tasks or [])
+
+    def cancel():
+        try:
+            get_redis().set(cancel_key(job_id), 1, ex=CANCEL_FLAG_TTL)
+        except RedisError as e:
+            logger.warning(f"Unable to flag job {job_id} for cancellation: {e}")
+        if task_ids:
+            celery_app.control.revoke(task_ids)
+
+    transaction.on_commit(cancel)
+
+
+def is_cancel_requested(job_id):
+    try:
+        return bool(get_redis().exists(cancel_key(job_id)))
+    except RedisError as e:
+        logger.warning(f"Unable to check cancellation of job {job_id}: {e}")
+        return False
+
+
+class CancelWatcher(threading.Thread):
+    """Cancel processing feedback once cancellation of a job is requested
+
+    Polls the cancel flag in the background while QGIS processing runs in
+    the task thread, so cancellation does not depend on the algorithm
+    reaching a point where it could check the flag itself.
+    """
+
+    def __init__(self, job_id, feedback, interval=None):
+        super().__init__(name=f"cancel-watcher-{job_id}", daemon=True)
+        self.job_id = job_id
+        self.feedback = feedback
+        self.interval = interval or settings.JOB_CANCEL_POLL_INTERVAL
+        self.cancelled = False
+        self._stopped = threading.Event()
+
+    def run(self):
+        while not self._stopped.wait(self.interval):
+            if is_cancel_requested(self.job_id):
+                logger.info(f"Cancelling job {self.job_id}")
+                self.cancelled = True
+                self.feedback.cancel()
+                break
+
+    def stop(self):
+        self._stopped.set()
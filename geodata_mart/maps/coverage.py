@@ -0,0 +1,132 @@
+"""Background ingestion of project coverage files
+
+Coverage files are read feature by feature rather than loaded whole, so large
+sources with many polygons can be ingested by a worker without holding every
+geometry in memory. Polygons are repaired where invalid, unioned in chunks,
+and the merged coverage is stored on the project along with a simplified copy
+for display and the coverage extent.
+"""
+from celery import shared_task
+from celery.utils.log import get_task_logger
+from django.conf import settings
+from django.contrib.gis.gdal import DataSource, GDALException, SpatialReference
+from django.contrib.gis.geos import (
+    GEOSException,
+    GeometryCollection,
+    MultiPolygon,
+    Polygon,
+)
+
+from geodata_mart.maps.models import Project, ProjectCoverageFile
+
+logger = get_task_logger(__name__)
+
+POLYGON_TYPES = ("Polygon", "MultiPolygon")
+WGS84 = SpatialReference(4326)
+
+
+def iter_coverage_polygons(path):
+    """Yield valid WGS84 polygon geometries from every layer of a data source
+
+    Features without polygon geometries are skipped, and invalid polygons
+    are repaired with a zero width buffer.
+    """
+    if path.endswith(".zip"):
+        path = f"/vsizip/{path}"
+    source = DataSource(path)
+    for layer in source:
+        for feature in layer:
+            geom = feature.geom
+            if geom.geom_type.name.replace("25D", "") not in POLYGON_TYPES:
+                continue
+            geom.coord_dim = 2
+            if geom.srs and geom.srs.srid != 4326:
+                geom.transform(WGS84)
+            polygon = geom.geos
+            polygon.srid = 4326
+            if not polygon.valid:
+                polygon = polygon.buffer(0)
+            if not polygon.empty:
+                yield polygon
+
+
+def as_multipolygon(geom):
+    """Return the polygon parts of a geometry as a MultiPolygon"""
+    if isinstance(geom, MultiPolygon):
+        return geom
+    if isinstance(geom, Polygon):
+        return MultiPolygon(geom, srid=geom.srid)
+    parts = []
+    for part in geom:
+        if isinstance(part, Polygon):
+            parts.append(part)
+        elif isinstance(part, MultiPolygon):
+            parts.extend(part)
+    return MultiPolygon(*parts, srid=geom.srid)
+
+
+def union_chunk(geoms):
+    return GeometryCollection(*geoms, srid=4326).unary_union
+
+
+def build_coverage(path, chunk_size=None):
+    """Union the polygons of a coverage file into a single MultiPolygon
+
+    Polygons are unioned in chunks as they are read, and the chunk results
+    are unioned again once they accumulate, which bounds memory use to a
+    chunk of features and the partial coverage.
+    """
+    chunk_size = chunk_size or settings.COVERAGE_CHUNK_SIZE
+    chunk, partials = [], []
+    for polygon in iter_coverage_polygons(path):
+        chunk.append(polygon)
+        if len(chunk) >= chunk_size:
+            partials.append(union_chunk(chunk))
+            chunk = []
+        if len(partials) >= chunk_size:
+            partials = [union_chunk(partials)]
+    if chunk:
+        partials.append(union_chunk(chunk))
+    if not partials:
+        raise ValueError("The coverage file contains no polygon features")
+    coverage = union_chunk(partials)
+    if not coverage.valid:
+        coverage = coverage.buffer(0)
+    return as_multipolygon(coverage)
+
+
+def simplify_coverage(coverage):
+    """Simplified copy of a coverage for display on maps"""
+    simplified = coverage.simplify(
+        settings.COVERAGE_SIMPLIFY_TOLERANCE, preserve_topology=True
+    )
+    simplified.srid = coverage.srid
+    return as_multipolygon(simplified)
+
+
+@shared_task()
+def ingest_project_coverage(coverage_file_id):
+    """Load a coverage file into the coverage fields of its project"""
+    coverage_states = ProjectCoverageFile.CoverageStateChoices
+    coverage_files = ProjectCoverageFile.objects.filter(pk=coverage_file_id)
+    coverage_file = coverage_files.first()
+    if coverage_file is None or not coverage_file.file_object:
+        return None
+    coverage_files.update(state=coverage_states.PROCESSING)
+
+    try:
+        coverage = build_coverage(coverage_file.file_object.path)
+        extent = Polygon.from_bbox(coverage.extent)
+        extent.srid = coverage.srid
+        Project.objects.filter(pk=coverage_file.project_id_id).update(
+            coverage=coverage,
+            coverage_simplified=simplify_coverage(coverage),
+            coverage_extent=extent,
+        )
+    except (GDALException, GEOSException, ValueError) as e:
+        logger.error(f"Unable to load coverage {coverage_file}: {e}")
+        coverage_files.update(state=coverage_states.ERROR)
+        return None
+
+    coverage_files.update(state=coverage_states.LOADED)
+    return coverage.num_geom
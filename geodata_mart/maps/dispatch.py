@@ -0,0 +1,66 @@
+"""Dispatch of processing jobs
+
+The clip task module loads QGIS, PyQt and the processing framework when it
+is imported, which only workers need. Web processes send jobs to the task by
+name through a signature instead, so views, the API and maintenance code
+never import the task module, and QGIS stays out of web workers.
+"""
+import logging
+import time
+import uuid
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F, Func, Value
+
+from config import celery_app
+from geodata_mart.maps.models import Job
+from geodata_mart.utils.metrics import mark_dispatched
+from geodata_mart.utils.tracing import TRACEPARENT_HEADER, get_current_traceparent
+
+logger = logging.getLogger(__name__)
+
+CLIP_TASK = "geodata_mart.maps.tasks.process_job_gdmclip"
+process_job_gdmclip = celery_app.signature(CLIP_TASK)
+
+
+def dispatch_job(job, priority=None, replace_tasks=False):
+    """Queue processing for a job once the current transaction commits
+
+    The task id is generated up front and recorded on the job, so progress
+    can be tracked immediately, while the task itself is only sent to the
+    broker after the job is committed and visible to the worker. The trace
+    context of the current span, or of the job submission, is sent in the
+    message headers.
+
+    Args:
+        job (Job): the job to process
+        priority (int): optional message priority for background work
+        replace_tasks (bool): record the task as the only task of the job,
+            for jobs that are run again after their earlier task finished
+
+    Returns:
+        str: the celery task id
+    """
+    task_id = str(uuid.uuid4())
+    if replace_tasks:
+        tasks = [task_id]
+    else:
+        tasks = Func(F("tasks"), Value(task_id), function="array_append")
+    Job.objects.filter(pk=job.pk).update(tasks=tasks)
+    job_id = str(job.job_id)
+    if settings.JOB_DISPATCH_STUB:
+        logger.info(f"Dispatch of {job_id} as {task_id} stubbed")
+        return task_id
+    options = {"priority": priority} if priority is not None else {}
+    headers = {TRACEPARENT_HEADER: get_current_traceparent() or job.trace_parent}
+
+    def send():
+        mark_dispatched(task_id)
+        headers["dispatched_at"] = time.time()
+        process_job_gdmclip.apply_async(
+            args=[job_id], task_id=task_id, headers=headers, **options
+        )
+
+    transaction.on_commit(send)
+    return task_id
@@ -0,0 +1,180 @@
+"""Stored file metadata for managed file objects
+
+Size, checksum, content type and presence of managed files are recorded in
+the database when a file is saved, so that listings do not need to query the
+storage backend for each row. A periodic verifier reconciles the recorded
+values with storage using bulk listings rather than per-file requests.
+"""
+import hashlib
+import mimetypes
+import os
+import posixpath
+from pathlib import Path
+
+from celery import shared_task
+from celery.utils.log import get_task_logger
+from django.apps import apps
+from django.utils import timezone
+
+logger = get_task_logger(__name__)
+
+VERIFY_BATCH_SIZE = 500
+
+METADATA_FIELDS = [
+    "file_size_bytes",
+    "file_checksum",
+    "file_content_type",
+    "file_present",
+    "file_verified_date",
+]
+
+
+def normalize_name(name):
+    """Normalize a stored file name for comparison with storage listings"""
+    return posixpath.normpath(name).lstrip("/")
+
+
+def get_file_checksum(storage, name):
+    """SHA-256 hex digest of a stored file"""
+    digest = hashlib.sha256()
+    with storage.open(name, "rb") as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def get_content_checksum(content):
+    """SHA-256 hex digest of an open file, such as an upload"""
+    digest = hashlib.sha256()
+    content.seek(0)
+    for chunk in content.chunks():
+        digest.update(chunk)
+    content.seek(0)
+    return digest.hexdigest()
+
+
+def get_file_metadata(field_file, size=None, checksum=None):
+    """Read the metadata for a stored file
+
+    Args:
+        field_file (FieldFile): file field value to inspect
+        size (int): known size of the file, skips the existence and size checks
+        checksum (str): known checksum of the file, skips reading the content
+
+    Returns:
+        dict: values for each of the metadata fields
+    """
+    metadata = dict.fromkeys(METADATA_FIELDS)
+    metadata["file_verified_date"] = timezone.now()
+    metadata["file_present"] = False
+    if not field_file:
+        return metadata
+    storage, name = field_file.storage, field_file.name
+    if size is None:
+        if not storage.exists(name):
+            return metadata
+        size = storage.size(name)
+    metadata.update(
+        file_present=True,
+        file_size_bytes=size,
+        file_checksum=checksum or get_file_checksum(storage, name),
+        file_content_type=mimetypes.guess_type(name)[0],
+    )
+    return metadata
+
+
+def list_storage_files(storage):
+    """Map each stored file name to its size with bulk listings
+
+    S3 storages are listed by prefix, a thousand keys per request, and
+    filesystem storages are walked with a single stat per file.
+    """
+    files = {}
+    if hasattr(storage, "bucket"):
+        prefix = storage.location.strip("/")
+        prefix = f"{prefix}/" if prefix else ""
+        for obj in storage.bucket.objects.filter(Prefix=prefix):
+            files[obj.key[len(prefix) :]] = obj.size
+        return files
+    root = Path(storage.location)
+    for dirpath, _, filenames in os.walk(root):
+        for filename in filenames:
+            path = Path(dirpath) / filename
+            files[path.relative_to(root).as_posix()] = path.stat().st_size
+    return files
+
+
+def get_managed_file_models():
+    from geodata_mart.maps.models import ManagedFileObject
+
+    return [
+        model
+        for model in apps.get_models()
+        if issubclass(model, ManagedFileObject) and not model._meta.abstract
+    ]
+
+
+def verify_queryset(queryset, listings=None):
+    """Reconcile recorded metadata for a queryset with storage
+
+    Checksums are only recomputed for files that are new, missing a
+    checksum, or have changed size since they were last verified.
+
+    Returns:
+        int: number of records whose presence or content changed
+    """
+    listings = {} if listings is None else listings
+    field = queryset.model._meta.get_field("file_object")
+    if id(field.storage) not in listings:
+        listings[id(field.storage)] = list_storage_files(field.storage)
+    listing = listings[id(field.storage)]
+
+    now = timezone.now()
+    changed = 0
+    batch = []
+    for instance in queryset.only("pk", "file_object", *METADATA_FIELDS).iterator():
+        size = (
+            listing.get(normalize_name(instance.file_object.name))
+            if instance.file_object
+            else None
+        )
+        if size is None:
+            updated = instance.file_present is not False
+            instance.file_present = False
+        elif (
+            not instance.file_present
+            or instance.file_checksum is None
+            or instance.file_size_bytes != size
+        ):
+            updated = True
+            for key, value in get_file_metadata(instance.file_object, size).items():
+                setattr(instance, key, value)
+        else:
+            updated = False
+        instance.file_verified_date = now
+        changed += updated
+        batch.append(instance)
+        if len(batch) >= VERIFY_BATCH_SIZE:
+            queryset.model.objects.bulk_update(batch, METADATA_FIELDS)
+            batch = []
+    if batch:
+        queryset.model.objects.bulk_update(batch, METADATA_FIELDS)
+    return changed
+
+
+@shared_task()
+def verify_managed_files():
+    """Reconcile the recorded metadata of all managed files with storage
+
+    Returns:
+        dict: number of changed records for each model
+    """
+    listings = {}
+    results = {}
+    for model in get_managed_file_models():
+        results[model._meta.label] = verify_queryset(model.objects.all(), listings)
+        if results[model._meta.label]:
+            logger.info(
+                f"Updated {results[model._meta.label]} {model._meta.label} records"
+            )
+    return results
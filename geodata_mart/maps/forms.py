@@ -1,10 +1,12 @@
 from django import forms
+from django.core.exceptions import ValidationError
 
 # from datetime import datetime
 # from django.urls import reverse_lazy
 from crispy_forms.helper import FormHelper
 from crispy_forms.layout import Layout
 from crispy_forms.bootstrap import UneditableField
+from geodata_mart.maps.aoi import normalize_aoi
 from geodata_mart.maps.models import Job
 
 
@@ -25,3 +27,18 @@ class JobForm(forms.ModelForm):
     class Meta:
         model = Job
         fields = ["job_id", "user_id", "project_id", "layers", "state", "parameters"]
+
+    def clean(self):
+        cleaned_data = super().clean()
+        project = cleaned_data.get("project_id")
+        parameters = cleaned_data.get("parameters")
+        if not project or not isinstance(parameters, dict):
+            return cleaned_data
+        if not parameters.get("CLIP_GEOM"):
+            raise ValidationError("An area of interest is required.")
+
+        aoi = normalize_aoi(project, parameters["CLIP_GEOM"], parameters.get("BUFFER"))
+        parameters["CLIP_GEOM"] = aoi.geom.wkt
+        self.instance.aoi = aoi.geom
+        self.instance.aoi_area = aoi.area
+        return cleaned_data
@@ -0,0 +1,181 @@
+"""Periodic clean up of processing jobs and their scratch space
+
+Jobs are left in the processing state when a worker crashes or QGIS
+segfaults, and the scratch directories the clip algorithm writes to under
+``output/`` are left behind with them. The reaper marks jobs whose tasks are
+no longer known to any worker as stale, and removes scratch directories that
+no running or resumable job needs any more.
+"""
+import os
+import shutil
+import time
+import uuid
+from datetime import timedelta
+from os.path import join
+
+from celery import shared_task
+from celery.utils.log import get_task_logger
+from django.conf import settings
+from django.utils import timezone
+
+from config import celery_app
+from geodata_mart.maps.models import Job, project_storage
+
+logger = get_task_logger(__name__)
+
+# Failed runs keep their checkpoints for a while so resubmissions can resume
+RESUMABLE_STATES = [
+    Job.JobStateChoices.FAILED,
+    Job.JobStateChoices.UNKNOWN,
+    Job.JobStateChoices.STALE,
+]
+
+
+def get_live_task_ids():
+    """Collect the ids of tasks that workers are running or holding
+
+    Workers are pinged first, and liveness is only known if every inspect
+    call returned a reply from each of them, since a worker that is too busy
+    to reply within the timeout may still be running jobs.
+
+    Returns:
+        set: task ids, or None when liveness is unknown
+    """
+    inspect = celery_app.control.inspect(timeout=settings.JOB_INSPECT_TIMEOUT)
+    workers = inspect.ping()
+    if not workers:
+        return None
+    replies = [inspect.active(), inspect.reserved(), inspect.scheduled()]
+    for reply in replies:
+        if reply is None or not set(workers).issubset(reply):
+            return None
+    task_ids = set()
+    for reply in replies:
+        for tasks in reply.values():
+            for task in tasks:
+                # scheduled tasks wrap the task request with its eta
+                task_ids.add(task.get("request", task).get("id"))
+    return task_ids
+
+
+def reap_stale_jobs():
+    """Mark processing jobs with no live task as stale
+
+    Returns:
+        int: number of jobs marked stale
+    """
+    cutoff = timezone.now() - timedelta(seconds=settings.JOB_STALE_AFTER)
+    candidates = list(
+        Job.objects.filter(
+            state=Job.JobStateChoices.PROCESSING, updated_date__lt=cutoff
+        ).only("id", "job_id", "state", "tasks")
+    )
+    if not candidates:
+        return 0
+    live_task_ids = get_live_task_ids()
+    if live_task_ids is None:
+        logger.warning("Not all workers replied, skipping stale job detection")
+        return 0
+
+    reaped = 0
+    for job in candidates:
+        if live_task_ids.isdisjoint(job.tasks or []):
+            job.state = Job.JobStateChoices.STALE
+            job.save(update_fields=["state", "updated_date"])
+            reaped += 1
+    return reaped
+
+
+def get_directory_usage(path):
+    """Return the total size in bytes and latest modification time of a tree"""
+    size, modified = 0, os.lstat(path).st_mtime
+    for root, directories, files in os.walk(path):
+        for name in files + directories:
+            try:
+                stat = os.lstat(join(root, name))
+            except FileNotFoundError:
+                continue
+            modified = max(modified, stat.st_mtime)
+            if name in files:
+                size += stat.st_size
+    return size, modified
+
+
+def find_scratch_directories(output_root):
+    """Map job ids to the scratch directories named after them"""
+    directories = {}
+    for root, subdirectories, files in os.walk(output_root):
+        for name in list(subdirectories):
+            try:
+                job_id = uuid.UUID(name)
+            except ValueError:
+                continue
+            directories.setdefault(job_id, []).append(join(root, name))
+            subdirectories.remove(name)
+    return directories
+
+
+def remove_empty_parents(path, output_root):
+    """Remove directories left empty above a removed scratch directory"""
+    parent = os.path.dirname(path)
+    while parent != output_root and parent.startswith(output_root):
+        try:
+            os.rmdir(parent)
+        except OSError:
+            break
+        parent = os.path.dirname(parent)
+
+
+def collect_scratch_space(output_root=None):
+    """Remove scratch directories of jobs that are no longer processing
+
+    Directories of finished, abandoned or unknown jobs are removed once idle
+    for the grace period, and directories of failed jobs once idle for the
+    retention period, after which they are no longer worth resuming.
+
+    Returns:
+        tuple: number of directories removed and bytes freed
+    """
+    output_root = output_root or join(project_storage.location, "output")
+    if not os.path.isdir(output_root):
+        return 0, 0
+    directories = find_scratch_directories(output_root)
+    states = dict(
+        Job.objects.filter(job_id__in=directories.keys()).values_list("job_id", "state")
+    )
+
+    now = time.time()
+    removed, freed = 0, 0
+    for job_id, paths in directories.items():
+        state = states.get(job_id)
+        if state == Job.JobStateChoices.PROCESSING:
+            continue
+        if state in RESUMABLE_STATES:
+            max_idle = settings.JOB_SCRATCH_RETENTION
+        else:
+            max_idle = settings.JOB_SCRATCH_GRACE
+        for path in paths:
+            size, modified = get_directory_usage(path)
+            if now - modified < max_idle:
+                continue
+            shutil.rmtree(path, ignore_errors=True)
+            remove_empty_parents(path, output_root)
+            removed += 1
+            freed += size
+    return removed, freed
+
+
+@shared_task()
+def clean_up_jobs():
+    """Reap stale jobs and collect their scratch space
+
+    Returns:
+        dict: number of stale jobs, removed directories and freed bytes
+    """
+    stale_jobs = reap_stale_jobs()
+    removed, freed = collect_scratch_space()
+    logger.info(
+        f"Marked {stale_jobs} jobs stale, removed {removed} scratch directories "
+        f"freeing {freed} bytes"
+    )
+    return {"stale_jobs": stale_jobs, "removed_dirs": removed, "freed_bytes": freed}
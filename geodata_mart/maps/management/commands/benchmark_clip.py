@@ -0,0 +1,86 @@
+import json
+import tempfile
+
+from django.core.management.base import BaseCommand, CommandError
+
+
+def csv_list(cast):
+    return lambda value: [cast(item) if item else None for item in value.split(",")]
+
+
+class Command(BaseCommand):
+    help = "benchmark the clip algorithm on synthetic projects"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--script",
+            default="/qgis/processing/scripts/clip_project.py",
+            help="clip algorithm processing script",
+        )
+        parser.add_argument("--workdir", help="directory for fixtures and outputs")
+        parser.add_argument("--points", type=int, default=10000)
+        parser.add_argument("--lines", type=int, default=2000)
+        parser.add_argument("--polygons", type=int, default=2000)
+        parser.add_argument(
+            "--raster-size", type=int, default=2048, help="raster width and height"
+        )
+        parser.add_argument(
+            "--aoi-fractions",
+            type=csv_list(float),
+            default=[0.01, 0.1, 0.5],
+            help="comma separated AOI areas as fractions of the data extent",
+        )
+        parser.add_argument(
+            "--crs",
+            type=csv_list(str),
+            default=[None, "EPSG:3857"],
+            help="comma separated output CRSs, empty for the layer CRS",
+        )
+        parser.add_argument("--repeat", type=int, default=1)
+        parser.add_argument("--seed", type=int, default=0)
+        parser.add_argument("--output", help="write results as JSON to this file")
+        parser.add_argument("--baseline", help="compare with a previous results file")
+        parser.add_argument(
+            "--tolerance",
+            type=float,
+            default=0.2,
+            help="allowed relative regression against the baseline",
+        )
+
+    def handle(self, *args, **options):
+        # QGIS is only available on workers
+        from geodata_mart.utils.benchmark import compareToBaseline, runBenchmark
+        from geodata_mart.utils.qgis import startQgisApplication
+
+        qgs = startQgisApplication()
+        try:
+            with tempfile.TemporaryDirectory() as tmpdir:
+                results = runBenchmark(
+                    options["script"],
+                    options["workdir"] or tmpdir,
+                    points=options["points"],
+                    lines=options["lines"],
+                    polygons=options["polygons"],
+                    rasterSize=options["raster_size"],
+                    fractions=options["aoi_fractions"],
+                    crsList=options["crs"],
+                    repeat=options["repeat"],
+                    seed=options["seed"],
+                )
+        finally:
+            qgs.exitQgis()
+
+        output = json.dumps(results, indent=2)
+        if options["output"]:
+            with open(options["output"], "w") as f:
+                f.write(output)
+        else:
+            self.stdout.write(output)
+
+        if options["baseline"]:
+            with open(options["baseline"]) as f:
+                baseline = json.load(f)
+            regressions = compareToBaseline(results, baseline, options["tolerance"])
+            if regressions:
+                raise CommandError("Benchmark regressions:\n" + "\n".join(regressions))
+            self.stderr.write(self.style.SUCCESS("No regressions against baseline"))
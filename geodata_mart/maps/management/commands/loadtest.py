@@ -0,0 +1,102 @@
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+
+from geodata_mart.utils.loadtest import (
+    clear_catalog,
+    run_load_test,
+    seed_catalog,
+    start_server,
+)
+
+
+class Command(BaseCommand):
+    help = "load test the catalog, checkout and download pages"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--url",
+            help="server to test, which must set JOB_DISPATCH_STUB, "
+            "otherwise the application is served from this process",
+        )
+        parser.add_argument(
+            "--concurrency", type=int, default=10, help="simulated users"
+        )
+        parser.add_argument(
+            "--iterations", type=int, default=5, help="scenario runs per user"
+        )
+        parser.add_argument("--projects", type=int, default=6)
+        parser.add_argument("--layers", type=int, default=20, help="per project")
+        parser.add_argument("--users", type=int, default=10)
+        parser.add_argument(
+            "--jobs", type=int, default=25, help="completed jobs per user"
+        )
+        parser.add_argument(
+            "--result-size", type=int, default=1024 * 1024, help="bytes per result"
+        )
+        parser.add_argument("--seed", type=int, default=0)
+        parser.add_argument("--output", help="write results as JSON to this file")
+        parser.add_argument(
+            "--clear",
+            action="store_true",
+            help="remove the load test catalog and its jobs, then exit",
+        )
+
+    def handle(self, *args, **options):
+        if options["clear"]:
+            removed = clear_catalog()
+            self.stdout.write(f"Removed the load test catalog and {removed} jobs")
+            return
+        if options["users"] < 1 or options["projects"] < 1:
+            raise CommandError("At least one user and one project are required")
+
+        self.stderr.write("Seeding catalog...")
+        catalog = seed_catalog(
+            projects=options["projects"],
+            layers=options["layers"],
+            users=options["users"],
+            jobs=options["jobs"],
+            result_size=options["result_size"],
+        )
+
+        server = None
+        base_url = options["url"]
+        if not base_url:
+            server, base_url = start_server()
+        self.stderr.write(f"Load testing {base_url}...")
+        try:
+            results = run_load_test(
+                base_url,
+                catalog,
+                concurrency=options["concurrency"],
+                iterations=options["iterations"],
+                seed=options["seed"],
+            )
+        finally:
+            if server:
+                server.shutdown()
+                server.server_close()
+
+        if options["output"]:
+            with open(options["output"], "w") as f:
+                f.write(json.dumps(results, indent=2))
+        self.write_table(results)
+        if results["errors"]:
+            self.stderr.write(
+                self.style.WARNING("Errors:\n" + "\n".join(results["errors"]))
+            )
+
+    def write_table(self, results):
+        columns = ["requests", "errors", "throughput", "p50_ms", "p90_ms", "p99_ms"]
+        self.stdout.write(
+            f"{'endpoint':<18}" + "".join(f"{column:>12}" for column in columns)
+        )
+        for endpoint, summary in results["endpoints"].items():
+            self.stdout.write(
+                f"{endpoint:<18}"
+                + "".join(f"{summary[column]:>12}" for column in columns)
+            )
+        self.stdout.write(
+            f"{results['requests']} requests in {results['elapsed_seconds']}s, "
+            f"{results['throughput']} requests/s"
+        )
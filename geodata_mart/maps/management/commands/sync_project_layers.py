@@ -0,0 +1,41 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from geodata_mart.maps.catalog import sync_project_layers
+from geodata_mart.maps.models import Project
+
+
+class Command(BaseCommand):
+    help = "sync project layer catalogs from their QGIS project files"
+
+    def add_arguments(self, parser):
+        parser.add_argument("project_ids", nargs="*", type=int)
+        parser.add_argument(
+            "--all", action="store_true", help="sync every project with a QGIS file"
+        )
+        parser.add_argument(
+            "--queue",
+            action="store_true",
+            help="queue the sync on a worker instead of running it here",
+        )
+
+    def handle(self, *args, **options):
+        if options["all"]:
+            project_ids = Project.objects.filter(
+                qgis_project_file__isnull=False
+            ).values_list("pk", flat=True)
+        elif options["project_ids"]:
+            project_ids = options["project_ids"]
+        else:
+            raise CommandError("Provide project ids or --all")
+
+        for project_id in project_ids:
+            if options["queue"]:
+                sync_project_layers.delay(project_id)
+                self.stdout.write(f"Queued layer sync for project {project_id}")
+                continue
+            created, updated = sync_project_layers(project_id)
+            self.stdout.write(
+                self.style.SUCCESS(
+                    f"Project {project_id}: {created} layers created, {updated} updated"
+                )
+            )
@@ -0,0 +1,26 @@
+# Generated by Django 3.2.13 on 2026-10-19 08:12
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("maps", "0004_alter_project_allowed_srs"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="layer",
+            index=models.Index(
+                fields=["project_id", "lyr_class", "state"],
+                name="maps_layer_project_class_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="job",
+            index=models.Index(
+                fields=["user_id", "created_date"], name="maps_job_user_created_idx"
+            ),
+        ),
+    ]
@@ -0,0 +1,34 @@
+# Generated by Django 3.2.13 on 2026-10-19 11:41
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('maps', '0005_layer_job_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ImageRendition',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('model_label', models.CharField(max_length=100, verbose_name='Model')),
+                ('object_id', models.CharField(max_length=64, verbose_name='Object ID')),
+                ('field_name', models.CharField(max_length=100, verbose_name='Field Name')),
+                ('file_name', models.CharField(max_length=255, verbose_name='File Name')),
+                ('content_hash', models.CharField(max_length=64, verbose_name='Content Hash')),
+                ('created_date', models.DateTimeField(auto_now_add=True, verbose_name='Created Date')),
+                ('updated_date', models.DateTimeField(auto_now=True, verbose_name='Updated Date')),
+            ],
+            options={
+                'verbose_name': 'Image Rendition',
+                'verbose_name_plural': 'Image Renditions',
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='imagerendition',
+            constraint=models.UniqueConstraint(fields=('model_label', 'object_id', 'field_name'), name='maps_imagerendition_field_unique'),
+        ),
+    ]
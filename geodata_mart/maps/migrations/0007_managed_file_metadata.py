@@ -0,0 +1,263 @@
+# Generated by Django 3.2.13 on 2026-10-19 12:15
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('maps', '0006_imagerendition'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='authdbfile',
+            name='file_checksum',
+            field=models.CharField(blank=True, max_length=64, null=True, verbose_name='SHA-256 Checksum'),
+        ),
+        migrations.AddField(
+            model_name='authdbfile',
+            name='file_content_type',
+            field=models.CharField(blank=True, max_length=255, null=True, verbose_name='Content Type'),
+        ),
+        migrations.AddField(
+            model_name='authdbfile',
+            name='file_present',
+            field=models.BooleanField(blank=True, null=True, verbose_name='File Present'),
+        ),
+        migrations.AddField(
+            model_name='authdbfile',
+            name='file_size_bytes',
+            field=models.BigIntegerField(blank=True, null=True, verbose_name='File Size'),
+        ),
+        migrations.AddField(
+            model_name='authdbfile',
+            name='file_verified_date',
+            field=models.DateTimeField(blank=True, null=True, verbose_name='File Verified Date'),
+        ),
+        migrations.AddField(
+            model_name='downloadabledataitem',
+            name='file_checksum',
+            field=models.CharField(blank=True, max_length=64, null=True, verbose_name='SHA-256 Checksum'),
+        ),
+        migrations.AddField(
+            model_name='downloadabledataitem',
+            name='file_content_type',
+            field=models.CharField(blank=True, max_length=255, null=True, verbose_name='Content Type'),
+        ),
+        migrations.AddField(
+            model_name='downloadabledataitem',
+            name='file_present',
+            field=models.BooleanField(blank=True, null=True, verbose_name='File Present'),
+        ),
+        migrations.AddField(
+            model_name='downloadabledataitem',
+            name='file_size_bytes',
+            field=models.BigIntegerField(blank=True, null=True, verbose_name='File Size'),
+        ),
+        migrations.AddField(
+            model_name='downloadabledataitem',
+            name='file_verified_date',
+            field=models.DateTimeField(blank=True, null=True, verbose_name='File Verified Date'),
+        ),
+        migrations.AddField(
+            model_name='pgservicefile',
+            name='file_checksum',
+            field=models.CharField(blank=True, max_length=64, null=True, verbose_name='SHA-256 Checksum'),
+        ),
+        migrations.AddField(
+            model_name='pgservicefile',
+            name='file_content_type',
+            field=models.CharField(blank=True, max_length=255, null=True, verbose_name='Content Type'),
+        ),
+        migrations.AddField(
+            model_name='pgservicefile',
+            name='file_present',
+            field=models.BooleanField(blank=True, null=True, verbose_name='File Present'),
+        ),
+        migrations.AddField(
+            model_name='pgservicefile',
+            name='file_size_bytes',
+            field=models.BigIntegerField(blank=True, null=True, verbose_name='File Size'),
+        ),
+        migrations.AddField(
+            model_name='pgservicefile',
+            name='file_verified_date',
+            field=models.DateTimeField(blank=True, null=True, verbose_name='File Verified Date'),
+        ),
+        migrations.AddField(
+            model_name='processingmodelfile',
+            name='file_checksum',
+            field=models.CharField(blank=True, max_length=64, null=True, verbose_name='SHA-256 Checksum'),
+        ),
+        migrations.AddField(
+            model_name='processingmodelfile',
+            name='file_content_type',
+            field=models.CharField(blank=True, max_length=255, null=True, verbose_name='Content Type'),
+        ),
+        migrations.AddField(
+            model_name='processingmodelfile',
+            name='file_present',
+            field=models.BooleanField(blank=True, null=True, verbose_name='File Present'),
+        ),
+        migrations.AddField(
+            model_name='processingmodelfile',
+            name='file_size_bytes',
+            field=models.BigIntegerField(blank=True, null=True, verbose_name='File Size'),
+        ),
+        migrations.AddField(
+            model_name='processingmodelfile',
+            name='file_verified_date',
+            field=models.DateTimeField(blank=True, null=True, verbose_name='File Verified Date'),
+        ),
+        migrations.AddField(
+            model_name='processingscriptfile',
+            name='file_checksum',
+            field=models.CharField(blank=True, max_length=64, null=True, verbose_name='SHA-256 Checksum'),
+        ),
+        migrations.AddField(
+            model_name='processingscriptfile',
+            name='file_content_type',
+            field=models.CharField(blank=True, max_length=255, null=True, verbose_name='Content Type'),
+        ),
+        migrations.AddField(
+            model_name='processingscriptfile',
+            name='file_present',
+            field=models.BooleanField(blank=True, null=True, verbose_name='File Present'),
+        ),
+        migrations.AddField(
+            model_name='processingscriptfile',
+            name='file_size_bytes',
+            field=models.BigIntegerField(blank=True, null=True, verbose_name='File Size'),
+        ),
+        migrations.AddField(
+            model_name='processingscriptfile',
+            name='file_verified_date',
+            field=models.DateTimeField(blank=True, null=True, verbose_name='File Verified Date'),
+        ),
+        migrations.AddField(
+            model_name='projectcoveragefile',
+            name='file_checksum',
+            field=models.CharField(blank=True, max_length=64, null=True, verbose_name='SHA-256 Checksum'),
+        ),
+        migrations.AddField(
+            model_name='projectcoveragefile',
+            name='file_content_type',
+            field=models.CharField(blank=True, max_length=255, null=True, verbose_name='Content Type'),
+        ),
+        migrations.AddField(
+            model_name='projectcoveragefile',
+            name='file_present',
+            field=models.BooleanField(blank=True, null=True, verbose_name='File Present'),
+        ),
+        migrations.AddField(
+            model_name='projectcoveragefile',
+            name='file_size_bytes',
+            field=models.BigIntegerField(blank=True, null=True, verbose_name='File Size'),
+        ),
+        migrations.AddField(
+            model_name='projectcoveragefile',
+            name='file_verified_date',
+            field=models.DateTimeField(blank=True, null=True, verbose_name='File Verified Date'),
+        ),
+        migrations.AddField(
+            model_name='projectdatafile',
+            name='file_checksum',
+            field=models.CharField(blank=True, max_length=64, null=True, verbose_name='SHA-256 Checksum'),
+        ),
+        migrations.AddField(
+            model_name='projectdatafile',
+            name='file_content_type',
+            field=models.CharField(blank=True, max_length=255, null=True, verbose_name='Content Type'),
+        ),
+        migrations.AddField(
+            model_name='projectdatafile',
+            name='file_present',
+            field=models.BooleanField(blank=True, null=True, verbose_name='File Present'),
+        ),
+        migrations.AddField(
+            model_name='projectdatafile',
+            name='file_size_bytes',
+            field=models.BigIntegerField(blank=True, null=True, verbose_name='File Size'),
+        ),
+        migrations.AddField(
+            model_name='projectdatafile',
+            name='file_verified_date',
+            field=models.DateTimeField(blank=True, null=True, verbose_name='File Verified Date'),
+        ),
+        migrations.AddField(
+            model_name='qgisinifile',
+            name='file_checksum',
+            field=models.CharField(blank=True, max_length=64, null=True, verbose_name='SHA-256 Checksum'),
+        ),
+        migrations.AddField(
+            model_name='qgisinifile',
+            name='file_content_type',
+            field=models.CharField(blank=True, max_length=255, null=True, verbose_name='Content Type'),
+        ),
+        migrations.AddField(
+            model_name='qgisinifile',
+            name='file_present',
+            field=models.BooleanField(blank=True, null=True, verbose_name='File Present'),
+        ),
+        migrations.AddField(
+            model_name='qgisinifile',
+            name='file_size_bytes',
+            field=models.BigIntegerField(blank=True, null=True, verbose_name='File Size'),
+        ),
+        migrations.AddField(
+            model_name='qgisinifile',
+            name='file_verified_date',
+            field=models.DateTimeField(blank=True, null=True, verbose_name='File Verified Date'),
+        ),
+        migrations.AddField(
+            model_name='qgisprojectfile',
+            name='file_checksum',
+            field=models.CharField(blank=True, max_length=64, null=True, verbose_name='SHA-256 Checksum'),
+        ),
+        migrations.AddField(
+            model_name='qgisprojectfile',
+            name='file_content_type',
+            field=models.CharField(blank=True, max_length=255, null=True, verbose_name='Content Type'),
+        ),
+        migrations.AddField(
+            model_name='qgisprojectfile',
+            name='file_present',
+            field=models.BooleanField(blank=True, null=True, verbose_name='File Present'),
+        ),
+        migrations.AddField(
+            model_name='qgisprojectfile',
+            name='file_size_bytes',
+            field=models.BigIntegerField(blank=True, null=True, verbose_name='File Size'),
+        ),
+        migrations.AddField(
+            model_name='qgisprojectfile',
+            name='file_verified_date',
+            field=models.DateTimeField(blank=True, null=True, verbose_name='File Verified Date'),
+        ),
+        migrations.AddField(
+            model_name='resultfile',
+            name='file_checksum',
+            field=models.CharField(blank=True, max_length=64, null=True, verbose_name='SHA-256 Checksum'),
+        ),
+        migrations.AddField(
+            model_name='resultfile',
+            name='file_content_type',
+            field=models.CharField(blank=True, max_length=255, null=True, verbose_name='Content Type'),
+        ),
+        migrations.AddField(
+            model_name='resultfile',
+            name='file_present',
+            field=models.BooleanField(blank=True, null=True, verbose_name='File Present'),
+        ),
+        migrations.AddField(
+            model_name='resultfile',
+            name='file_size_bytes',
+            field=models.BigIntegerField(blank=True, null=True, verbose_name='File Size'),
+        ),
+        migrations.AddField(
+            model_name='resultfile',
+            name='file_verified_date',
+            field=models.DateTimeField(blank=True, null=True, verbose_name='File Verified Date'),
+        ),
+    ]
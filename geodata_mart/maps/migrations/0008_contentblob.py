@@ -0,0 +1,31 @@
+# Generated by Django 3.2.13 on 2026-10-19 12:52
+
+from django.db import migrations, models
+import django.core.files.storage
+import geodata_mart.maps.models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('maps', '0007_managed_file_metadata'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ContentBlob',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('checksum', models.CharField(max_length=64, unique=True, verbose_name='SHA-256 Checksum')),
+                ('file_object', models.FileField(blank=True, max_length=255, null=True, storage=django.core.files.storage.FileSystemStorage(base_url='/geodata/assets', location='/qgis'), upload_to=geodata_mart.maps.models.ContentBlob.getBlobUploadPath, verbose_name='Blob')),
+                ('size_bytes', models.BigIntegerField(default=0, verbose_name='File Size')),
+                ('ref_count', models.PositiveIntegerField(default=0, verbose_name='References')),
+                ('created_date', models.DateTimeField(auto_now_add=True, verbose_name='Created Date')),
+                ('updated_date', models.DateTimeField(auto_now=True, verbose_name='Updated Date')),
+            ],
+            options={
+                'verbose_name': 'Content Blob',
+                'verbose_name_plural': 'Content Blobs',
+            },
+        ),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 3.2.13 on 2026-10-19 13:30
+
+import django.contrib.gis.db.models.fields
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('maps', '0008_contentblob'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='project',
+            name='coverage_extent',
+            field=django.contrib.gis.db.models.fields.PolygonField(blank=True, default=None, geography=True, null=True, srid=4326, verbose_name='Coverage Extent'),
+        ),
+        migrations.AddField(
+            model_name='project',
+            name='coverage_simplified',
+            field=django.contrib.gis.db.models.fields.MultiPolygonField(blank=True, default=None, geography=True, null=True, srid=4326, verbose_name='Simplified Coverage Region'),
+        ),
+        migrations.AlterField(
+            model_name='projectcoveragefile',
+            name='state',
+            field=models.IntegerField(blank=True, choices=[(0, 'Unspecified'), (1, 'Loaded'), (2, 'Error'), (3, 'Queued'), (4, 'Processing')], default=0, null=True),
+        ),
+    ]
@@ -0,0 +1,49 @@
+# Generated by Django 3.2.13 on 2026-10-19 14:05
+
+import django.contrib.gis.db.models.fields
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('maps', '0009_project_coverage_variants'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='layer',
+            name='bbox',
+            field=django.contrib.gis.db.models.fields.PolygonField(blank=True, default=None, geography=True, null=True, srid=4326, verbose_name='Layer Extent'),
+        ),
+        migrations.AddField(
+            model_name='layer',
+            name='crs',
+            field=models.CharField(blank=True, max_length=255, null=True, verbose_name='Layer CRS'),
+        ),
+        migrations.AddField(
+            model_name='layer',
+            name='feature_count',
+            field=models.BigIntegerField(blank=True, null=True, verbose_name='Feature Count'),
+        ),
+        migrations.AddField(
+            model_name='layer',
+            name='geometry_type',
+            field=models.CharField(blank=True, max_length=80, null=True, verbose_name='Geometry Type'),
+        ),
+        migrations.AddField(
+            model_name='layer',
+            name='pixel_count',
+            field=models.BigIntegerField(blank=True, null=True, verbose_name='Pixel Count'),
+        ),
+        migrations.AddField(
+            model_name='layer',
+            name='source_size',
+            field=models.BigIntegerField(blank=True, help_text='Size in bytes of file based layer sources', null=True, verbose_name='Source Size'),
+        ),
+        migrations.AddField(
+            model_name='layer',
+            name='synced_date',
+            field=models.DateTimeField(blank=True, null=True, verbose_name='Synced Date'),
+        ),
+    ]
@@ -0,0 +1,24 @@
+# Generated by Django 3.2.13 on 2026-10-19 14:40
+
+import django.contrib.gis.db.models.fields
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('maps', '0010_layer_sync_fields'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='job',
+            name='aoi',
+            field=django.contrib.gis.db.models.fields.PolygonField(blank=True, default=None, geography=True, null=True, srid=4326, verbose_name='Area of Interest'),
+        ),
+        migrations.AddField(
+            model_name='job',
+            name='aoi_area',
+            field=models.FloatField(blank=True, null=True, verbose_name='Area of Interest (km²)'),
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 3.2.13 on 2026-10-19 15:20
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('maps', '0011_job_aoi'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='resultfile',
+            name='evicted_date',
+            field=models.DateTimeField(blank=True, help_text='Date the file was removed by the retention policy', null=True, verbose_name='Evicted Date'),
+        ),
+        migrations.AddField(
+            model_name='resultfile',
+            name='last_downloaded_date',
+            field=models.DateTimeField(blank=True, null=True, verbose_name='Last Downloaded Date'),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 3.2.13 on 2026-10-19 15:40
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('maps', '0012_resultfile_retention'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='job',
+            name='metrics',
+            field=models.JSONField(blank=True, help_text='Stage and layer timings of the latest processing attempt', null=True, verbose_name='Processing Metrics'),
+        ),
+    ]
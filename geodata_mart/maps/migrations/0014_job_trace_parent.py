@@ -0,0 +1,18 @@
+# Generated by Django 3.2.13 on 2026-10-19 16:05
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('maps', '0013_job_metrics'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='job',
+            name='trace_parent',
+            field=models.CharField(blank=True, help_text='W3C trace context of the job submission', max_length=55, null=True, verbose_name='Trace Parent'),
+        ),
+    ]
@@ -0,0 +1,49 @@
+# Generated by Django 3.2.13 on 2026-10-19 17:21
+
+from django.db import migrations, models
+import django.core.files.storage
+import django.db.models.deletion
+import geodata_mart.maps.models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('maps', '0014_job_trace_parent'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='job',
+            name='profile',
+            field=models.BooleanField(default=False, help_text='Record a sampling profile of each processing attempt', verbose_name='Profile Processing'),
+        ),
+        migrations.CreateModel(
+            name='JobProfileFile',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('comment', models.TextField(blank=True, null=True, verbose_name='Comments')),
+                ('version', models.IntegerField(default=1)),
+                ('file_size_bytes', models.BigIntegerField(blank=True, null=True, verbose_name='File Size')),
+                ('file_checksum', models.CharField(blank=True, max_length=64, null=True, verbose_name='SHA-256 Checksum')),
+                ('file_content_type', models.CharField(blank=True, max_length=255, null=True, verbose_name='Content Type')),
+                ('file_present', models.BooleanField(blank=True, null=True, verbose_name='File Present')),
+                ('file_verified_date', models.DateTimeField(blank=True, null=True, verbose_name='File Verified Date')),
+                ('created_date', models.DateTimeField(auto_now_add=True, verbose_name='Created Date')),
+                ('updated_date', models.DateTimeField(auto_now=True, verbose_name='Updated Date')),
+                ('file_name', models.CharField(max_length=255, verbose_name='File Name')),
+                ('file_object', models.FileField(blank=True, help_text='Collapsed stacks sampled while processing the job', null=True, storage=django.core.files.storage.FileSystemStorage(base_url='/geodata/assets', location='/qgis'), upload_to=geodata_mart.maps.models.JobProfileFile.getProfileUploadPath, verbose_name='Profile File')),
+                ('attempt', models.PositiveIntegerField(default=1, verbose_name='Attempt')),
+                ('native', models.BooleanField(default=False, help_text='Whether frames in compiled code such as QGIS are included', verbose_name='Native Frames')),
+                ('sample_count', models.PositiveIntegerField(default=0, verbose_name='Sample Count')),
+                ('duration', models.FloatField(blank=True, null=True, verbose_name='Duration (s)')),
+                ('job_id', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='profiles', to='maps.job', verbose_name='Job')),
+            ],
+            options={
+                'verbose_name': 'Job Profile File',
+                'verbose_name_plural': 'Job Profile Files',
+                'abstract': False,
+                'unique_together': {('file_name', 'version')},
+            },
+        ),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 3.2.13 on 2026-10-19 18:02
+
+import django.contrib.postgres.fields
+from django.db import migrations, models
+from pathlib import PurePosixPath
+
+
+def record_original_webp_names(apps, schema_editor):
+    """Every processed image had a WebP copy written next to the original"""
+    ImageRendition = apps.get_model('maps', 'ImageRendition')
+    for record in ImageRendition.objects.all().only('id', 'file_name'):
+        record.webp_names = [str(PurePosixPath(record.file_name).with_suffix('.webp'))]
+        record.save(update_fields=['webp_names'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('maps', '0015_job_profile'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='imagerendition',
+            name='webp_names',
+            field=django.contrib.postgres.fields.ArrayField(base_field=models.CharField(max_length=255), blank=True, default=list, help_text='Storage names of the WebP copies of the image and renditions', size=None, verbose_name='WebP Copies'),
+        ),
+        migrations.RunPython(record_original_webp_names, migrations.RunPython.noop),
+    ]
@@ -1,19 +1,17 @@
 from django.db.models.signals import post_delete, pre_save, post_save
 from django.dispatch import receiver
-from django.db import models
+from django.db import models, transaction
 from django.utils.encoding import smart_str
 from django.contrib.gis.db import models as gismodels
-from django.contrib.gis.gdal import DataSource
-from django.contrib.gis.geos import MultiPolygon
 from django.conf import settings
 from django.utils.translation import gettext_lazy as _
 from geodata_mart.vendors.models import Vendor
 from geodata_mart.users.models import User
 from django.contrib.postgres.fields import ArrayField
 from versatileimagefield.fields import VersatileImageField
-from PIL import Image
 import uuid
 import logging
+from pathlib import PurePosixPath
 
 from django.core.files.storage import FileSystemStorage
 
@@ -134,11 +132,29 @@ class ManagedFileObject(models.Model):
     )
     comment = models.TextField(verbose_name=_("Comments"), blank=True, null=True)
     version = models.IntegerField(default=1, blank=False, null=False)
+    file_size_bytes = models.BigIntegerField(_("File Size"), blank=True, null=True)
+    file_checksum = models.CharField(
+        _("SHA-256 Checksum"), max_length=64, blank=True, null=True
+    )
+    file_content_type = models.CharField(
+        _("Content Type"), max_length=255, blank=True, null=True
+    )
+    file_present = models.BooleanField(_("File Present"), blank=True, null=True)
+    file_verified_date = models.DateTimeField(
+        _("File Verified Date"), blank=True, null=True
+    )
     created_date = models.DateTimeField(
         auto_now_add=True, verbose_name=_("Created Date")
     )
     updated_date = models.DateTimeField(auto_now=True, verbose_name=_("Updated Date"))
 
+    # Stored file name that the metadata fields were last recorded for
+    _stored_file_name = None
+
+    # Store files once per content hash as shared ContentBlob objects when
+    # the CONTENT_ADDRESSED_STORAGE setting is enabled
+    content_addressed = False
+
     class Meta:
         abstract = True
         verbose_name = _("Managed File Object")
@@ -162,22 +178,99 @@ class ManagedFileObject(models.Model):
     def preview(self):
         return self.description[:100]
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._stored_file_name = instance.__dict__.get("file_object")
+        return instance
+
+    def save(self, *args, **kwargs):
+        """Save the record, recording file metadata when the file changes"""
+        if self.uses_content_addressing() and self.file_object:
+            if not self.file_object._committed:
+                blob = ContentBlob.acquire(self.file_object.file, self.file_object.name)
+                self.file_object = blob.file_object.name
+        super().save(*args, **kwargs)
+        file_name = self.file_object.name if self.file_object else None
+        if file_name != self._stored_file_name:
+            if self.content_addressed and self._stored_file_name:
+                ContentBlob.release(self._stored_file_name)
+            self.update_file_metadata()
+
+    def uses_content_addressing(self):
+        return self.content_addressed and settings.CONTENT_ADDRESSED_STORAGE
+
+    def store_file(self, name, content, save=True):
+        """Store file content for this record
+
+        Content is deduplicated by hash if content addressed storage is in
+        use for the model, otherwise it is saved to the upload path.
+        """
+        if not self.uses_content_addressing():
+            self.file_object.save(name, content, save=save)
+            return
+        blob = ContentBlob.acquire(content, name)
+        self.file_object = blob.file_object.name
+        if save:
+            self.save()
+
+    def update_file_metadata(self):
+        """Read the file size, checksum, and presence from storage and store them"""
+        from geodata_mart.maps.files import get_file_metadata
+
+        blob = (
+            ContentBlob.objects.filter(file_object=self.file_object.name).first()
+            if self.content_addressed and self.file_object
+            else None
+        )
+        if blob:
+            metadata = get_file_metadata(
+                self.file_object, size=blob.size_bytes, checksum=blob.checksum
+            )
+        else:
+            metadata = get_file_metadata(self.file_object)
+        for key, value in metadata.items():
+            setattr(self, key, value)
+        type(self).objects.filter(pk=self.pk).update(**metadata)
+        self._stored_file_name = self.file_object.name if self.file_object else None
+
     def file_available(self):
+        if self.file_verified_date is not None:
+            return bool(self.file_present)
         if self.file_object.storage.exists(self.file_object.name):
             return True
         else:
             return False
 
     def remove_file(self):
-        if self.file_available():
-            self.file_object.delete(save=False)
-            logging.warn(f"File removed: {self.file_object}")
-        else:
+        """Remove the stored file of this record
+
+        Content addressed files may be shared with other records, so the
+        reference to the blob is released instead, and the file is only
+        deleted with the last reference.
+        """
+        if not self.file_available():
             raise Exception(f"Cannot remove {self.file_object}: File does not exist")
+        name = self.file_object.name
+        if (
+            self.content_addressed
+            and ContentBlob.objects.filter(file_object=name).exists()
+        ):
+            self.file_object = None
+            self.save()
+        else:
+            self.file_object.delete(save=False)
+            self.update_file_metadata()
+        logging.warn(f"File removed: {name}")
 
     def file_size(self):
-        if self.file_object.storage.exists(self.file_object.name):
+        if self.file_verified_date is not None:
+            size_bytes = self.file_size_bytes if self.file_present else None
+        elif self.file_object.storage.exists(self.file_object.name):
             size_bytes = self.file_object.storage.size(self.file_object.name)
+        else:
+            size_bytes = None
+        if size_bytes is not None:
             size_mb = int(size_bytes) / 1024 / 1024
             if size_mb < 1:
                 size = round(size_mb, 4)
@@ -451,6 +544,22 @@ class Project(gismodels.Model):
         null=True,
         blank=True,
     )
+    coverage_simplified = gismodels.MultiPolygonField(
+        default=None,
+        verbose_name=_("Simplified Coverage Region"),
+        srid=4326,
+        geography=True,
+        null=True,
+        blank=True,
+    )
+    coverage_extent = gismodels.PolygonField(
+        default=None,
+        verbose_name=_("Coverage Extent"),
+        srid=4326,
+        geography=True,
+        null=True,
+        blank=True,
+    )
     icon = VersatileImageField(
         _("Icon"),
         storage=project_storage,
@@ -724,11 +833,40 @@ class Layer(models.Model):
     )
     siblings = models.ManyToManyField("self", blank=True)
     tags = models.ManyToManyField(MetaTags, blank=True)
+    bbox = gismodels.PolygonField(
+        default=None,
+        verbose_name=_("Layer Extent"),
+        srid=4326,
+        geography=True,
+        null=True,
+        blank=True,
+    )
+    crs = models.CharField(_("Layer CRS"), max_length=255, blank=True, null=True)
+    geometry_type = models.CharField(
+        _("Geometry Type"), max_length=80, blank=True, null=True
+    )
+    feature_count = models.BigIntegerField(_("Feature Count"), blank=True, null=True)
+    pixel_count = models.BigIntegerField(_("Pixel Count"), blank=True, null=True)
+    source_size = models.BigIntegerField(
+        _("Source Size"),
+        help_text=_("Size in bytes of file based layer sources"),
+        blank=True,
+        null=True,
+    )
+    synced_date = models.DateTimeField(
+        verbose_name=_("Synced Date"), blank=True, null=True
+    )
 
     class Meta:
         verbose_name = _("Project Layer")
         verbose_name_plural = _("Project Layers")
         unique_together = ("short_name", "project_id")
+        indexes = [
+            models.Index(
+                fields=["project_id", "lyr_class", "state"],
+                name="maps_layer_project_class_idx",
+            ),
+        ]
 
     def __str__(self):
         return self.short_name
@@ -805,10 +943,45 @@ class Job(models.Model):
     parameters = models.JSONField(_("Request Parameters"), blank=True, null=True)
     tasks = ArrayField(models.CharField(max_length=36), blank=True, null=True)
     comment = models.TextField(verbose_name=_("Comments"), blank=True, null=True)
+    aoi = gismodels.PolygonField(
+        default=None,
+        verbose_name=_("Area of Interest"),
+        srid=4326,
+        geography=True,
+        null=True,
+        blank=True,
+    )
+    aoi_area = models.FloatField(
+        verbose_name=_("Area of Interest (km²)"), blank=True, null=True
+    )
+    trace_parent = models.CharField(
+        _("Trace Parent"),
+        max_length=55,
+        help_text=_("W3C trace context of the job submission"),
+        blank=True,
+        null=True,
+    )
+    metrics = models.JSONField(
+        _("Processing Metrics"),
+        help_text=_("Stage and layer timings of the latest processing attempt"),
+        blank=True,
+        null=True,
+    )
+    profile = models.BooleanField(
+        _("Profile Processing"),
+        help_text=_("Record a sampling profile of each processing attempt"),
+        default=False,
+    )
 
     class Meta:
         verbose_name = _("Geodata Mart Processing Job")
         verbose_name_plural = _("Geodata Mart Processing Jobs")
+        indexes = [
+            models.Index(
+                fields=["user_id", "created_date"],
+                name="maps_job_user_created_idx",
+            ),
+        ]
 
     def __str__(self):
         return str(self.job_id)
@@ -819,6 +992,13 @@ class Job(models.Model):
     def preview(self):
         return self.comment[:100]
 
+    def has_pending_task(self):
+        """Whether a task was dispatched for the job and has not finished"""
+        return bool(self.tasks) and self.state in [
+            Job.JobStateChoices.UNSPECIFIED,
+            Job.JobStateChoices.PROCESSING,
+        ]
+
     def get_fields(self):
         # return [(field.name, field.value_to_string(self)) for field in Job._meta.fields]
         fields = []
@@ -839,6 +1019,8 @@ class ResultFile(ManagedFileObject):
 
     Model for the resulting file objects produced by processing jobs."""
 
+    content_addressed = True
+
     def getResultUploadPath(instance, filename):
         """Get the results media upload path as a callable
 
@@ -866,16 +1048,69 @@ class ResultFile(ManagedFileObject):
         null=True,
         blank=True,
     )
+    last_downloaded_date = models.DateTimeField(
+        verbose_name=_("Last Downloaded Date"), blank=True, null=True
+    )
+    evicted_date = models.DateTimeField(
+        verbose_name=_("Evicted Date"),
+        help_text=_("Date the file was removed by the retention policy"),
+        blank=True,
+        null=True,
+    )
 
     class Meta(ManagedFileObject.Meta):
         verbose_name = _("Result File")
         verbose_name_plural = _("Result Files")
 
 
+class JobProfileFile(ManagedFileObject):
+    """Processing Job Profile File Model
+
+    Sampled stacks of a processing job attempt in the collapsed format,
+    which flame graph tools such as flamegraph.pl and speedscope read."""
+
+    def getProfileUploadPath(instance, filename):
+        """Get the profiles media upload path as a callable
+
+        Returns:
+            string: path to output file for the profile
+        """
+        return f"./profiles/{instance.job_id.job_id}/{filename}"
+
+    file_name = models.CharField(_("File Name"), max_length=255)
+    file_object = models.FileField(
+        upload_to=getProfileUploadPath,
+        storage=project_storage,
+        help_text=_("Collapsed stacks sampled while processing the job"),
+        verbose_name=_("Profile File"),
+        blank=True,
+        null=True,
+    )
+    job_id = models.ForeignKey(
+        Job,
+        on_delete=models.CASCADE,
+        verbose_name=_("Job"),
+        related_name="profiles",
+    )
+    attempt = models.PositiveIntegerField(_("Attempt"), default=1)
+    native = models.BooleanField(
+        _("Native Frames"),
+        help_text=_("Whether frames in compiled code such as QGIS are included"),
+        default=False,
+    )
+    sample_count = models.PositiveIntegerField(_("Sample Count"), default=0)
+    duration = models.FloatField(_("Duration (s)"), blank=True, null=True)
+
+    class Meta(ManagedFileObject.Meta):
+        verbose_name = _("Job Profile File")
+        verbose_name_plural = _("Job Profile Files")
+
+
 class ProjectCoverageFile(ManagedFileObject):
     """Spatial data file for defining the project coverage
 
-    Must be OGC compliant data source of Type MultiPolygon."""
+    Must be an OGR compatible data source with Polygon or MultiPolygon
+    features, which are merged into the project coverage in the background."""
 
     def getProjectUploadPath(instance, filename):
         """Get the project media upload path as a callable
@@ -900,6 +1135,8 @@ class ProjectCoverageFile(ManagedFileObject):
         UNSPECIFIED = 0, _("Unspecified")
         LOADED = 1, _("Loaded")
         ERROR = 2, _("Error")
+        QUEUED = 3, _("Queued")
+        PROCESSING = 4, _("Processing")
 
     file_object = models.FileField(
         upload_to=getProjectUploadPath,
@@ -932,6 +1169,8 @@ class ProjectCoverageFile(ManagedFileObject):
 class DownloadableDataItem(ManagedFileObject):
     """Flat File objects made available for download."""
 
+    content_addressed = True
+
     def getDataUploadPath(instance, filename):
         """Get the media upload path as a callable
 
@@ -1042,6 +1281,145 @@ class DownloadableDataItem(ManagedFileObject):
         return fields
 
 
+class ImageRendition(models.Model):
+    """Processed state of an image field
+
+    Records the content hash of each image once it has been resized and its
+    renditions generated, so that unchanged images are not processed again,
+    and the WebP copies written so that templates need not check storage.
+    """
+
+    model_label = models.CharField(_("Model"), max_length=100)
+    object_id = models.CharField(_("Object ID"), max_length=64)
+    field_name = models.CharField(_("Field Name"), max_length=100)
+    file_name = models.CharField(_("File Name"), max_length=255)
+    content_hash = models.CharField(_("Content Hash"), max_length=64)
+    webp_names = ArrayField(
+        models.CharField(max_length=255),
+        default=list,
+        blank=True,
+        verbose_name=_("WebP Copies"),
+        help_text=_("Storage names of the WebP copies of the image and renditions"),
+    )
+    created_date = models.DateTimeField(
+        auto_now_add=True, verbose_name=_("Created Date")
+    )
+    updated_date = models.DateTimeField(auto_now=True, verbose_name=_("Updated Date"))
+
+    class Meta:
+        verbose_name = _("Image Rendition")
+        verbose_name_plural = _("Image Renditions")
+        constraints = [
+            models.UniqueConstraint(
+                fields=["model_label", "object_id", "field_name"],
+                name="maps_imagerendition_field_unique",
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.model_label}:{self.object_id}:{self.field_name}"
+
+
+class ContentBlob(models.Model):
+    """Content addressed file storage
+
+    Files of content addressed managed file models are stored once per
+    SHA-256 hash and shared between records, with references counted so
+    that the file is removed once no records refer to it.
+    """
+
+    def getBlobUploadPath(instance, filename):
+        """Get the blob path from the content hash, keeping the first file name
+
+        Returns:
+            string: path to the stored blob
+        """
+        checksum = instance.checksum
+        root = settings.CONTENT_ADDRESSED_ROOT
+        return f"{root}/{checksum[:2]}/{checksum[2:4]}/{checksum}/{filename}"
+
+    checksum = models.CharField(_("SHA-256 Checksum"), max_length=64, unique=True)
+    file_object = models.FileField(
+        upload_to=getBlobUploadPath,
+        storage=project_storage,
+        max_length=255,
+        verbose_name=_("Blob"),
+        blank=True,
+        null=True,
+    )
+    size_bytes = models.BigIntegerField(_("File Size"), default=0)
+    ref_count = models.PositiveIntegerField(_("References"), default=0)
+    created_date = models.DateTimeField(
+        auto_now_add=True, verbose_name=_("Created Date")
+    )
+    updated_date = models.DateTimeField(auto_now=True, verbose_name=_("Updated Date"))
+
+    class Meta:
+        verbose_name = _("Content Blob")
+        verbose_name_plural = _("Content Blobs")
+
+    def __str__(self):
+        return self.checksum
+
+    @classmethod
+    def acquire(cls, content, name):
+        """Take a reference to the blob for some content, storing it if new
+
+        Args:
+            content (File): file content to store
+            name (str): file name used if the content is not yet stored
+
+        Returns:
+            ContentBlob: the blob holding the content
+        """
+        from geodata_mart.maps.files import get_content_checksum
+        from geodata_mart.utils.metrics import increment
+
+        checksum = get_content_checksum(content)
+        with transaction.atomic():
+            blob, created = cls.objects.select_for_update().get_or_create(
+                checksum=checksum
+            )
+            hit = not created and bool(blob.file_object)
+            if not hit:
+                content.seek(0)
+                blob.file_object.save(PurePosixPath(name).name, content, save=False)
+                blob.size_bytes = blob.file_object.size
+            blob.ref_count += 1
+            blob.save()
+        increment(
+            "cache_requests", cache="content_blob", result="hit" if hit else "miss"
+        )
+        return blob
+
+    @classmethod
+    def release(cls, name):
+        """Drop a reference to the blob stored under name, if there is one
+
+        The blob and its file are removed once it is no longer referenced.
+        """
+        with transaction.atomic():
+            blob = cls.objects.select_for_update().filter(file_object=name).first()
+            if blob is None:
+                return
+            blob.ref_count -= 1
+            if blob.ref_count > 0:
+                blob.save(update_fields=["ref_count", "updated_date"])
+                return
+            blob.delete()
+            storage = blob.file_object.storage
+            transaction.on_commit(lambda: storage.delete(name))
+
+
+@receiver(post_delete)
+def release_content_blobs(sender, instance, **kwargs):
+    """Release the content blob referenced by a deleted managed file"""
+    if not issubclass(sender, ManagedFileObject) or not sender.content_addressed:
+        return
+    if instance.file_object:
+        ContentBlob.release(instance.file_object.name)
+
+
 @receiver(post_delete, sender=ManagedFileObject)
 def delete_files_with_model(sender, instance, **kwargs):
     """Delete file from filesystem when corresponding model with FileField is removed"""
@@ -1068,159 +1446,42 @@ def delete_replaced_files(sender, instance, **kwargs):
                 sender.delete_unused_file(sender, instance, field, db_instance_field)
 
 
-@receiver(post_save, sender=ProjectCoverageFile)
-def load_project_coverage_data(sender, instance, **kwargs):
-    """Populate coverage field in the related project model
-
-    Use GeoDjango LayerMapping to load OGR data source from
-    a file source and load the geometry into the database"""
-
-    try:
-        record_instance = sender.objects.get(pk=instance.pk)
-    except sender.DoesNotExist:
-        raise ValueError("Source file record not found")
-
-    ds = DataSource(record_instance.file_object.path)
-    layer = ds[0]
-    if not layer.geom_type in ["MultiPolygon"]:
-        record_instance.state = ProjectCoverageFile.CoverageStateChoices.ERROR
-        raise ValueError("The geometry type must be a MultiPolygon")
-
-    try:
-        project = Project.objects.get(id=record_instance.project_id.id)
-        project.coverage = layer.get_geoms(geos=True)[0]
-        project.save()
-        record_instance.state = ProjectCoverageFile.CoverageStateChoices.LOADED
-    except Exception as e:
-        print("Error saving coverage geometry from file")
-        print(f"{e}")
-        record_instance.state = ProjectCoverageFile.CoverageStateChoices.ERROR
-
-
-@receiver(post_save, sender=Project)
-def resize_icon(sender, instance, **kwargs):
-    """Resize the provided image to a maximum size of 600x600"""
-    try:
-        record_instance = sender.objects.get(pk=instance.pk)
-    except sender.DoesNotExist:
-        return
-
-    if not record_instance.icon or not project_storage.exists(
-        record_instance.icon.path
-    ):
-        return
-
-    icon_size = (600, 600)
-    icon_image = Image.open(record_instance.icon.path)
-    if icon_image.size[0] > icon_size[0] or icon_image.size[1] > icon_size[1]:
-        icon_image.thumbnail(icon_size, resample=Image.Resampling.BICUBIC)
-        icon_image.save(record_instance.icon.path)
+@receiver(post_save, sender=Job)
+def publish_job_state(sender, instance, **kwargs):
+    """Publish the job state to the job event channel once committed"""
+    from geodata_mart.maps.progress import publish_job_event
 
+    job_id, state = instance.job_id, instance.state
+    transaction.on_commit(lambda: publish_job_event(job_id, "state", state=state))
 
-@receiver(post_save, sender=Project)
-def resize_preview_image(sender, instance, **kwargs):
-    """Resize the provided image to a maximum size of 1200x1200"""
-    try:
-        record_instance = sender.objects.get(pk=instance.pk)
-    except sender.DoesNotExist:
-        return
 
-    if not record_instance.preview_image or not project_storage.exists(
-        record_instance.preview_image.path
-    ):
-        return
+@receiver(post_save, sender=ProjectCoverageFile)
+def queue_project_coverage_ingestion(sender, instance, **kwargs):
+    """Queue loading of the coverage file into the related project
 
-    preview_image_size = (1200, 1200)
-    preview_image = Image.open(record_instance.preview_image.path)
+    Large coverage files are read and merged in the background, so only a
+    new or replaced coverage file is queued here.
+    """
     if (
-        preview_image.size[0] > preview_image_size[0]
-        or preview_image.size[1] > preview_image_size[1]
+        not instance.file_object
+        or instance.file_object.name == instance._stored_file_name
     ):
-        preview_image.thumbnail(preview_image_size, resample=Image.Resampling.BICUBIC)
-        preview_image.save(record_instance.preview_image.path)
-
-
-@receiver(post_save, sender=DownloadableDataItem)
-def resize_icon(sender, instance, **kwargs):
-    """Resize the provided image to a maximum size of 600x600"""
-    try:
-        record_instance = sender.objects.get(pk=instance.pk)
-    except sender.DoesNotExist:
         return
+    from geodata_mart.maps.coverage import ingest_project_coverage
 
-    if not record_instance.icon or not project_storage.exists(
-        record_instance.icon.path
-    ):
-        return
-
-    icon_size = (600, 600)
-    icon_image = Image.open(record_instance.icon.path)
-    if icon_image.size[0] > icon_size[0] or icon_image.size[1] > icon_size[1]:
-        icon_image.thumbnail(icon_size, resample=Image.Resampling.BICUBIC)
-        icon_image.save(record_instance.icon.path)
+    sender.objects.filter(pk=instance.pk).update(
+        state=ProjectCoverageFile.CoverageStateChoices.QUEUED
+    )
+    instance.state = ProjectCoverageFile.CoverageStateChoices.QUEUED
+    coverage_file_id = instance.pk
+    transaction.on_commit(lambda: ingest_project_coverage.delay(coverage_file_id))
 
 
+@receiver(post_save, sender=Project)
 @receiver(post_save, sender=DownloadableDataItem)
-def resize_preview_image(sender, instance, **kwargs):
-    """Resize the provided image to a maximum size of 1200x1200"""
-    try:
-        record_instance = sender.objects.get(pk=instance.pk)
-    except sender.DoesNotExist:
-        return
-
-    if not record_instance.preview_image or not project_storage.exists(
-        record_instance.preview_image.path
-    ):
-        return
-
-    preview_image_size = (1200, 1200)
-    preview_image = Image.open(record_instance.preview_image.path)
-    if (
-        preview_image.size[0] > preview_image_size[0]
-        or preview_image.size[1] > preview_image_size[1]
-    ):
-        preview_image.thumbnail(preview_image_size, resample=Image.Resampling.BICUBIC)
-        preview_image.save(record_instance.preview_image.path)
-
-
 @receiver(post_save, sender=Layer)
-def resize_legend(sender, instance, **kwargs):
-    """Resize the provided image to a maximum size of 600x600"""
-    try:
-        record_instance = sender.objects.get(pk=instance.pk)
-    except sender.DoesNotExist:
-        return
+def queue_image_renditions(sender, instance, **kwargs):
+    """Queue background resizing and renditions for new or replaced images"""
+    from geodata_mart.maps.renditions import queue_renditions
 
-    if not record_instance.legend_image or not project_storage.exists(
-        record_instance.legend_image.path
-    ):
-        return
-
-    legend_size = (600, 600)
-    legend_image = Image.open(record_instance.legend_image.path)
-    if legend_image.size[0] > legend_size[0] or legend_image.size[1] > legend_size[1]:
-        legend_image.thumbnail(legend_size, resample=Image.Resampling.BICUBIC)
-        legend_image.save(record_instance.legend_image.path)
-
-
-@receiver(post_save, sender=Layer)
-def resize_preview_image(sender, instance, **kwargs):
-    """Resize the provided image to a maximum size of 1200x1200"""
-    try:
-        record_instance = sender.objects.get(pk=instance.pk)
-    except sender.DoesNotExist:
-        return
-
-    if not record_instance.preview_image or not project_storage.exists(
-        record_instance.preview_image.path
-    ):
-        return
-
-    preview_image_size = (1200, 1200)
-    preview_image = Image.open(record_instance.preview_image.path)
-    if (
-        preview_image.size[0] > preview_image_size[0]
-        or preview_image.size[1] > preview_image_size[1]
-    ):
-        preview_image.thumbnail(preview_image_size, resample=Image.Resampling.BICUBIC)
-        preview_image.save(record_instance.preview_image.path)
+    queue_renditions(instance)
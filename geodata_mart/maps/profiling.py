@@ -0,0 +1,111 @@
+"""Sampling profiles of processing jobs
+
+Staff enable profiling on a job, and the worker samples the stacks of each
+processing attempt of that job, which is read when the task starts, so no
+worker restart is needed. The Python stacks of the task thread are always
+sampled, and with ``JOB_PROFILING_NATIVE`` py-spy also samples the worker
+from outside to include frames inside QGIS and other compiled code. The
+native profile is kept when py-spy succeeds, otherwise the Python profile.
+
+Profiles are attached to the job as collapsed stack files.
+"""
+import logging
+import shutil
+import tempfile
+from os.path import join
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+
+from geodata_mart.maps.models import JobProfileFile
+from geodata_mart.utils.profiling import ProcessSampler, StackSampler
+
+logger = logging.getLogger(__name__)
+
+
+class JobProfiler:
+    """Sample the current thread, and the whole process where py-spy is usable"""
+
+    def __init__(self, interval=None, native=None):
+        self.interval = interval or settings.JOB_PROFILING_INTERVAL
+        self.sampler = StackSampler(interval=self.interval)
+        self.process_sampler = None
+        self.directory = None
+        native = settings.JOB_PROFILING_NATIVE if native is None else native
+        if native and ProcessSampler.is_available(settings.JOB_PROFILING_PYSPY):
+            self.directory = tempfile.mkdtemp(prefix="gdm-profile-")
+            self.process_sampler = ProcessSampler(
+                join(self.directory, "profile.folded"),
+                interval=self.interval,
+                executable=settings.JOB_PROFILING_PYSPY,
+            )
+        elif native:
+            logger.warning(f"{settings.JOB_PROFILING_PYSPY} not found")
+
+    def start(self):
+        self.sampler.start()
+        if self.process_sampler:
+            self.process_sampler.start()
+        return self
+
+    def stop(self):
+        """Stop sampling
+
+        Returns:
+            tuple: the collapsed stacks, whether they include native frames,
+            and the number of samples
+        """
+        self.sampler.stop()
+        try:
+            if self.process_sampler:
+                try:
+                    self.process_sampler.stop()
+                    folded = self.process_sampler.folded()
+                    if folded:
+                        return folded, True, self.process_sampler.samples
+                except RuntimeError as e:
+                    logger.warning(f"Native profiling failed: {e}")
+            return self.sampler.folded(), False, self.sampler.samples
+        finally:
+            if self.directory:
+                shutil.rmtree(self.directory, ignore_errors=True)
+
+
+def start_job_profiler(job):
+    """Start profiling a processing attempt if it is enabled for the job
+
+    Returns:
+        JobProfiler: the running profiler, or None
+    """
+    if not job.profile:
+        return None
+    logger.info(f"Profiling Job {job.job_id}")
+    return JobProfiler().start()
+
+
+def store_job_profile(job, profiler, attempt=1):
+    """Stop a job profiler and attach its profile to the job
+
+    Failures are logged rather than raised, so profiling never fails a job.
+
+    Returns:
+        JobProfileFile: the stored profile, or None
+    """
+    try:
+        folded, native, samples = profiler.stop()
+        record = JobProfileFile(
+            file_name=str(job.job_id),
+            version=job.profiles.count() + 1,
+            job_id=job,
+            attempt=attempt,
+            native=native,
+            sample_count=samples,
+            duration=profiler.sampler.duration,
+        )
+        record.store_file(
+            f"{job.job_id}-{attempt}.folded", ContentFile(folded.encode())
+        )
+        return record
+    except Exception as e:
+        logger.warning(f"Unable to store profile of Job {job.job_id}: {e}")
+        return None
@@ -0,0 +1,118 @@
+"""Job progress lookups and events
+
+Progress for running jobs is recorded by ``celery_progress`` in the Celery
+result backend, which is Redis. Rather than polling the task status endpoint
+once per job, the helpers here resolve the state of every job on a page with
+a single ``MGET`` against the result backend.
+
+Progress and state changes are also published to a per-job Redis channel,
+which the ASGI event stream in ``config.sse`` relays to watching browsers.
+"""
+import json
+import logging
+
+from celery import states
+from celery_progress.backend import PROGRESS_STATE, ProgressRecorder
+from redis.exceptions import RedisError
+
+from config import celery_app
+from geodata_mart.utils.redis_client import get_redis
+
+logger = logging.getLogger(__name__)
+
+
+def get_tasks_meta(task_ids):
+    """Fetch the result backend metadata for a batch of Celery tasks
+
+    Uses a single multi-key read when the backend supports it (Redis and other
+    key-value backends), falling back to one lookup per task otherwise.
+
+    Returns:
+        dict: task id mapped to the decoded task metadata, or None if unknown
+    """
+    task_ids = [str(task_id) for task_id in task_ids if task_id]
+    if not task_ids:
+        return {}
+    backend = celery_app.backend
+    if hasattr(backend, "mget") and hasattr(backend, "get_key_for_task"):
+        keys = [backend.get_key_for_task(task_id) for task_id in task_ids]
+        values = backend.mget(keys)
+        metas = [backend.decode_result(value) if value else None for value in values]
+    else:
+        metas = [backend.get_task_meta(task_id) for task_id in task_ids]
+    return dict(zip(task_ids, metas))
+
+
+def get_task_progress(meta):
+    """Summarize task metadata as a state, percentage, and description"""
+    if not meta:
+        return {"state": states.PENDING, "percent": 0, "description": None}
+    status = meta.get("status", states.PENDING)
+    result = meta.get("result")
+    if status == PROGRESS_STATE and isinstance(result, dict):
+        percent = result.get("percent", 0)
+        description = result.get("description")
+    elif status == states.SUCCESS:
+        percent = 100
+        description = None
+    else:
+        percent = 0
+        description = str(result) if status in states.EXCEPTION_STATES else None
+    return {"state": status, "percent": percent, "description": description}
+
+
+def get_jobs_progress(jobs):
+    """Resolve the progress of the latest task for each job
+
+    Args:
+        jobs (iterable): dicts or Job instances with job_id, state, and tasks
+
+    Returns:
+        dict: job id string mapped to the job state and task progress
+    """
+    jobs = [job if isinstance(job, dict) else vars(job) for job in jobs]
+    latest_tasks = {
+        str(job["job_id"]): job["tasks"][-1] for job in jobs if job.get("tasks")
+    }
+    metas = get_tasks_meta(latest_tasks.values())
+    progress = {}
+    for job in jobs:
+        job_id = str(job["job_id"])
+        task_id = latest_tasks.get(job_id)
+        progress[job_id] = {
+            "state": job["state"],
+            "task": task_id,
+            "progress": get_task_progress(metas.get(task_id)) if task_id else None,
+        }
+    return progress
+
+
+def job_channel(job_id):
+    """Name of the Redis channel carrying events for a job"""
+    return f"geodatamart:jobs:{job_id}"
+
+
+def publish_job_event(job_id, event, **data):
+    """Publish a job event to subscribers of the job channel
+
+    Publishing is best effort, and failures are logged rather than raised so
+    that progress reporting never interrupts processing.
+    """
+    payload = json.dumps({"event": event, "job_id": str(job_id), **data})
+    try:
+        get_redis().publish(job_channel(job_id), payload)
+    except RedisError as e:
+        logger.warning(f"Unable to publish {event} event for job {job_id}: {e}")
+
+
+class JobProgressRecorder(ProgressRecorder):
+    """Celery progress recorder which also publishes progress to the job channel"""
+
+    def __init__(self, task, job_id):
+        super().__init__(task)
+        self.job_id = str(job_id)
+
+    def set_progress(self, current, total, description=""):
+        state, meta = super().set_progress(current, total, description=description)
+        publish_job_event(self.job_id, "progress", state=state, **meta)
+        return state, meta
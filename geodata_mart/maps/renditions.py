@@ -0,0 +1,193 @@
+"""Background image processing for catalog images
+
+Uploaded images are resized to their maximum display size, the
+versatileimagefield renditions used by the templates are generated, and a
+WebP copy is written next to the original and each rendition. The work is
+done by a Celery task once the saving transaction commits, and images whose
+content hash has not changed since they were last processed are skipped.
+"""
+import hashlib
+from pathlib import PurePosixPath
+
+from celery import shared_task
+from celery.utils.log import get_task_logger
+from django.apps import apps
+from django.db import transaction
+from PIL import Image
+from versatileimagefield.image_warmer import VersatileImageFieldWarmer
+from versatileimagefield.utils import get_rendition_key_set
+
+from geodata_mart.maps.models import ImageRendition
+
+logger = get_task_logger(__name__)
+
+ICON_SIZE = (600, 600)
+PREVIEW_SIZE = (1200, 1200)
+
+# Maximum stored size of each image field, keyed by model label
+IMAGE_FIELDS = {
+    "maps.Project": {"icon": ICON_SIZE, "preview_image": PREVIEW_SIZE},
+    "maps.DownloadableDataItem": {"icon": ICON_SIZE, "preview_image": PREVIEW_SIZE},
+    "maps.Layer": {"legend_image": ICON_SIZE, "preview_image": PREVIEW_SIZE},
+    "vendors.Vendor": {"logo": ICON_SIZE, "media": PREVIEW_SIZE},
+}
+
+# Rendition key sets (VERSATILEIMAGEFIELD_RENDITION_KEY_SETS) to generate
+RENDITION_KEY_SETS = {"preview_image": "preview_image"}
+
+WEBP_QUALITY = 80
+
+
+def get_webp_name(name):
+    """Name of the WebP copy of an image file"""
+    return str(PurePosixPath(name).with_suffix(".webp"))
+
+
+def get_content_hash(field_file):
+    """SHA-256 hex digest of the stored file content"""
+    digest = hashlib.sha256()
+    with field_file.storage.open(field_file.name, "rb") as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def resize_image(path, max_size):
+    """Reduce an image in place to fit within max_size
+
+    Returns:
+        bool: True if the image was resized
+    """
+    with Image.open(path) as image:
+        if image.size[0] <= max_size[0] and image.size[1] <= max_size[1]:
+            return False
+        image.thumbnail(max_size, resample=Image.Resampling.BICUBIC)
+        image.save(path)
+    return True
+
+
+def write_webp(path):
+    """Write a WebP copy of an image alongside it"""
+    with Image.open(path) as image:
+        if image.mode not in ("RGB", "RGBA"):
+            has_alpha = image.mode in ("LA", "PA") or "transparency" in image.info
+            image = image.convert("RGBA" if has_alpha else "RGB")
+        image.save(get_webp_name(path), "WEBP", quality=WEBP_QUALITY)
+
+
+def get_rendition_names(field_file, key_set):
+    """Storage names of the sized images in a rendition key set"""
+    names = []
+    for _, key in get_rendition_key_set(key_set):
+        sizer, size = key.split("__")
+        names.append(getattr(field_file, sizer)[size].name)
+    return names
+
+
+def render_image_field(instance, field_name, max_size):
+    """Resize an image and generate its renditions if the content changed
+
+    Returns:
+        bool: True if the image was processed
+    """
+    field_file = getattr(instance, field_name)
+    if not field_file or not field_file.storage.exists(field_file.name):
+        return False
+
+    lookup = {
+        "model_label": instance._meta.label,
+        "object_id": str(instance.pk),
+        "field_name": field_name,
+    }
+    content_hash = get_content_hash(field_file)
+    record = ImageRendition.objects.filter(**lookup).first()
+    if record and record.content_hash == content_hash:
+        if record.file_name != field_file.name:
+            record.file_name = field_file.name
+            record.save(update_fields=["file_name", "updated_date"])
+        return False
+
+    storage = field_file.storage
+    if resize_image(storage.path(field_file.name), max_size):
+        content_hash = get_content_hash(field_file)
+    names = [field_file.name]
+
+    key_set = RENDITION_KEY_SETS.get(field_name)
+    if key_set:
+        VersatileImageFieldWarmer(
+            instance_or_queryset=instance,
+            rendition_key_set=key_set,
+            image_attr=field_name,
+        ).warm()
+        names += get_rendition_names(field_file, key_set)
+
+    for name in names:
+        write_webp(storage.path(name))
+
+    ImageRendition.objects.update_or_create(
+        **lookup,
+        defaults={
+            "file_name": field_file.name,
+            "content_hash": content_hash,
+            "webp_names": [get_webp_name(name) for name in names],
+        },
+    )
+    return True
+
+
+@shared_task()
+def render_images(model_label, object_id, field_names):
+    """Process the given image fields of a catalog record"""
+    instance = apps.get_model(model_label).objects.filter(pk=object_id).first()
+    if instance is None:
+        return []
+    fields = IMAGE_FIELDS[model_label]
+    processed = []
+    for field_name in field_names:
+        try:
+            if render_image_field(instance, field_name, fields[field_name]):
+                processed.append(field_name)
+        except (OSError, ValueError) as e:
+            logger.error(f"Unable to process {model_label} {field_name}: {e}")
+    return processed
+
+
+def get_webp_names(instance):
+    """Storage names of the WebP copies written for the images of a record
+
+    Used by the ``webp`` template filter, so that pages offer WebP sources
+    without checking storage for each image.
+    """
+    if instance is None:
+        return set()
+    names = ImageRendition.objects.filter(
+        model_label=instance._meta.label, object_id=str(instance.pk)
+    ).values_list("webp_names", flat=True)
+    return {name for webp_names in names for name in webp_names}
+
+
+def queue_renditions(instance):
+    """Queue processing for image fields that changed since they were processed
+
+    Only the stored file names are compared here so that saves stay cheap,
+    while the worker compares content hashes before doing any image work.
+    """
+    model_label = instance._meta.label
+    current = {
+        field_name: getattr(instance, field_name).name
+        for field_name in IMAGE_FIELDS.get(model_label, {})
+        if getattr(instance, field_name)
+    }
+    if not current:
+        return
+    processed = dict(
+        ImageRendition.objects.filter(
+            model_label=model_label, object_id=str(instance.pk)
+        ).values_list("field_name", "file_name")
+    )
+    changed = [name for name, file in current.items() if processed.get(name) != file]
+    if changed:
+        object_id = instance.pk
+        transaction.on_commit(
+            lambda: render_images.delay(model_label, object_id, changed)
+        )
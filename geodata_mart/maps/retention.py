@@ -0,0 +1,136 @@
+"""Result file retention
+
+Result archives are kept while they are being downloaded and evicted when
+they are least recently used, either beyond the storage budget for results or
+once they have not been downloaded for the maximum age. Jobs and their
+parameters are kept, so an evicted result is regenerated at low priority when
+it is requested again.
+"""
+from datetime import timedelta
+
+from celery import shared_task
+from celery.utils.log import get_task_logger
+from django.conf import settings
+from django.db import transaction
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from geodata_mart.maps.dispatch import dispatch_job
+from geodata_mart.maps.models import ContentBlob, Job, ResultFile
+from geodata_mart.utils.tracing import trace
+
+logger = get_task_logger(__name__)
+
+EVICT_BATCH_SIZE = 100
+
+
+def select_evictions(candidates, budget=None, cutoff=None):
+    """Choose the results to evict from least to most recently used
+
+    Args:
+        candidates (list): (id, last used date, size in bytes) tuples ordered
+            from least to most recently used
+        budget (int): total bytes that may be retained, if limited
+        cutoff (datetime): results last used before this date are evicted
+
+    Returns:
+        list: ids of results to evict
+    """
+    total = sum(size or 0 for _, _, size in candidates)
+    evictions = []
+    for result_id, last_used, size in candidates:
+        over_budget = budget is not None and total > budget
+        expired = cutoff is not None and last_used < cutoff
+        if not over_budget and not expired:
+            # later candidates were used more recently and are within budget
+            break
+        evictions.append(result_id)
+        total -= size or 0
+    return evictions
+
+
+def evict_result(result):
+    """Remove the stored file for a result while keeping the record
+
+    Shared content addressed files are released rather than deleted, and are
+    only removed once no other record refers to them.
+    """
+    name = result.file_object.name if result.file_object else None
+    if name and not ContentBlob.objects.filter(file_object=name).exists():
+        result.file_object.storage.delete(name)
+    result.file_object = None
+    result.evicted_date = timezone.now()
+    result.save()
+
+
+def enforce_retention(budget=None, max_age=None):
+    """Evict least recently used results beyond the budget or maximum age
+
+    Returns:
+        tuple: number of results evicted and bytes freed
+    """
+    cutoff = timezone.now() - max_age if max_age else None
+    candidates = list(
+        ResultFile.objects.filter(evicted_date__isnull=True, file_present=True)
+        .annotate(last_used=Coalesce("last_downloaded_date", "created_date"))
+        .order_by("last_used", "id")
+        .values_list("id", "last_used", "file_size_bytes")
+    )
+    sizes = {result_id: size or 0 for result_id, _, size in candidates}
+    evictions = select_evictions(candidates, budget, cutoff)
+
+    freed = 0
+    for start in range(0, len(evictions), EVICT_BATCH_SIZE):
+        batch = evictions[start : start + EVICT_BATCH_SIZE]
+        for result in ResultFile.objects.filter(pk__in=batch):
+            evict_result(result)
+            freed += sizes[result.pk]
+    return len(evictions), freed
+
+
+def queue_regeneration(result):
+    """Evict a result if needed and queue its job to produce it again
+
+    The new task replaces the finished task of the job, so the job is shown
+    with the progress of the regeneration rather than as having many tasks.
+
+    Returns:
+        bool: whether a new task was queued, False if one is already pending
+    """
+    with transaction.atomic():
+        job = Job.objects.select_for_update().get(pk=result.job_id_id)
+        if result.evicted_date is None:
+            evict_result(result)
+        if job.state in [
+            Job.JobStateChoices.UNSPECIFIED,
+            Job.JobStateChoices.PROCESSING,
+        ]:
+            return False
+        job.state = Job.JobStateChoices.UNSPECIFIED
+        job.save()
+        with trace("regenerate_result", parent=job.trace_parent, result=result.pk):
+            dispatch_job(
+                job,
+                priority=settings.RESULT_REGENERATION_PRIORITY,
+                replace_tasks=True,
+            )
+    return True
+
+
+@shared_task()
+def enforce_result_retention():
+    """Apply the configured result retention policy
+
+    Returns:
+        dict: number of evicted results and bytes freed
+    """
+    budget = settings.RESULT_STORAGE_BUDGET or None
+    max_age = (
+        timedelta(days=settings.RESULT_MAX_AGE_DAYS)
+        if settings.RESULT_MAX_AGE_DAYS
+        else None
+    )
+    evicted, freed = enforce_retention(budget, max_age)
+    if evicted:
+        logger.info(f"Evicted {evicted} results freeing {freed} bytes")
+    return {"evicted": evicted, "freed_bytes": freed}
@@ -1,11 +1,11 @@
+import time
 import uuid
 from config import celery_app
 from celery import shared_task
+from celery.signals import worker_process_init
 from celery.utils.log import get_task_logger
 from celery.exceptions import SoftTimeLimitExceeded
 
-from celery_progress.backend import ProgressRecorder
-
 from PyQt5 import *
 from qgis.core import *
 
@@ -17,8 +17,27 @@ from os.path import join, basename
 from os import environ, stat
 from pathlib import Path
 
+from django.conf import settings
+
+from geodata_mart.maps.control import (
+    CancelWatcher,
+    get_job_output_path,
+    is_cancel_requested,
+)
 from geodata_mart.maps.models import project_storage
 from geodata_mart.maps.models import Job, ResultFile
+from geodata_mart.maps.profiling import start_job_profiler, store_job_profile
+from geodata_mart.maps.progress import JobProgressRecorder
+from geodata_mart.maps.zygote import Zygote
+from geodata_mart.utils.metrics import increment, observe, observe_queue_wait
+from geodata_mart.utils.timing import StageTimer
+from geodata_mart.utils.tracing import TRACEPARENT_HEADER, Span, record_span
+from geodata_mart.maps.catalog import sync_project_layers  # noqa F401 register task
+from geodata_mart.maps.coverage import ingest_project_coverage  # noqa F401
+from geodata_mart.maps.files import verify_managed_files  # noqa F401 register task
+from geodata_mart.maps.maintenance import clean_up_jobs  # noqa F401 register task
+from geodata_mart.maps.renditions import render_images  # noqa F401 register task
+from geodata_mart.maps.retention import enforce_result_retention  # noqa F401
 
 from geodata_mart.utils.qgis import migrateProcessingScripts
 
@@ -27,26 +46,73 @@ logger = get_task_logger(__name__)
 import shutil
 
 
-@shared_task(bind=True, max_retries=3)
-def process_job_gdmclip(self, job_id):
+def record_job_metrics(job, metrics):
+    """Export the duration of a job attempt and its layers to Prometheus"""
+    observe(
+        "job_duration_seconds",
+        metrics["total_seconds"],
+        project=job.project_id.project_name,
+        state=Job.JobStateChoices(job.state).label,
+    )
+    for layer in (metrics.get("algorithm") or {}).get("layers", []):
+        increment(
+            "cache_requests",
+            cache="layer_checkpoint",
+            result="hit" if layer.get("restored") else "miss",
+        )
+        if not layer.get("restored"):
+            observe("layer_clip_seconds", layer["seconds"], layer_type=layer["type"])
 
-    job = Job.objects.filter(job_id=job_id).first()
-    if not job:
-        raise ValueError(f"Processing Job {job_id} not found")
-    else:
-        logger.info(f"Processing Job: {job_id}")
 
-    job.state = job.JobStateChoices.PROCESSING
-    job.save()
+def get_request_header(request, name):
+    """Read a custom message header, which Celery exposes on the request"""
+    return getattr(request, name, None) or (request.headers or {}).get(name)
 
-    progress_recorder = ProgressRecorder(self)
 
-    progress_recorder.set_progress(
-        1, 100, description="Processing started"
-    )  # current, total, description
+def record_algorithm_spans(spans, parent):
+    """Export the spans reported by the clip algorithm
+
+    Child algorithm spans are nested under the span of the layer they ran
+    for, and everything else under the parent span.
+    """
+    layer_spans = {}
+    for span in spans:
+        attributes = span["attributes"]
+        if span["name"] == "clip_layer":
+            layer_spans[attributes["layer"]] = record_span(
+                span["name"], span["start"], span["end"], parent=parent, **attributes
+            )
+    for span in spans:
+        attributes = span["attributes"]
+        if span["name"] != "clip_layer":
+            record_span(
+                span["name"],
+                span["start"],
+                span["end"],
+                parent=layer_spans.get(attributes.get("layer"), parent),
+                **attributes,
+            )
+
+
+def get_retry_countdown(retries):
+    """Exponential backoff in seconds before retrying a clip job"""
+    return min(settings.CLIP_RETRY_DELAY * 2**retries, settings.CLIP_RETRY_MAX_DELAY)
 
+
+class ClipJobError(Exception):
+    """Failure of a clip job attempt that is retried"""
+
+
+def start_qgis(timer=None):
+    """Start a QGIS application with the processing framework and scripts loaded
+
+    Args:
+        timer (StageTimer): optional timer to record start up stages with
+
+    Returns:
+        QgsApplication: the initialised application
+    """
     logger.info(f"Configuring environment")
-    parameters = job.parameters
     environ[
         "QT_QPA_PLATFORM"
     ] = "offscreen"  # https://gis.stackexchange.com/questions/379131/qgis-linux-qt-qpa-plugin-could-not-load-the-qt-platform-plugin-xcb-in-eve
@@ -93,21 +159,8 @@ def process_job_gdmclip(self, job_id):
 
     qgs.setMaxThreads(1)
     qgs.initQgis()
-
-    feedback = QgsProcessingFeedback()
-    context = QgsProcessingContext()
-
-    map_file = job.project_id.qgis_project_file.file_object.path
-    logger.info(f"Processing project file: {map_file}")
-    readflags = QgsProject.ReadFlags()
-    readflags |= (
-        QgsProject.FlagDontResolveLayers
-        | QgsProject.FlagDontLoadLayouts
-        | QgsProject.FlagTrustLayerMetadata
-    )
-    project = QgsProject()
-    project.instance().read(map_file, readflags)
-    context.setProject(project)
+    if timer:
+        timer.lap("qgis_init")
 
     logger.info(f"Updating processing script availability")
     migrateProcessingScripts()
@@ -124,6 +177,61 @@ def process_job_gdmclip(self, job_id):
     processing.core.Processing.Processing.initialize()
     if registry.providerById("script"):
         registry.providerById("script").refreshAlgorithms()
+    if timer:
+        timer.lap("processing_init")
+    return qgs
+
+
+# QGIS started once per worker process for jobs run in forked processes
+qgis_zygote = Zygote(start_qgis)
+
+
+def run_clip_job(task, job, task_span, timer, progress_recorder, qgs=None):
+    """Run the clip algorithm for a job and store its result
+
+    Failures are recorded on the job rather than raised, so that the caller
+    can retry the task whether the job ran in the task process or in a
+    forked process.
+
+    Args:
+        task: the bound clip task
+        job (Job): the job to process
+        task_span (Span): span of the task attempt
+        timer (StageTimer): stage timer of the task attempt
+        progress_recorder (JobProgressRecorder): progress of the task
+        qgs (QgsApplication): a started application to reuse, otherwise
+            QGIS is started for the job and closed afterwards
+
+    Returns:
+        str: the error to retry the task with, or None
+    """
+    job_id = str(job.job_id)
+    retries = task.request.retries
+    profiler = start_job_profiler(job)
+    parameters = job.parameters
+
+    owns_qgs = qgs is None
+    if owns_qgs:
+        qgs = start_qgis(timer)
+    registry = qgs.processingRegistry()
+
+    feedback = QgsProcessingFeedback()
+    context = QgsProcessingContext()
+    cancel_watcher = CancelWatcher(job.job_id, feedback)
+    cancel_watcher.start()
+
+    map_file = job.project_id.qgis_project_file.file_object.path
+    logger.info(f"Processing project file: {map_file}")
+    readflags = QgsProject.ReadFlags()
+    readflags |= (
+        QgsProject.FlagDontResolveLayers
+        | QgsProject.FlagDontLoadLayouts
+        | QgsProject.FlagTrustLayerMetadata
+    )
+    project = QgsProject()
+    project.instance().read(map_file, readflags)
+    context.setProject(project)
+    timer.lap("project_read")
 
     logger.info("Configuring processing parameters")
     output_path = join(project_storage.location, "output", str(job.job_id))
@@ -147,15 +255,18 @@ def process_job_gdmclip(self, job_id):
         if bool(parameters["PROJECT_CRS"])
         else None
     )
-    # TODO validation of single polygon (& test multipolygon) WKT area feature
-    clipping_geometry = parameters["CLIP_GEOM"]
+    # jobs created since server side validation carry their normalised area
+    clipping_geometry = job.aoi.wkt if job.aoi else parameters["CLIP_GEOM"]
 
     logger.info("Executing processing command")
 
     progress_recorder.set_progress(5, 100, description="Environment configured")
+    timer.lap("parameters")
 
+    retry_error = None
+    algorithm = None
     try:
-        script = QgsApplication.processingRegistry().algorithmById("script:gdmclip")
+        script = registry.algorithmById("script:gdmclip")
         params = {
             "PROGRESS_RECORDER": codecs.encode(
                 pickle.dumps(progress_recorder), "base64"
@@ -167,13 +278,17 @@ def process_job_gdmclip(self, job_id):
             "LAYERS": layers_param,
             "EXCLUDES": excludes_param,
             "CLIP_GEOM": clipping_geometry,
+            "TRACEPARENT": task_span.traceparent,
             "OUTPUT_CRS": output_crs_param,
             "PROJECT_CRS": project_crs_param,
             "OUTPUT": output_path,
         }
-        task = script.create()
-        task.prepare(params, context, feedback)
-        result = task.runPrepared(params, context, feedback)
+        algorithm = script.create()
+        algorithm.prepare(params, context, feedback)
+        result = algorithm.runPrepared(params, context, feedback)
+        timer.lap("clip")
+        if feedback.isCanceled():
+            raise QgsProcessingException("Processing was canceled")
 
         logger.info("Create results from task")
         results_file = result["OUTPUT"]
@@ -182,44 +297,183 @@ def process_job_gdmclip(self, job_id):
                 f"Output file {project_storage.path(results_file)} not found"
             )
         logger.info(f"Saving to to result file")
-        results_file_record = ResultFile.objects.create(
-            file_name=job.job_id,
-            job_id=job,
-        )
+        # regenerated results replace the file of the evicted record
+        results_file_record = ResultFile.objects.filter(
+            job_id=job, evicted_date__isnull=False
+        ).first() or ResultFile(file_name=job.job_id, job_id=job)
+        results_file_record.evicted_date = None
         # add results file object to results file record (upload_to=results)
         with project_storage.open(results_file) as f:
-            results_file_record.file_object.save(basename(results_file), f, save=True)
+            results_file_record.store_file(basename(results_file), f)
+        timer.lap("store")
 
         progress_recorder.set_progress(95, 100, description="Results saved")
 
         logger.info(f"Remove artifact")
         statinfo = stat(results_file)  # get stats on the output file
+        observe("result_size_bytes", statinfo.st_size)
 
         with project_storage.open(results_file, "w") as f:
             f.write(
                 str(statinfo)
             )  # replace actual file (now duplicate) with file stats
+        timer.lap("cleanup")
 
         progress_recorder.set_progress(100, 100, description="Task completed")
         job.state = job.JobStateChoices.PROCESSED
         job.save()
 
-    except SoftTimeLimitExceeded:
+    except SoftTimeLimitExceeded as e:
         feedback.cancel()
-        job.state = job.JobStateChoices.UNKNOWN
-        job.save()
+        if retries < task.max_retries:
+            # completed layers are checkpointed, so a retry resumes the clip
+            retry_error = f"Soft time limit exceeded: {e}"
+        else:
+            job.state = job.JobStateChoices.UNKNOWN
+            job.save()
 
     except Exception as e:
-        logger.error(f"Encountered error {e}")
-        job.state = job.JobStateChoices.FAILED
-        job.save()
+        if cancel_watcher.cancelled:
+            logger.info(f"Job {job_id} cancelled, removing partial outputs")
+            shutil.rmtree(get_job_output_path(job), ignore_errors=True)
+            job.state = job.JobStateChoices.ABANDONED
+            job.save()
+        else:
+            logger.error(f"Encountered error {e}")
+            if retries < task.max_retries:
+                retry_error = str(e)
+            else:
+                job.state = job.JobStateChoices.FAILED
+                job.save()
 
     finally:
-        logger.info("Closing QGIS")
-        # manual cleanup to prevent segmentation fault
-        for var in [registry, project, task, feedback, context]:
-            if var in locals():
-                del var
-        qgs.exitQgis()
-        # if auth_config_path:
-        #     shutil.rmtree(auth_config_path)
+        algorithm_metrics = dict(getattr(algorithm, "metrics", None) or {})
+        # spans are exported to the trace rather than stored with the job
+        algorithm_spans = algorithm_metrics.pop("spans", [])
+        metrics = timer.as_dict(
+            attempt=retries + 1, algorithm=algorithm_metrics or None
+        )
+        Job.objects.filter(pk=job.pk).update(metrics=metrics)
+        if profiler:
+            store_job_profile(job, profiler, attempt=retries + 1)
+        logger.info(f"Job {job_id} stage timings: {metrics['stages']}")
+        record_job_metrics(job, metrics)
+        record_algorithm_spans(algorithm_spans, timer.spans.get("clip", task_span))
+        finish_task_span(task_span, job)
+        cancel_watcher.stop()
+        if owns_qgs:
+            logger.info("Closing QGIS")
+            # manual cleanup to prevent segmentation fault
+            for var in [registry, project, algorithm, feedback, context]:
+                if var in locals():
+                    del var
+            qgs.exitQgis()
+            # if auth_config_path:
+            #     shutil.rmtree(auth_config_path)
+    return retry_error
+
+
+def finish_task_span(task_span, job):
+    if job.state != job.JobStateChoices.PROCESSED:
+        task_span.status = "error"
+    task_span.attributes["state"] = Job.JobStateChoices(job.state).label
+    task_span.finish()
+
+
+@shared_task(bind=True, max_retries=3)
+def process_job_gdmclip(self, job_id):
+
+    job = Job.objects.filter(job_id=job_id).first()
+    if not job:
+        raise ValueError(f"Processing Job {job_id} not found")
+    elif job.state == job.JobStateChoices.ABANDONED or is_cancel_requested(job_id):
+        logger.info(f"Skipping cancelled Job: {job_id}")
+        return
+    else:
+        logger.info(f"Processing Job: {job_id}")
+    observe_queue_wait(
+        self.request.id, (self.request.delivery_info or {}).get("priority")
+    )
+    traceparent = (
+        get_request_header(self.request, TRACEPARENT_HEADER) or job.trace_parent
+    )
+    dispatched_at = get_request_header(self.request, "dispatched_at")
+    if dispatched_at and not self.request.retries:
+        record_span("queue_wait", float(dispatched_at), time.time(), parent=traceparent)
+    task_span = Span(
+        "process_job_gdmclip",
+        parent=traceparent,
+        job_id=job_id,
+        task_id=self.request.id,
+        attempt=self.request.retries + 1,
+    )
+
+    job.state = job.JobStateChoices.PROCESSING
+    job.save()
+    timer = StageTimer(span=task_span)
+
+    progress_recorder = JobProgressRecorder(self, job.job_id)
+
+    progress_recorder.set_progress(
+        1, 100, description="Processing started"
+    )  # current, total, description
+
+    if settings.CLIP_EXECUTION_MODE == "zygote":
+        retry_error = run_forked_clip_job(
+            self, job, task_span, timer, progress_recorder
+        )
+    else:
+        retry_error = run_clip_job(self, job, task_span, timer, progress_recorder)
+    if retry_error:
+        raise self.retry(
+            exc=ClipJobError(retry_error),
+            countdown=get_retry_countdown(self.request.retries),
+        )
+
+
+def run_forked_clip_job(task, job, task_span, timer, progress_recorder):
+    """Run a clip job in a process forked from the QGIS zygote
+
+    A crash of the forked process fails the job with diagnostics. The soft
+    time limit is raised in this process, which stops the forked process.
+
+    Returns:
+        str: the error to retry the task with, or None
+    """
+
+    def run(qgs):
+        timer.lap("fork")
+        return run_clip_job(task, job, task_span, timer, progress_recorder, qgs=qgs)
+
+    try:
+        outcome = qgis_zygote.run(run)
+    except SoftTimeLimitExceeded as e:
+        job.refresh_from_db()
+        retry = task.request.retries < task.max_retries
+        if not retry:
+            job.state = job.JobStateChoices.UNKNOWN
+            job.save()
+        finish_task_span(task_span, job)
+        return f"Soft time limit exceeded: {e}" if retry else None
+
+    if outcome.crashed:
+        logger.error(f"Job {job.job_id} crashed: {outcome.describe()}")
+        job.refresh_from_db()
+        job.state = job.JobStateChoices.FAILED
+        job.save()
+        metrics = timer.as_dict(
+            attempt=task.request.retries + 1, crash=outcome.diagnostics()
+        )
+        Job.objects.filter(pk=job.pk).update(metrics=metrics)
+        record_job_metrics(job, metrics)
+        task_span.set_error(outcome.describe())
+        finish_task_span(task_span, job)
+        return None
+    return outcome.result
+
+
+@worker_process_init.connect
+def preload_zygote(**kwargs):
+    """Start QGIS when each worker process starts if jobs run in forks of it"""
+    if settings.CLIP_EXECUTION_MODE == "zygote":
+        qgis_zygote.get()
@@ -3,7 +3,7 @@ from django.template.defaultfilters import stringfilter
 from django.utils.safestring import mark_safe
 from urllib.parse import urlencode
 
-from geodata_mart.maps.models import Job
+from geodata_mart.maps.renditions import get_webp_name
 
 register = template.Library()
 
@@ -14,15 +14,29 @@ def subtract(value, arg):
     return float(value) - float(arg)
 
 
+@register.filter(name="webp")
+def webp(image, webp_names):
+    """Return the url of the WebP copy of an image or rendition if one was written
+
+    Args:
+        webp_names: WebP copies recorded for the record, from get_webp_names
+    """
+    if not image or not getattr(image, "name", None) or not webp_names:
+        return ""
+    webp_name = get_webp_name(image.name)
+    if webp_name not in webp_names:
+        return ""
+    return image.storage.url(webp_name)
+
+
 @register.filter(name="getJobsFirstTask")
-@stringfilter
-def getJobsFirstTask(value):
-    job_id = value
-    job = Job.objects.get(job_id=job_id)
-    if not job:
+def getJobsFirstTask(job):
+    """Return the first task of an already loaded job without a query"""
+    tasks = getattr(job, "tasks", None)
+    if not tasks:
         result = None
     else:
-        result = str(job.tasks[0])
+        result = str(tasks[0])
     return result
 
 
@@ -0,0 +1,66 @@
+from factory import Faker, Sequence, SubFactory
+from factory.django import DjangoModelFactory
+
+from geodata_mart.maps.models import Job, Layer, Project, ResultFile
+from geodata_mart.users.tests.factories import UserFactory
+from geodata_mart.vendors.models import Vendor
+
+
+class VendorFactory(DjangoModelFactory):
+
+    name = Sequence(lambda n: f"vendor-{n}")
+    abstract = Faker("sentence")
+
+    class Meta:
+        model = Vendor
+        django_get_or_create = ["name"]
+
+
+class ProjectFactory(DjangoModelFactory):
+
+    project_name = Sequence(lambda n: f"project-{n}")
+    vendor_id = SubFactory(VendorFactory)
+    description = Faker("paragraph")
+
+    class Meta:
+        model = Project
+
+
+class LayerFactory(DjangoModelFactory):
+
+    short_name = Sequence(lambda n: f"layer_{n}")
+    layer_name = Faker("word")
+    abstract = Faker("sentence")
+    project_id = SubFactory(ProjectFactory)
+    lyr_class = Layer.LayerClass.STANDARD
+
+    class Meta:
+        model = Layer
+
+
+class JobFactory(DjangoModelFactory):
+
+    user_id = SubFactory(UserFactory)
+    project_id = SubFactory(ProjectFactory)
+    state = Job.JobStateChoices.PROCESSED
+    parameters = {
+        "LAYERS": "",
+        "EXCLUDES": "",
+        "CLIP_GEOM": "POLYGON((29.5 -28.0, 29.5 -28.1, 29.6 -28.1, 29.6 -28.0, 29.5 -28.0))",
+        "OUTPUT_CRS": "",
+        "PROJECT_CRS": "",
+    }
+    tasks = []
+
+    class Meta:
+        model = Job
+
+
+class ResultFileFactory(DjangoModelFactory):
+
+    file_name = Sequence(lambda n: f"result-{n}")
+    file_object = Sequence(lambda n: f"results/test/result-{n}.zip")
+    job_id = SubFactory(JobFactory)
+
+    class Meta:
+        model = ResultFile
@@ -0,0 +1,47 @@
+import pytest
+from django.contrib.gis.geos import MultiPolygon, Polygon
+from django.core.exceptions import ValidationError
+
+from geodata_mart.maps.aoi import normalize_aoi
+from geodata_mart.maps.tests.factories import ProjectFactory
+
+pytestmark = pytest.mark.django_db
+
+AOI = "POLYGON((29.5 -28.0, 29.5 -28.1, 29.6 -28.1, 29.6 -28.0, 29.5 -28.0))"
+
+
+class TestNormalizeAoi:
+    def test_measures_geodesic_area(self):
+        aoi = normalize_aoi(ProjectFactory(), AOI)
+        # a tenth of a degree square at 28 degrees south is roughly 109 km²
+        assert aoi.area == pytest.approx(109, rel=0.02)
+        assert aoi.geom.extent == pytest.approx((29.5, -28.1, 29.6, -28.0))
+
+    def test_buffer_expands_envelope(self):
+        aoi = normalize_aoi(ProjectFactory(buffer_max=10), AOI, buffer=5)
+        xmin, ymin, xmax, ymax = aoi.geom.extent
+        assert xmin < 29.5 and ymin < -28.1 and xmax > 29.6 and ymax > -28.0
+        assert aoi.area > 109
+
+    def test_buffer_outside_project_range_rejected(self):
+        with pytest.raises(ValidationError):
+            normalize_aoi(ProjectFactory(buffer_max=10), AOI, buffer=50)
+
+    def test_max_area_rejected(self):
+        with pytest.raises(ValidationError, match="exceeds"):
+            normalize_aoi(ProjectFactory(max_area=50), AOI)
+
+    def test_outside_coverage_rejected(self):
+        coverage = MultiPolygon(
+            Polygon.from_bbox((18.0, -34.0, 19.0, -33.0)), srid=4326
+        )
+        with pytest.raises(ValidationError, match="coverage"):
+            normalize_aoi(ProjectFactory(coverage=coverage), AOI)
+
+    def test_projected_coordinates_rejected(self):
+        with pytest.raises(ValidationError, match="WGS84"):
+            normalize_aoi(
+                ProjectFactory(),
+                "POLYGON((3280000 -3250000, 3280000 -3260000, "
+                "3290000 -3260000, 3290000 -3250000, 3280000 -3250000))",
+            )
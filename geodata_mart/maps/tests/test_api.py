@@ -0,0 +1,136 @@
+import pytest
+from django.contrib.gis.geos import Polygon
+from django.urls import reverse
+
+from geodata_mart.maps.models import Job, Layer
+from geodata_mart.maps.tests.factories import (
+    JobFactory,
+    LayerFactory,
+    ProjectFactory,
+    ResultFileFactory,
+)
+from geodata_mart.users.models import User
+
+pytestmark = pytest.mark.django_db
+
+CLIP_GEOM = "POLYGON((29.5 -28.0, 29.5 -28.1, 29.6 -28.1, 29.6 -28.0, 29.5 -28.0))"
+
+
+@pytest.fixture
+def dispatched(monkeypatch):
+    """Record task submissions instead of sending them to the broker"""
+    dispatched = []
+    monkeypatch.setattr(
+        "geodata_mart.maps.dispatch.process_job_gdmclip.apply_async",
+        lambda args, task_id, **options: dispatched.append((args, task_id)),
+    )
+    monkeypatch.setattr(
+        "geodata_mart.maps.progress.get_tasks_meta",
+        lambda task_ids: {},
+    )
+    return dispatched
+
+
+class TestJobCreate:
+    def test_create_dispatches_on_commit(
+        self, client, user: User, dispatched, django_capture_on_commit_callbacks
+    ):
+        project = ProjectFactory()
+        layers = LayerFactory.create_batch(2, project_id=project)
+        base = LayerFactory(project_id=project, lyr_class=Layer.LayerClass.BASE)
+        client.force_login(user)
+
+        with django_capture_on_commit_callbacks(execute=False) as callbacks:
+            response = client.post(
+                reverse("api:job-list"),
+                {
+                    "project": project.id,
+                    "layers": [layer.id for layer in layers],
+                    "excludes": [base.id],
+                    "clip_geom": CLIP_GEOM,
+                },
+                content_type="application/json",
+            )
+            assert dispatched == []
+
+        assert response.status_code == 201
+        job = Job.objects.get(job_id=response.json()["job_id"])
+        assert job.user_id == user
+        assert job.parameters["LAYERS"] == ",".join(
+            layer.short_name for layer in layers
+        )
+        assert job.parameters["EXCLUDES"] == base.short_name
+        assert set(job.layers.all()) == set(layers)
+
+        for callback in callbacks:
+            callback()
+        assert dispatched == [([str(job.job_id)], job.tasks[0])]
+
+    def test_layer_from_other_project_rejected(self, client, user: User, dispatched):
+        project = ProjectFactory()
+        client.force_login(user)
+        response = client.post(
+            reverse("api:job-list"),
+            {
+                "project": project.id,
+                "layers": [LayerFactory().id],
+                "clip_geom": CLIP_GEOM,
+            },
+            content_type="application/json",
+        )
+        assert response.status_code == 400
+        assert "layers" in response.json()
+        assert not Job.objects.exists()
+
+    def test_layer_outside_clip_area_rejected(self, client, user: User, dispatched):
+        project = ProjectFactory()
+        layer = LayerFactory(
+            project_id=project, bbox=Polygon.from_bbox((18.0, -34.0, 19.0, -33.0))
+        )
+        client.force_login(user)
+        response = client.post(
+            reverse("api:job-list"),
+            {"project": project.id, "layers": [layer.id], "clip_geom": CLIP_GEOM},
+            content_type="application/json",
+        )
+        assert response.status_code == 400
+        assert "layers" in response.json()
+
+    def test_invalid_geometry_rejected(self, client, user: User, dispatched):
+        client.force_login(user)
+        response = client.post(
+            reverse("api:job-list"),
+            {"project": ProjectFactory().id, "clip_geom": "POINT(0 0)"},
+            content_type="application/json",
+        )
+        assert response.status_code == 400
+        assert "clip_geom" in response.json()
+
+
+class TestJobStatus:
+    def test_list_only_own_jobs(self, client, user: User, dispatched):
+        jobs = JobFactory.create_batch(3, user_id=user)
+        JobFactory()
+        client.force_login(user)
+        response = client.get(reverse("api:job-list"))
+
+        assert response.status_code == 200
+        job_ids = [job["job_id"] for job in response.json()["results"]]
+        assert job_ids == [str(job.job_id) for job in reversed(jobs)]
+
+    def test_retrieve(self, client, user: User, dispatched):
+        job = JobFactory(user_id=user)
+        client.force_login(user)
+        response = client.get(reverse("api:job-detail", args=[job.job_id]))
+
+        assert response.status_code == 200
+        assert response.json()["state_label"] == "Processed"
+
+    def test_results(self, client, user: User, dispatched):
+        job = JobFactory(user_id=user)
+        ResultFileFactory.create_batch(2, job_id=job)
+        client.force_login(user)
+        response = client.get(reverse("api:job-results", args=[job.job_id]))
+
+        assert response.status_code == 200
+        assert len(response.json()) == 2
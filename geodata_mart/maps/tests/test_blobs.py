@@ -0,0 +1,91 @@
+import pytest
+from django.core.files.base import ContentFile
+from django.core.files.storage import FileSystemStorage
+
+from geodata_mart.maps.models import ContentBlob, ResultFile
+from geodata_mart.maps.tests.factories import ResultFileFactory
+
+pytestmark = pytest.mark.django_db
+
+CONTENT = b"gpkg" * 1024
+
+
+@pytest.fixture
+def storage(tmp_path, monkeypatch, settings):
+    settings.CONTENT_ADDRESSED_STORAGE = True
+    storage = FileSystemStorage(location=str(tmp_path))
+    for model in (ResultFile, ContentBlob):
+        monkeypatch.setattr(model._meta.get_field("file_object"), "storage", storage)
+    return storage
+
+
+def test_identical_uploads_share_blob(storage):
+    first = ResultFileFactory(file_object=ContentFile(CONTENT, name="first.gpkg"))
+    second = ResultFileFactory(file_object=ContentFile(CONTENT, name="second.gpkg"))
+
+    blob = ContentBlob.objects.get()
+    assert blob.ref_count == 2
+    assert first.file_object.name == second.file_object.name == blob.file_object.name
+    assert blob.file_object.name.endswith(f"{blob.checksum}/first.gpkg")
+    assert ResultFile.objects.get(pk=second.pk).file_checksum == blob.checksum
+
+
+def test_store_file_deduplicates(storage):
+    first = ResultFileFactory(file_object=None)
+    second = ResultFileFactory(file_object=None)
+    first.store_file("result.zip", ContentFile(CONTENT))
+    second.store_file("result.zip", ContentFile(CONTENT))
+    other = ResultFileFactory(file_object=None)
+    other.store_file("result.zip", ContentFile(b"other"))
+
+    assert ContentBlob.objects.count() == 2
+    assert first.file_object.name == second.file_object.name
+    assert other.file_object.name != first.file_object.name
+
+
+def test_blob_removed_with_last_reference(storage, django_capture_on_commit_callbacks):
+    results = [
+        ResultFileFactory(file_object=ContentFile(CONTENT, name="result.gpkg"))
+        for _ in range(2)
+    ]
+    name = results[0].file_object.name
+
+    results[0].delete()
+    assert ContentBlob.objects.get().ref_count == 1
+
+    with django_capture_on_commit_callbacks(execute=True):
+        results[1].delete()
+    assert not ContentBlob.objects.exists()
+    assert not storage.exists(name)
+
+
+def test_disabled_by_default(storage, settings):
+    settings.CONTENT_ADDRESSED_STORAGE = False
+    ResultFileFactory(file_object=ContentFile(CONTENT, name="result.gpkg"))
+    assert not ContentBlob.objects.exists()
+
+
+def test_removing_shared_file_keeps_other_reference(
+    storage, django_capture_on_commit_callbacks
+):
+    first, second = [
+        ResultFileFactory(file_object=ContentFile(CONTENT, name="result.gpkg"))
+        for _ in range(2)
+    ]
+    name = first.file_object.name
+
+    with django_capture_on_commit_callbacks(execute=True):
+        first.remove_file()
+
+    assert ContentBlob.objects.get().ref_count == 1
+    assert storage.exists(name)
+    first = ResultFile.objects.get(pk=first.pk)
+    second = ResultFile.objects.get(pk=second.pk)
+    assert not first.file_object
+    assert second.file_available()
+    assert second.file_object.read() == CONTENT
+
+    with django_capture_on_commit_callbacks(execute=True):
+        second.remove_file()
+    assert not ContentBlob.objects.exists()
+    assert not storage.exists(name)
@@ -0,0 +1,63 @@
+import pytest
+
+from geodata_mart.maps.catalog import upsert_project_layers
+from geodata_mart.maps.models import Layer
+from geodata_mart.maps.tests.factories import LayerFactory, ProjectFactory
+
+pytestmark = pytest.mark.django_db
+
+
+def make_summary(short_name, **kwargs):
+    summary = {
+        "short_name": short_name,
+        "layer_name": short_name.title(),
+        "abstract": "",
+        "kind": "vector",
+        "crs": "EPSG:4326",
+        "bbox": (29.0, -29.0, 30.0, -28.0),
+        "geometry_type": "Polygon",
+        "feature_count": 10,
+        "pixel_count": None,
+        "source_size": 2048,
+    }
+    summary.update(kwargs)
+    return summary
+
+
+class TestUpsertProjectLayers:
+    def test_creates_missing_layers(self):
+        project = ProjectFactory()
+        created, updated = upsert_project_layers(
+            project,
+            [
+                make_summary("roads"),
+                make_summary(
+                    "dem",
+                    kind="raster",
+                    geometry_type=None,
+                    feature_count=None,
+                    pixel_count=100,
+                ),
+            ],
+        )
+        assert (created, updated) == (2, 0)
+        dem = Layer.objects.get(project_id=project, short_name="dem")
+        assert dem.lyr_type == Layer.LayerType.RASTER
+        assert dem.pixel_count == 100
+        assert dem.bbox.extent == pytest.approx((29.0, -29.0, 30.0, -28.0))
+        assert dem.synced_date is not None
+
+    def test_updates_catalog_without_overwriting_curation(self):
+        project = ProjectFactory()
+        layer = LayerFactory(
+            project_id=project, short_name="roads", layer_name="Main Roads"
+        )
+        created, updated = upsert_project_layers(
+            project, [make_summary("roads", feature_count=42, bbox=None)]
+        )
+        assert (created, updated) == (0, 1)
+        layer.refresh_from_db()
+        assert layer.layer_name == "Main Roads"
+        assert layer.feature_count == 42
+        assert layer.bbox is None
+        assert layer.crs == "EPSG:4326"
@@ -0,0 +1,90 @@
+"""Cooperative cancellation of running jobs"""
+import pytest
+from django.urls import reverse
+
+from geodata_mart.maps.control import (
+    CancelWatcher,
+    cancel_key,
+    get_job_output_path,
+    is_cancel_requested,
+)
+from geodata_mart.maps.models import Job, project_storage
+from geodata_mart.maps.tests.factories import JobFactory
+from geodata_mart.users.models import User
+
+pytestmark = pytest.mark.django_db
+
+
+class FakeRedis:
+    def __init__(self):
+        self.keys = {}
+
+    def set(self, key, value, ex=None):
+        self.keys[key] = value
+
+    def exists(self, key):
+        return int(key in self.keys)
+
+
+class FakeFeedback:
+    def __init__(self):
+        self.cancelled = False
+
+    def cancel(self):
+        self.cancelled = True
+
+
+@pytest.fixture
+def fake_redis(monkeypatch):
+    redis = FakeRedis()
+    monkeypatch.setattr("geodata_mart.maps.control.get_redis", lambda: redis)
+    monkeypatch.setattr("geodata_mart.maps.progress.get_redis", lambda: redis)
+    return redis
+
+
+@pytest.fixture
+def revoked(monkeypatch):
+    revoked = []
+    monkeypatch.setattr(
+        "geodata_mart.maps.control.celery_app.control.revoke", revoked.extend
+    )
+    return revoked
+
+
+def test_cancel_flags_job_and_revokes_tasks(
+    client, user: User, fake_redis, revoked, django_capture_on_commit_callbacks
+):
+    job = JobFactory(user_id=user, state=Job.JobStateChoices.PROCESSING, tasks=["a"])
+    client.force_login(user)
+    with django_capture_on_commit_callbacks(execute=True):
+        response = client.post(
+            reverse("maps:cancel_job", kwargs={"job_id": job.job_id})
+        )
+
+    assert response.status_code == 302
+    job.refresh_from_db()
+    assert job.state == Job.JobStateChoices.ABANDONED
+    assert cancel_key(job.job_id) in fake_redis.keys
+    assert revoked == ["a"]
+
+
+def test_watcher_cancels_feedback(fake_redis):
+    job = JobFactory()
+    feedback = FakeFeedback()
+    watcher = CancelWatcher(job.job_id, feedback, interval=0.01)
+    watcher.start()
+    fake_redis.set(cancel_key(job.job_id), 1)
+    watcher.join(timeout=1)
+
+    assert is_cancel_requested(job.job_id)
+    assert watcher.cancelled
+    assert feedback.cancelled
+
+
+def test_job_output_path():
+    job = JobFactory(
+        parameters={"USERID": "user", "VENDORID": "vendor", "PROJECTID": "project"}
+    )
+    assert get_job_output_path(job) == (
+        f"{project_storage.location}/output/user/vendor/project/{job.job_id}"
+    )
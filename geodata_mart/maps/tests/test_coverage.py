@@ -0,0 +1,103 @@
+import json
+
+import pytest
+from django.core.files.base import ContentFile
+from django.core.files.storage import FileSystemStorage
+
+from geodata_mart.maps import coverage as coverage_module
+from geodata_mart.maps.coverage import build_coverage, ingest_project_coverage
+from geodata_mart.maps.models import Project, ProjectCoverageFile
+from geodata_mart.maps.tests.factories import ProjectFactory
+
+pytestmark = pytest.mark.django_db
+
+
+def square(x, y, size=1):
+    return [[[x, y], [x + size, y], [x + size, y + size], [x, y + size], [x, y]]]
+
+
+FEATURES = [
+    {"type": "Polygon", "coordinates": square(0, 0)},
+    {"type": "Polygon", "coordinates": square(0.5, 0)},
+    {"type": "MultiPolygon", "coordinates": [square(5, 5), square(5.5, 5)]},
+    # Invalid polygon with a spike, repaired before the union
+    {
+        "type": "Polygon",
+        "coordinates": [
+            [[10, 0], [11, 0], [11, 1], [11, 2], [11, 1], [10, 1], [10, 0]]
+        ],
+    },
+    {"type": "Point", "coordinates": [20, 20]},
+]
+
+
+def coverage_geojson(features=FEATURES):
+    return json.dumps(
+        {
+            "type": "FeatureCollection",
+            "features": [
+                {"type": "Feature", "properties": {}, "geometry": geometry}
+                for geometry in features
+            ],
+        }
+    ).encode()
+
+
+@pytest.fixture
+def storage(tmp_path, monkeypatch):
+    storage = FileSystemStorage(location=str(tmp_path))
+    field = ProjectCoverageFile._meta.get_field("file_object")
+    monkeypatch.setattr(field, "storage", storage)
+    return storage
+
+
+def test_build_coverage_in_chunks(tmp_path):
+    path = tmp_path / "coverage.geojson"
+    path.write_bytes(coverage_geojson())
+
+    coverage = build_coverage(str(path), chunk_size=2)
+
+    assert coverage.geom_type == "MultiPolygon"
+    assert coverage.valid
+    assert coverage.srid == 4326
+    assert coverage.num_geom == 3
+    assert coverage.extent == (0, 0, 11, 6)
+
+
+def test_coverage_without_polygons(tmp_path):
+    path = tmp_path / "points.geojson"
+    path.write_bytes(coverage_geojson([FEATURES[-1]]))
+
+    with pytest.raises(ValueError):
+        build_coverage(str(path))
+
+
+def test_upload_queues_ingestion(
+    storage, monkeypatch, django_capture_on_commit_callbacks
+):
+    queued = []
+    monkeypatch.setattr(coverage_module.ingest_project_coverage, "delay", queued.append)
+    project = ProjectFactory()
+    with django_capture_on_commit_callbacks(execute=True):
+        coverage_file = ProjectCoverageFile.objects.create(
+            file_name="coverage",
+            project_id=project,
+            file_object=ContentFile(coverage_geojson(), name="coverage.geojson"),
+        )
+    assert queued == [coverage_file.pk]
+    coverage_file.refresh_from_db()
+    assert coverage_file.state == ProjectCoverageFile.CoverageStateChoices.QUEUED
+
+    with django_capture_on_commit_callbacks(execute=True):
+        coverage_file.comment = "Unchanged file"
+        coverage_file.save()
+    assert queued == [coverage_file.pk]
+
+    ingest_project_coverage(coverage_file.pk)
+
+    coverage_file.refresh_from_db()
+    project = Project.objects.get(pk=project.pk)
+    assert coverage_file.state == ProjectCoverageFile.CoverageStateChoices.LOADED
+    assert project.coverage.num_geom == 3
+    assert project.coverage_simplified.num_geom == 3
+    assert project.coverage_extent.extent == (0, 0, 11, 6)
@@ -0,0 +1,71 @@
+import hashlib
+
+import pytest
+from django.core.files.base import ContentFile
+from django.core.files.storage import FileSystemStorage
+
+from geodata_mart.maps.files import verify_queryset
+from geodata_mart.maps.models import ResultFile
+from geodata_mart.maps.tests.factories import ResultFileFactory
+
+pytestmark = pytest.mark.django_db
+
+CONTENT = b"geodata" * 1024
+
+
+@pytest.fixture
+def storage(tmp_path, monkeypatch):
+    storage = FileSystemStorage(location=str(tmp_path))
+    field = ResultFile._meta.get_field("file_object")
+    monkeypatch.setattr(field, "storage", storage)
+    return storage
+
+
+def test_metadata_recorded_on_upload(storage, monkeypatch):
+    result = ResultFileFactory(file_object=ContentFile(CONTENT, name="result.zip"))
+    result = ResultFile.objects.get(pk=result.pk)
+
+    assert result.file_present
+    assert result.file_size_bytes == len(CONTENT)
+    assert result.file_checksum == hashlib.sha256(CONTENT).hexdigest()
+    assert result.file_content_type == "application/zip"
+
+    def no_storage_access(name):
+        raise AssertionError("Storage should not be queried")
+
+    monkeypatch.setattr(storage, "exists", no_storage_access)
+    assert result.file_available()
+    assert result.file_size() == "0.0068 MB"
+
+
+def test_unchanged_save_skips_storage(storage, monkeypatch):
+    result = ResultFileFactory(file_object=ContentFile(CONTENT, name="result.zip"))
+    result = ResultFile.objects.get(pk=result.pk)
+    monkeypatch.setattr(
+        "geodata_mart.maps.files.get_file_metadata",
+        lambda *args: pytest.fail("Metadata should not be read"),
+    )
+    result.comment = "Updated"
+    result.save()
+
+
+def test_verify_reconciles_with_storage(storage):
+    missing, changed, unchanged = [
+        ResultFileFactory(file_object=ContentFile(CONTENT, name=f"result-{n}.zip"))
+        for n in range(3)
+    ]
+    storage.delete(missing.file_object.name)
+    with open(storage.path(changed.file_object.name), "wb") as f:
+        f.write(b"changed")
+
+    assert verify_queryset(ResultFile.objects.all()) == 2
+
+    missing.refresh_from_db()
+    changed.refresh_from_db()
+    unchanged.refresh_from_db()
+    assert missing.file_present is False
+    assert not missing.file_available()
+    assert changed.file_size_bytes == len(b"changed")
+    assert changed.file_checksum == hashlib.sha256(b"changed").hexdigest()
+    assert unchanged.file_present
+    assert unchanged.file_verified_date > unchanged.created_date
@@ -0,0 +1,58 @@
+"""Import budget of the web process
+
+Web workers only dispatch jobs by name, so loading the application and all
+of its URLs, views and admin modules must not import QGIS, PyQt or the
+processing framework, which are only needed by Celery workers.
+"""
+import json
+import os
+import subprocess
+import sys
+
+from django.conf import settings
+
+WORKER_ONLY_PACKAGES = {"qgis", "PyQt5", "processing", "sip"}
+# generous limits, intended to catch heavy imports rather than small growth
+WEB_IMPORT_BUDGET_SECONDS = 10.0
+WEB_RSS_BUDGET_MB = 300
+
+WEB_PROCESS_SCRIPT = """
+import json
+import resource
+import sys
+import time
+
+started = time.perf_counter()
+import config.asgi  # noqa F401
+import config.wsgi  # noqa F401
+from django.urls import get_resolver
+
+get_resolver().url_patterns
+print(json.dumps({
+    "seconds": time.perf_counter() - started,
+    "rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+    "modules": sorted(name for name in sys.modules if name.split(".")[0] in %r),
+}))
+"""
+
+
+def load_web_process():
+    """Load the web application in a fresh interpreter and report its imports"""
+    env = dict(os.environ, DJANGO_SETTINGS_MODULE="config.settings.test")
+    result = subprocess.run(
+        [sys.executable, "-c", WEB_PROCESS_SCRIPT % WORKER_ONLY_PACKAGES],
+        cwd=str(settings.ROOT_DIR),
+        env=env,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def test_web_process_import_budget():
+    loaded = load_web_process()
+
+    assert loaded["modules"] == []
+    assert loaded["seconds"] < WEB_IMPORT_BUDGET_SECONDS
+    assert loaded["rss_mb"] < WEB_RSS_BUDGET_MB
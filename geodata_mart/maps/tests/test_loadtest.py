@@ -0,0 +1,44 @@
+import pytest
+
+from geodata_mart.maps.models import Job
+from geodata_mart.maps.dispatch import dispatch_job
+from geodata_mart.maps.tests.factories import JobFactory
+from geodata_mart.utils.loadtest import Sample, percentile, summarize
+
+
+def test_percentile_interpolates():
+    values = [40, 10, 30, 20]
+    assert percentile(values, 0) == 10
+    assert percentile(values, 0.5) == 25
+    assert percentile(values, 1) == 40
+    assert percentile([], 0.5) is None
+
+
+def test_summarize_by_endpoint():
+    samples = [
+        Sample("map", 200, 0.1, 100, None),
+        Sample("gallery", 200, 0.2, 100, None),
+        Sample("gallery", 500, 0.4, 10, "HTTP 500"),
+    ]
+    summary = summarize(samples, elapsed=2)
+
+    assert list(summary) == ["gallery", "map"]
+    assert summary["gallery"]["requests"] == 2
+    assert summary["gallery"]["errors"] == 1
+    assert summary["gallery"]["throughput"] == 1
+    assert summary["gallery"]["p50_ms"] == pytest.approx(300)
+    assert summary["gallery"]["statuses"] == {"200": 1, "500": 1}
+    assert summary["map"]["bytes"] == 100
+
+
+@pytest.mark.django_db
+def test_stubbed_dispatch_records_task(settings, django_capture_on_commit_callbacks):
+    settings.JOB_DISPATCH_STUB = True
+    job = JobFactory(state=Job.JobStateChoices.UNSPECIFIED)
+
+    with django_capture_on_commit_callbacks() as callbacks:
+        task_id = dispatch_job(job)
+
+    job.refresh_from_db()
+    assert job.tasks == [task_id]
+    assert callbacks == []
@@ -0,0 +1,139 @@
+import os
+from datetime import timedelta
+
+import pytest
+from django.utils import timezone
+
+from geodata_mart.maps.maintenance import (
+    collect_scratch_space,
+    get_live_task_ids,
+    reap_stale_jobs,
+)
+from geodata_mart.maps.models import Job
+from geodata_mart.maps.tests.factories import JobFactory
+
+pytestmark = pytest.mark.django_db
+
+
+def make_idle(job):
+    Job.objects.filter(pk=job.pk).update(
+        updated_date=timezone.now() - timedelta(hours=1)
+    )
+
+
+class TestReapStaleJobs:
+    def test_marks_jobs_without_live_tasks(self, monkeypatch):
+        live = JobFactory(state=Job.JobStateChoices.PROCESSING, tasks=["live"])
+        lost = JobFactory(state=Job.JobStateChoices.PROCESSING, tasks=["lost"])
+        recent = JobFactory(state=Job.JobStateChoices.PROCESSING, tasks=["new"])
+        make_idle(live)
+        make_idle(lost)
+        monkeypatch.setattr(
+            "geodata_mart.maps.maintenance.get_live_task_ids", lambda: {"live"}
+        )
+
+        assert reap_stale_jobs() == 1
+        states = dict(Job.objects.values_list("pk", "state"))
+        assert states[lost.pk] == Job.JobStateChoices.STALE
+        assert states[live.pk] == Job.JobStateChoices.PROCESSING
+        assert states[recent.pk] == Job.JobStateChoices.PROCESSING
+
+    def test_skipped_without_worker_replies(self, monkeypatch):
+        job = JobFactory(state=Job.JobStateChoices.PROCESSING, tasks=["lost"])
+        make_idle(job)
+        monkeypatch.setattr(
+            "geodata_mart.maps.maintenance.get_live_task_ids", lambda: None
+        )
+
+        assert reap_stale_jobs() == 0
+        job.refresh_from_db()
+        assert job.state == Job.JobStateChoices.PROCESSING
+
+
+class FakeInspect:
+    def __init__(self, ping, active, reserved=None, scheduled=None):
+        self.replies = {
+            "ping": ping,
+            "active": active,
+            "reserved": reserved,
+            "scheduled": scheduled,
+        }
+
+    def __getattr__(self, name):
+        return lambda: self.replies[name]
+
+
+class TestGetLiveTaskIds:
+    def use_inspect(self, monkeypatch, inspect):
+        monkeypatch.setattr(
+            "geodata_mart.maps.maintenance.celery_app.control.inspect",
+            lambda timeout: inspect,
+        )
+
+    def test_collects_tasks_from_all_workers(self, monkeypatch):
+        workers = {"a": {"ok": "pong"}, "b": {"ok": "pong"}}
+        self.use_inspect(
+            monkeypatch,
+            FakeInspect(
+                workers,
+                active={"a": [{"id": "1"}], "b": []},
+                reserved={"a": [], "b": [{"id": "2"}]},
+                scheduled={"a": [{"request": {"id": "3"}}], "b": []},
+            ),
+        )
+        assert get_live_task_ids() == {"1", "2", "3"}
+
+    def test_unknown_when_a_worker_is_missing_from_a_reply(self, monkeypatch):
+        workers = {"a": {"ok": "pong"}, "b": {"ok": "pong"}}
+        self.use_inspect(
+            monkeypatch,
+            FakeInspect(
+                workers,
+                active={"a": [{"id": "1"}], "b": []},
+                reserved={"a": []},
+                scheduled={"a": [], "b": []},
+            ),
+        )
+        assert get_live_task_ids() is None
+
+    def test_unknown_when_an_inspect_call_has_no_reply(self, monkeypatch):
+        self.use_inspect(
+            monkeypatch,
+            FakeInspect({"a": {"ok": "pong"}}, active={"a": []}, reserved={"a": []}),
+        )
+        assert get_live_task_ids() is None
+
+
+class TestCollectScratchSpace:
+    def make_scratch(self, root, job_id, size):
+        path = root / "user" / "vendor" / "project" / str(job_id)
+        path.mkdir(parents=True)
+        (path / f"{job_id}.gpkg").write_bytes(b"0" * size)
+        return path
+
+    def test_removes_finished_and_orphaned_directories(self, settings, tmp_path):
+        settings.JOB_SCRATCH_GRACE = 0
+        settings.JOB_SCRATCH_RETENTION = 60 * 60
+        processed = JobFactory(state=Job.JobStateChoices.PROCESSED)
+        processing = JobFactory(state=Job.JobStateChoices.PROCESSING)
+        failed = JobFactory(state=Job.JobStateChoices.FAILED)
+        processed_path = self.make_scratch(tmp_path, processed.job_id, 100)
+        orphan_path = self.make_scratch(tmp_path, "9" * 32, 50)
+        processing_path = self.make_scratch(tmp_path, processing.job_id, 10)
+        failed_path = self.make_scratch(tmp_path, failed.job_id, 10)
+
+        removed, freed = collect_scratch_space(str(tmp_path))
+
+        assert (removed, freed) == (2, 150)
+        assert not processed_path.exists()
+        assert not orphan_path.exists()
+        assert processing_path.exists()
+        assert failed_path.exists()
+
+    def test_keeps_recently_modified_directories(self, settings, tmp_path):
+        settings.JOB_SCRATCH_GRACE = 60 * 60
+        job = JobFactory(state=Job.JobStateChoices.ABANDONED)
+        path = self.make_scratch(tmp_path, job.job_id, 10)
+
+        assert collect_scratch_space(str(tmp_path)) == (0, 0)
+        assert os.path.isdir(path)
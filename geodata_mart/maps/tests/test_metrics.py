@@ -0,0 +1,137 @@
+"""Prometheus metrics accumulated in Redis"""
+import pytest
+from django.urls import reverse
+from redis.exceptions import RedisError
+
+from geodata_mart.users.models import User
+from geodata_mart.utils import metrics
+
+
+class FakePipeline:
+    def __init__(self, redis):
+        self.redis = redis
+        self.calls = []
+
+    def __getattr__(self, name):
+        return lambda *args, **kwargs: self.calls.append((name, args, kwargs))
+
+    def execute(self):
+        return [
+            getattr(self.redis, name)(*args, **kwargs)
+            for name, args, kwargs in self.calls
+        ]
+
+
+class FakeRedis:
+    def __init__(self):
+        self.hashes = {}
+        self.keys = {}
+        self.lists = {}
+
+    def pipeline(self, transaction=True):
+        return FakePipeline(self)
+
+    def hincrby(self, key, field, amount):
+        values = self.hashes.setdefault(key, {})
+        values[field.encode()] = values.get(field.encode(), 0) + amount
+
+    hincrbyfloat = hincrby
+
+    def hgetall(self, key):
+        return self.hashes.get(key, {})
+
+    def set(self, key, value, ex=None):
+        self.keys[key] = str(value).encode()
+
+    def get(self, key):
+        return self.keys.get(key)
+
+    def delete(self, key):
+        return int(self.keys.pop(key, None) is not None)
+
+    def llen(self, key):
+        return self.lists.get(key, 0)
+
+
+@pytest.fixture
+def fake_redis(monkeypatch):
+    redis = FakeRedis()
+    monkeypatch.setattr(metrics, "get_redis", lambda: redis)
+    monkeypatch.setattr(metrics, "get_broker", lambda: redis)
+    return redis
+
+
+def test_histogram_buckets_are_cumulative(fake_redis):
+    metrics.observe("layer_clip_seconds", 3, layer_type="vector")
+    metrics.observe("layer_clip_seconds", 0.2, layer_type="vector")
+
+    output = metrics.render_metrics().decode()
+
+    assert (
+        'geodatamart_layer_clip_seconds_bucket{layer_type="vector",le="0.5"} 1.0'
+        in output
+    )
+    assert (
+        'geodatamart_layer_clip_seconds_bucket{layer_type="vector",le="5.0"} 2.0'
+        in output
+    )
+    assert 'geodatamart_layer_clip_seconds_count{layer_type="vector"} 2.0' in output
+
+
+def test_counters_and_queue_depth(fake_redis):
+    fake_redis.lists["celery"] = 3
+    fake_redis.lists["celery\x06\x169"] = 2
+    metrics.increment("download_bytes", 100, kind="results")
+    metrics.increment("download_bytes", 50, kind="results")
+
+    output = metrics.render_metrics().decode()
+
+    assert 'geodatamart_download_bytes_total{kind="results"} 150.0' in output
+    assert 'geodatamart_queue_depth{priority="0"} 3.0' in output
+    assert 'geodatamart_queue_depth{priority="9"} 2.0' in output
+
+
+def test_queue_wait_is_observed_once(fake_redis):
+    metrics.mark_dispatched("task")
+    metrics.observe_queue_wait("task", 9)
+    metrics.observe_queue_wait("task", 9)
+
+    output = metrics.render_metrics().decode()
+
+    assert 'geodatamart_queue_wait_seconds_count{priority="9"} 1.0' in output
+
+
+@pytest.mark.django_db
+def test_metrics_view_requires_token_or_staff(client, fake_redis, settings):
+    settings.METRICS_TOKEN = "secret"
+    url = reverse("metrics")
+
+    assert client.get(url).status_code == 403
+    assert client.get(url, HTTP_AUTHORIZATION="Bearer secret").status_code == 200
+
+    client.force_login(User.objects.create(username="staff", is_staff=True))
+    assert client.get(url).status_code == 200
+
+
+@pytest.mark.django_db
+def test_metrics_view_survives_redis_outage(client, fake_redis, monkeypatch, settings):
+    def unavailable(*args, **kwargs):
+        raise RedisError("Connection refused")
+
+    monkeypatch.setattr(fake_redis, "hgetall", unavailable)
+    monkeypatch.setattr(fake_redis, "llen", unavailable)
+    settings.METRICS_TOKEN = "secret"
+
+    response = client.get(reverse("metrics"), HTTP_AUTHORIZATION="Bearer secret")
+
+    assert response.status_code == 200
+    assert "# TYPE geodatamart_download_bytes counter" in response.content.decode()
+
+
+@pytest.mark.django_db
+def test_metrics_view_rejects_wrong_token(client, fake_redis, settings):
+    settings.METRICS_TOKEN = "secret"
+    url = reverse("metrics")
+
+    assert client.get(url, HTTP_AUTHORIZATION="Bearer secreT").status_code == 403
+    assert client.get(url, HTTP_AUTHORIZATION="Bearer sécret").status_code == 403
@@ -0,0 +1,81 @@
+"""Sampling profiles of processing jobs"""
+import time
+
+import pytest
+from django.core.files.storage import FileSystemStorage
+
+from geodata_mart.maps.models import JobProfileFile
+from geodata_mart.maps.profiling import (
+    JobProfiler,
+    start_job_profiler,
+    store_job_profile,
+)
+from geodata_mart.maps.tests.factories import JobFactory
+from geodata_mart.utils.profiling import ProcessSampler
+
+pytestmark = pytest.mark.django_db
+
+
+@pytest.fixture
+def storage(tmp_path, monkeypatch):
+    storage = FileSystemStorage(location=str(tmp_path), base_url="/profiles/")
+    monkeypatch.setattr(
+        JobProfileFile._meta.get_field("file_object"), "storage", storage
+    )
+    return storage
+
+
+def busy_wait(seconds):
+    end = time.perf_counter() + seconds
+    while time.perf_counter() < end:
+        pass
+
+
+def test_jobs_are_not_profiled_by_default():
+    assert start_job_profiler(JobFactory()) is None
+
+
+def test_profile_is_attached_to_job(settings, storage):
+    settings.JOB_PROFILING_INTERVAL = 0.001
+    settings.JOB_PROFILING_NATIVE = False
+    job = JobFactory(profile=True)
+
+    profiler = start_job_profiler(job)
+    busy_wait(0.05)
+    first = store_job_profile(job, profiler, attempt=1)
+    second = store_job_profile(job, start_job_profiler(job), attempt=2)
+
+    assert [profile.pk for profile in job.profiles.order_by("version")] == [
+        first.pk,
+        second.pk,
+    ]
+    assert first.attempt == 1 and first.native is False
+    assert first.sample_count > 0
+    with first.file_object.open("r") as f:
+        assert "busy_wait" in f.read()
+
+
+def test_python_profile_is_used_without_py_spy(settings, monkeypatch):
+    settings.JOB_PROFILING_INTERVAL = 0.001
+    monkeypatch.setattr(ProcessSampler, "is_available", lambda executable: False)
+
+    profiler = JobProfiler(native=True).start()
+    busy_wait(0.02)
+    folded, native, samples = profiler.stop()
+
+    assert profiler.process_sampler is None
+    assert native is False
+    assert samples > 0 and "busy_wait" in folded
+
+
+def test_python_profile_is_used_when_py_spy_fails(settings, monkeypatch, tmp_path):
+    settings.JOB_PROFILING_INTERVAL = 0.001
+    settings.JOB_PROFILING_PYSPY = "false"
+    monkeypatch.setattr(ProcessSampler, "is_available", lambda executable: True)
+
+    profiler = JobProfiler(native=True).start()
+    busy_wait(0.02)
+    folded, native, samples = profiler.stop()
+
+    assert native is False
+    assert "busy_wait" in folded
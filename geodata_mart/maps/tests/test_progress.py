@@ -0,0 +1,161 @@
+"""Job progress events published to the per-job Redis channel"""
+import asyncio
+import json
+
+import pytest
+from asgiref.sync import async_to_sync
+from django.conf import settings
+
+from config.sse import sse_application
+from geodata_mart.maps.progress import job_channel
+from geodata_mart.maps.tests.factories import JobFactory
+
+pytestmark = pytest.mark.django_db
+
+
+class FakeRedis:
+    def __init__(self):
+        self.published = []
+
+    def publish(self, channel, message):
+        self.published.append((channel, json.loads(message)))
+
+
+@pytest.fixture
+def fake_redis(monkeypatch):
+    redis = FakeRedis()
+    monkeypatch.setattr("geodata_mart.maps.progress.get_redis", lambda: redis)
+    return redis
+
+
+def test_job_state_published_on_commit(fake_redis, django_capture_on_commit_callbacks):
+    with django_capture_on_commit_callbacks(execute=True):
+        job = JobFactory(state=6)
+
+    assert fake_redis.published == [
+        (
+            job_channel(job.job_id),
+            {"event": "state", "job_id": str(job.job_id), "state": 6},
+        )
+    ]
+
+
+def test_job_state_not_published_without_commit(fake_redis):
+    JobFactory(state=6)
+    assert fake_redis.published == []
+
+
+class FakePubSub:
+    def __init__(self, messages):
+        self.messages = [
+            {"type": "message", "data": json.dumps(message)} for message in messages
+        ]
+        self.channels = []
+
+    async def subscribe(self, channel):
+        self.channels.append(channel)
+        self.messages.insert(0, {"type": "subscribe", "data": 1})
+
+    async def get_message(self, ignore_subscribe_messages=False, timeout=None):
+        message = self.messages.pop(0)
+        if ignore_subscribe_messages and message["type"] == "subscribe":
+            return None
+        return message
+
+    async def unsubscribe(self):
+        pass
+
+    async def close(self):
+        pass
+
+
+class FakeAsyncRedis:
+    def __init__(self, messages):
+        self.pubsub_instance = FakePubSub(messages)
+
+    def pubsub(self):
+        return self.pubsub_instance
+
+    async def close(self):
+        pass
+
+
+def stream_job_events(client, job, redis, monkeypatch):
+    """Run the job event stream and return the decoded events it sent"""
+    monkeypatch.setattr("config.sse.get_async_redis", lambda: redis)
+    monkeypatch.setattr("config.sse.increment", lambda *args: None)
+    client.force_login(job.user_id)
+    cookie = client.cookies[settings.SESSION_COOKIE_NAME]
+    scope = {
+        "type": "http",
+        "method": "GET",
+        "path": f"/events/jobs/{job.job_id}/",
+        "headers": [(b"cookie", f"{cookie.key}={cookie.value}".encode())],
+    }
+    sent = []
+
+    async def receive():
+        await asyncio.Event().wait()
+
+    async def send(message):
+        sent.append(message)
+
+    async_to_sync(sse_application)(scope, receive, send)
+    events = []
+    for message in sent:
+        for block in message.get("body", b"").decode().split("\n\n"):
+            if block.startswith("event: "):
+                event, data = block.split("\n")
+                events.append((event[7:], json.loads(data[6:])))
+    return events
+
+
+@pytest.mark.django_db(transaction=True)
+def test_queued_job_keeps_streaming_until_terminal_state(client, monkeypatch):
+    job = JobFactory(state=0, tasks=["00000000-0000-0000-0000-000000000000"])
+    messages = [
+        {"event": "state", "job_id": str(job.job_id), "state": 6},
+        {"event": "state", "job_id": str(job.job_id), "state": 3},
+    ]
+    monkeypatch.setattr(
+        "config.sse.get_jobs_progress",
+        lambda rows: {
+            str(row["job_id"]): {"state": row["state"], "progress": None}
+            for row in rows
+        },
+    )
+
+    events = stream_job_events(client, job, FakeAsyncRedis(messages), monkeypatch)
+
+    assert [(event, data["state"], data["terminal"]) for event, data in events] == [
+        ("snapshot", 0, False),
+        ("state", 6, False),
+        ("state", 3, True),
+    ]
+
+
+@pytest.mark.django_db(transaction=True)
+def test_event_published_while_reading_snapshot_is_relayed(client, monkeypatch):
+    job = JobFactory(state=6, tasks=["00000000-0000-0000-0000-000000000000"])
+    redis = FakeAsyncRedis([])
+
+    def get_jobs_progress(rows):
+        # the job finishes after subscribing, while the snapshot is read
+        redis.pubsub_instance.messages.append(
+            {
+                "type": "message",
+                "data": json.dumps(
+                    {"event": "state", "job_id": str(job.job_id), "state": 3}
+                ),
+            }
+        )
+        return {str(row["job_id"]): {"state": 6, "progress": None} for row in rows}
+
+    monkeypatch.setattr("config.sse.get_jobs_progress", get_jobs_progress)
+
+    events = stream_job_events(client, job, redis, monkeypatch)
+
+    assert [(event, data["state"]) for event, data in events] == [
+        ("snapshot", 6),
+        ("state", 3),
+    ]
@@ -0,0 +1,79 @@
+import pytest
+from PIL import Image
+
+from geodata_mart.maps import renditions
+from geodata_mart.maps.models import ImageRendition
+from geodata_mart.maps.templatetags.maps_extras import webp
+from geodata_mart.maps.tests.factories import ProjectFactory
+
+pytestmark = pytest.mark.django_db
+
+
+@pytest.fixture
+def queued(monkeypatch):
+    """Record queued rendition tasks instead of sending them"""
+    queued = []
+    monkeypatch.setattr(
+        renditions.render_images, "delay", lambda *args: queued.append(args)
+    )
+    return queued
+
+
+def test_resize_image(tmp_path):
+    path = tmp_path / "large.png"
+    Image.new("RGB", (2400, 1200)).save(path)
+
+    assert renditions.resize_image(path, (1200, 1200))
+    assert Image.open(path).size == (1200, 600)
+    assert not renditions.resize_image(path, (1200, 1200))
+
+
+def test_write_webp(tmp_path):
+    path = tmp_path / "legend.png"
+    Image.new("P", (10, 10)).save(path)
+
+    renditions.write_webp(str(path))
+    assert Image.open(tmp_path / "legend.webp").format == "WEBP"
+
+
+def test_changed_images_queued_on_commit(queued, django_capture_on_commit_callbacks):
+    with django_capture_on_commit_callbacks(execute=True):
+        project = ProjectFactory(icon="projects/icon.png")
+    assert queued == [("maps.Project", project.pk, ["icon"])]
+
+    ImageRendition.objects.create(
+        model_label="maps.Project",
+        object_id=str(project.pk),
+        field_name="icon",
+        file_name="projects/icon.png",
+        content_hash="0" * 64,
+    )
+    with django_capture_on_commit_callbacks(execute=True):
+        project.description = "Updated"
+        project.save()
+        project.preview_image = "projects/preview.png"
+        project.save()
+    assert queued[1:] == [("maps.Project", project.pk, ["preview_image"])]
+
+
+def test_webp_filter_reads_recorded_copies(monkeypatch):
+    project = ProjectFactory(icon="projects/icon.png")
+    ImageRendition.objects.create(
+        model_label="maps.Project",
+        object_id=str(project.pk),
+        field_name="icon",
+        file_name="projects/icon.png",
+        content_hash="0" * 64,
+        webp_names=["projects/icon.webp"],
+    )
+    monkeypatch.setattr(
+        project.icon.storage,
+        "exists",
+        lambda name: pytest.fail("webp filter checked storage"),
+    )
+
+    webp_names = renditions.get_webp_names(project)
+    assert webp(project.icon, webp_names) == project.icon.storage.url(
+        "projects/icon.webp"
+    )
+    assert webp(project.icon, set()) == ""
@@ -0,0 +1,142 @@
+from datetime import timedelta
+
+import pytest
+from django.core.files.base import ContentFile
+from django.core.files.storage import FileSystemStorage
+from django.urls import reverse
+from django.utils import timezone
+
+from geodata_mart.maps.models import Job, ResultFile
+from geodata_mart.maps.retention import enforce_retention, select_evictions
+from geodata_mart.maps.tests.factories import JobFactory, ResultFileFactory
+from geodata_mart.users.models import User
+
+pytestmark = pytest.mark.django_db
+
+
+@pytest.fixture
+def storage(tmp_path, monkeypatch):
+    storage = FileSystemStorage(location=str(tmp_path), base_url="/results/")
+    monkeypatch.setattr(ResultFile._meta.get_field("file_object"), "storage", storage)
+    return storage
+
+
+@pytest.fixture
+def dispatched(monkeypatch):
+    dispatched = []
+    monkeypatch.setattr(
+        "geodata_mart.maps.dispatch.process_job_gdmclip.apply_async",
+        lambda args, task_id, **options: dispatched.append(
+            (args, task_id, options.get("priority"))
+        ),
+    )
+    return dispatched
+
+
+def make_result(days_ago, size=10, **kwargs):
+    result = ResultFileFactory(
+        file_object=ContentFile(b"0" * size, name="result.zip"), **kwargs
+    )
+    ResultFile.objects.filter(pk=result.pk).update(
+        last_downloaded_date=timezone.now() - timedelta(days=days_ago)
+    )
+    return result
+
+
+class TestSelectEvictions:
+    def test_least_recently_used_beyond_budget(self):
+        now = timezone.now()
+        candidates = [(1, now, 10), (2, now, 10), (3, now, 10)]
+        assert select_evictions(candidates, budget=15) == [1, 2]
+
+    def test_expired(self):
+        now = timezone.now()
+        candidates = [(1, now - timedelta(days=2), 10), (2, now, 10)]
+        assert select_evictions(candidates, cutoff=now - timedelta(days=1)) == [1]
+
+    def test_nothing_to_evict(self):
+        assert select_evictions([(1, timezone.now(), 10)], budget=100) == []
+
+
+class TestEnforceRetention:
+    def test_evicts_oldest_results_over_budget(self, storage):
+        oldest = make_result(days_ago=3)
+        older = make_result(days_ago=2)
+        recent = make_result(days_ago=1)
+        stored_name = oldest.file_object.name
+
+        assert enforce_retention(budget=15) == (2, 20)
+
+        oldest.refresh_from_db()
+        assert oldest.evicted_date is not None
+        assert not oldest.file_object
+        assert oldest.file_present is False
+        assert not storage.exists(stored_name)
+        assert ResultFile.objects.get(pk=older.pk).evicted_date is not None
+        assert ResultFile.objects.get(pk=recent.pk).evicted_date is None
+
+
+class TestDownloadResult:
+    def test_download_recorded(self, client, user: User, storage):
+        result = make_result(days_ago=5, job_id=JobFactory(user_id=user))
+        client.force_login(user)
+        response = client.get(reverse("maps:download_result", args=[result.id]))
+
+        assert response.status_code == 302
+        assert response.url == result.file_object.url
+        result.refresh_from_db()
+        assert result.last_downloaded_date > timezone.now() - timedelta(minutes=1)
+
+    def test_evicted_result_regenerated(
+        self,
+        client,
+        user: User,
+        storage,
+        dispatched,
+        django_capture_on_commit_callbacks,
+    ):
+        job = JobFactory(user_id=user, tasks=["00000000-0000-0000-0000-000000000000"])
+        result = make_result(days_ago=5, job_id=job)
+        enforce_retention(budget=0)
+        client.force_login(user)
+        with django_capture_on_commit_callbacks(execute=True):
+            response = client.get(reverse("maps:download_result", args=[result.id]))
+            # a second request while queued does not queue again
+            client.get(reverse("maps:download_result", args=[result.id]))
+
+        assert response.status_code == 302
+        assert response.url == reverse("maps:job", kwargs={"job_id": job.job_id})
+        job.refresh_from_db()
+        assert job.state == Job.JobStateChoices.UNSPECIFIED
+        assert len(dispatched) == 1
+        args, task_id, priority = dispatched[0]
+        assert (args, priority) == ([str(job.job_id)], 9)
+        # the regeneration task replaces the finished task of the job
+        assert job.tasks == [task_id]
+
+    def test_other_users_results_hidden(self, client, user: User, storage):
+        result = make_result(days_ago=1)
+        client.force_login(user)
+        response = client.get(reverse("maps:download_result", args=[result.id]))
+        assert response.status_code == 404
+
+    def test_checkout_refused_while_regeneration_queued(
+        self,
+        client,
+        user: User,
+        storage,
+        dispatched,
+        django_capture_on_commit_callbacks,
+    ):
+        job = JobFactory(user_id=user, tasks=["00000000-0000-0000-0000-000000000000"])
+        result = make_result(days_ago=5, job_id=job)
+        enforce_retention(budget=0)
+        client.force_login(user)
+        checkout_url = reverse("maps:checkout", kwargs={"job_id": job.job_id})
+        with django_capture_on_commit_callbacks(execute=True):
+            client.get(reverse("maps:download_result", args=[result.id]))
+            response = client.post(checkout_url)
+
+        assert response.status_code == 302
+        assert len(dispatched) == 1
+        assert client.get(checkout_url).status_code == 302
@@ -0,0 +1,55 @@
+import pytest
+from django.contrib.admin import site
+
+from geodata_mart.maps.admin import JobAdmin
+from geodata_mart.maps.models import Job
+from geodata_mart.maps.tests.factories import JobFactory
+from geodata_mart.utils.timing import StageTimer, get_slowest_layers
+
+METRICS = {
+    "stages": {"qgis_init": 1.5, "clip": 12.0},
+    "total_seconds": 14.0,
+    "algorithm": {
+        "stages": {"layers": 11.0},
+        "layers": [
+            {"name": "roads", "seconds": 2.0, "features_in": 10, "features_out": 4},
+            {"name": "rivers", "seconds": 9.0, "features_in": 50, "features_out": 8},
+        ],
+    },
+}
+
+
+def test_stage_timer_accumulates_repeated_stages():
+    timer = StageTimer()
+    timer.record("layer", 1.0)
+    timer.record("layer", 0.5)
+    with timer.stage("zip"):
+        pass
+    timer.lap("total")
+
+    metrics = timer.as_dict(attempt=1)
+
+    assert metrics["stages"]["layer"] == 1.5
+    assert list(metrics["stages"]) == ["layer", "zip", "total"]
+    assert metrics["attempt"] == 1
+    assert metrics["total_seconds"] >= 0
+
+
+def test_slowest_layers_are_ordered_by_duration():
+    assert [layer["name"] for layer in get_slowest_layers(METRICS)] == [
+        "rivers",
+        "roads",
+    ]
+    assert get_slowest_layers(None) == []
+
+
+@pytest.mark.django_db
+def test_job_admin_shows_metrics():
+    job = JobFactory(metrics=METRICS)
+    job_admin = JobAdmin(Job, site)
+
+    assert job_admin.processing_seconds(job) == 14.0
+    assert "algorithm: layers" in job_admin.stage_timings(job)
+    slowest = job_admin.slowest_layers(job)
+    assert slowest.index("rivers") < slowest.index("roads")
+    assert job_admin.stage_timings(JobFactory()) == "-"
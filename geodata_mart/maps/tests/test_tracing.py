@@ -0,0 +1,123 @@
+"""Trace context propagation from submission to processing"""
+import pytest
+
+from geodata_mart.maps.dispatch import dispatch_job
+from geodata_mart.maps.tasks import record_algorithm_spans
+from geodata_mart.maps.tests.factories import JobFactory
+from geodata_mart.utils import tracing
+from geodata_mart.utils.tracing import Span, parse_traceparent, trace
+
+
+class ListExporter:
+    def __init__(self):
+        self.spans = []
+
+    def export(self, span):
+        self.spans.append(span)
+
+
+@pytest.fixture
+def exporter(monkeypatch):
+    exporter = ListExporter()
+    monkeypatch.setattr(tracing, "get_exporter", lambda: exporter)
+    return exporter
+
+
+def test_parse_traceparent():
+    trace_id, span_id = "4bf92f3577b34da6a3ce929d0e0e4736", "00f067aa0ba902b7"
+    assert parse_traceparent(f"00-{trace_id}-{span_id}-01") == (trace_id, span_id)
+    assert (
+        parse_traceparent("00-00000000000000000000000000000000-00f067aa0ba902b7-01")
+        is None
+    )
+    assert parse_traceparent("invalid") is None
+    assert parse_traceparent(None) is None
+
+
+def test_nested_spans_share_trace(exporter):
+    with trace("checkout") as parent:
+        with trace("dispatch") as child:
+            pass
+
+    assert [span.name for span in exporter.spans] == ["dispatch", "checkout"]
+    assert child.trace_id == parent.trace_id
+    assert child.parent_id == parent.span_id
+    assert parent.parent_id is None
+
+
+def test_remote_parent_continues_trace(exporter):
+    remote = Span("create_job")
+    with trace("process", parent=remote.traceparent) as span:
+        pass
+
+    assert span.trace_id == remote.trace_id
+    assert span.parent_id == remote.span_id
+
+
+def test_failed_span_records_error(exporter):
+    with pytest.raises(ValueError):
+        with trace("checkout"):
+            raise ValueError("boom")
+
+    assert exporter.spans[0].status == "error"
+
+
+def test_file_exporter_appends_json_lines(tmp_path):
+    exporter = tracing.FileExporter(str(tmp_path / "traces.jsonl"))
+    span = Span("clip")
+    span.end = span.start + 1
+    exporter.export(span)
+    exporter.export(span)
+
+    lines = (tmp_path / "traces.jsonl").read_text().splitlines()
+    assert len(lines) == 2
+    assert '"name": "clip"' in lines[0]
+
+
+def test_algorithm_spans_nest_under_layers(exporter):
+    parent = Span("clip")
+    record_algorithm_spans(
+        [
+            {
+                "name": "native:clip",
+                "start": 1,
+                "end": 2,
+                "attributes": {"layer": "roads"},
+            },
+            {
+                "name": "clip_layer",
+                "start": 1,
+                "end": 3,
+                "attributes": {"layer": "roads"},
+            },
+            {"name": "zip", "start": 3, "end": 4, "attributes": {}},
+        ],
+        parent,
+    )
+
+    spans = {span.name: span for span in exporter.spans}
+    assert spans["clip_layer"].parent_id == parent.span_id
+    assert spans["native:clip"].parent_id == spans["clip_layer"].span_id
+    assert spans["zip"].parent_id == parent.span_id
+
+
+@pytest.mark.django_db
+def test_dispatch_sends_trace_context(
+    monkeypatch, exporter, django_capture_on_commit_callbacks
+):
+    sent = []
+    monkeypatch.setattr(
+        "geodata_mart.maps.dispatch.process_job_gdmclip.apply_async",
+        lambda args, task_id, headers, **options: sent.append(headers),
+    )
+    monkeypatch.setattr(
+        "geodata_mart.maps.dispatch.mark_dispatched", lambda task_id: None
+    )
+    job = JobFactory(trace_parent=Span("create_job").traceparent)
+
+    with django_capture_on_commit_callbacks(execute=True):
+        with trace("checkout", parent=job.trace_parent) as span:
+            dispatch_job(job)
+
+    assert sent[0]["traceparent"] == span.traceparent
+    assert "dispatched_at" in sent[0]
@@ -0,0 +1,144 @@
+"""
+Query budgets for catalog and job views.
+
+Each view is rendered against a catalog that is large enough to expose
+N+1 query patterns, so that a regression in eager loading or database
+side filtering fails the test suite rather than a production page.
+"""
+import pytest
+from django.urls import reverse
+
+from geodata_mart.maps.models import Layer
+from geodata_mart.maps.tests.factories import (
+    JobFactory,
+    LayerFactory,
+    ProjectFactory,
+    ResultFileFactory,
+)
+from geodata_mart.users.models import User
+
+pytestmark = pytest.mark.django_db
+
+# Maximum number of SQL queries per view, including session, user, and
+# savepoint queries issued by the request cycle itself.
+MAP_QUERY_BUDGET = 12
+PROJECT_DETAIL_QUERY_BUDGET = 10
+JOB_QUERY_BUDGET = 10
+RESULTS_QUERY_BUDGET = 10
+
+
+@pytest.fixture
+def project():
+    project = ProjectFactory()
+    LayerFactory.create_batch(20, project_id=project)
+    LayerFactory.create_batch(3, project_id=project, lyr_class=Layer.LayerClass.BASE)
+    LayerFactory.create_batch(3, project_id=project, lyr_class=Layer.LayerClass.EXCLUDE)
+    return project
+
+
+class TestCatalogQueryBudget:
+    def test_map(self, client, user: User, project, django_assert_max_num_queries):
+        client.force_login(user)
+        url = reverse("maps:map", kwargs={"project_id": project.id})
+        with django_assert_max_num_queries(MAP_QUERY_BUDGET):
+            response = client.get(url)
+        assert response.status_code == 200
+        assert len(response.context["map_layers"]) == 20
+        assert len(response.context["base_layers"]) == 3
+        assert len(response.context["excluded_layers"]) == 3
+
+    def test_project_detail(
+        self, client, user: User, project, django_assert_max_num_queries
+    ):
+        client.force_login(user)
+        url = reverse("maps:project-detail", kwargs={"project_id": project.id})
+        with django_assert_max_num_queries(PROJECT_DETAIL_QUERY_BUDGET):
+            response = client.get(url)
+        assert response.status_code == 200
+
+
+class TestJobQueryBudget:
+    def test_job(self, client, user: User, django_assert_max_num_queries):
+        job = JobFactory(user_id=user)
+        ResultFileFactory.create_batch(3, job_id=job)
+        client.force_login(user)
+        url = reverse("maps:job", kwargs={"job_id": job.job_id})
+        with django_assert_max_num_queries(JOB_QUERY_BUDGET):
+            response = client.get(url)
+        assert response.status_code == 200
+
+    def test_results(self, client, user: User, django_assert_max_num_queries):
+        for job in JobFactory.create_batch(25, user_id=user):
+            ResultFileFactory(job_id=job)
+        client.force_login(user)
+        url = reverse("maps:results")
+        with django_assert_max_num_queries(RESULTS_QUERY_BUDGET):
+            response = client.get(url)
+        assert response.status_code == 200
+
+
+class TestResultsPagination:
+    def test_keyset_pages(self, client, user: User):
+        JobFactory.create_batch(5, user_id=user)
+        client.force_login(user)
+        url = reverse("maps:results")
+
+        first_page = client.get(url, data={"items": 2})
+        assert len(first_page.context["jobs"]) == 2
+        assert first_page.context["previous_cursor"] is None
+        assert first_page.context["next_cursor"]
+
+        second_page = client.get(
+            url, data={"items": 2, "before": first_page.context["next_cursor"]}
+        )
+        assert len(second_page.context["jobs"]) == 2
+        assert second_page.context["previous_cursor"]
+        seen = {job.pk for job in first_page.context["jobs"]}
+        assert not seen & {job.pk for job in second_page.context["jobs"]}
+
+        newer_page = client.get(
+            url, data={"items": 2, "after": second_page.context["previous_cursor"]}
+        )
+        assert [job.pk for job in newer_page.context["jobs"]] == [
+            job.pk for job in first_page.context["jobs"]
+        ]
+
+    def test_result_counts(self, client, user: User):
+        job = JobFactory(user_id=user)
+        ResultFileFactory.create_batch(2, job_id=job)
+        client.force_login(user)
+        response = client.get(reverse("maps:results"))
+        assert response.context["jobs"][0].result_count == 2
+
+
+class TestJobsStatus:
+    def test_batched_status(self, client, user: User, monkeypatch):
+        jobs = JobFactory.create_batch(3, user_id=user, tasks=["a-task"])
+        other_job = JobFactory(tasks=["b-task"])
+        requested = []
+
+        def fake_tasks_meta(task_ids):
+            task_ids = list(task_ids)
+            requested.append(task_ids)
+            return {
+                task_id: {"status": "PROGRESS", "result": {"percent": 50}}
+                for task_id in task_ids
+            }
+
+        monkeypatch.setattr(
+            "geodata_mart.maps.progress.get_tasks_meta", fake_tasks_meta
+        )
+        client.force_login(user)
+        job_ids = [str(job.job_id) for job in jobs + [other_job]]
+        response = client.get(reverse("maps:jobs_status"), {"jobs": ",".join(job_ids)})
+
+        assert response.status_code == 200
+        data = response.json()["jobs"]
+        assert set(data) == {str(job.job_id) for job in jobs}
+        assert data[str(jobs[0].job_id)]["progress"]["percent"] == 50
+        assert len(requested) == 1
+
+    def test_invalid_job_id(self, client, user: User):
+        client.force_login(user)
+        response = client.get(reverse("maps:jobs_status"), {"jobs": "not-a-uuid"})
+        assert response.status_code == 400
@@ -0,0 +1,86 @@
+"""Processing jobs in processes forked from a preloaded zygote"""
+import os
+import signal
+from types import SimpleNamespace
+
+import pytest
+
+from geodata_mart.maps.models import Job
+from geodata_mart.maps.tests.factories import JobFactory
+from geodata_mart.maps.zygote import ForkOutcome, Zygote, run_forked
+from geodata_mart.utils.timing import StageTimer
+from geodata_mart.utils.tracing import Span
+
+
+def crash():
+    os.kill(os.getpid(), signal.SIGSEGV)
+
+
+def fail():
+    raise ValueError("Layer could not be read")
+
+
+def test_result_is_returned_from_fork():
+    outcome = run_forked(lambda value: {"pid": os.getpid(), "value": value}, 42)
+
+    assert not outcome.crashed
+    assert outcome.result["value"] == 42
+    assert outcome.result["pid"] not in (os.getpid(), None)
+
+
+def test_exception_in_fork_is_reported():
+    outcome = run_forked(fail)
+
+    assert outcome.crashed
+    assert outcome.exit_code == 1
+    assert "ValueError: Layer could not be read" in outcome.describe()
+    assert "fail" in outcome.diagnostics()["traceback"]
+
+
+def test_fatal_signal_in_fork_is_reported_with_traceback():
+    outcome = run_forked(crash)
+
+    diagnostics = outcome.diagnostics()
+    assert outcome.crashed
+    assert diagnostics["signal"] == "SIGSEGV"
+    assert "Segmentation fault" in diagnostics["traceback"]
+    assert "crash" in diagnostics["traceback"]
+
+
+def test_zygote_state_is_loaded_once_per_process():
+    loads = []
+    zygote = Zygote(lambda: loads.append(os.getpid()) or {"loaded_by": os.getpid()})
+
+    first = zygote.run(lambda state: state["loaded_by"] == os.getppid())
+    second = zygote.run(lambda state: state["loaded_by"])
+
+    assert first.result is True
+    assert second.result == os.getpid()
+    assert loads == [os.getpid()]
+
+
+@pytest.mark.django_db
+def test_crashed_job_fails_with_diagnostics(monkeypatch):
+    from geodata_mart.maps import tasks
+
+    job = JobFactory(state=Job.JobStateChoices.PROCESSING)
+    outcome = ForkOutcome(
+        pid=1234,
+        status=signal.SIGSEGV,
+        payload=None,
+        crash_log="Fatal Python error: Segmentation fault",
+        seconds=2.5,
+    )
+    monkeypatch.setattr(tasks.qgis_zygote, "run", lambda function: outcome)
+    monkeypatch.setattr(tasks, "record_job_metrics", lambda job, metrics: None)
+    task = SimpleNamespace(request=SimpleNamespace(retries=0), max_retries=3)
+    span = Span("process_job_gdmclip")
+
+    retry_error = tasks.run_forked_clip_job(task, job, span, StageTimer(), None)
+
+    job.refresh_from_db()
+    assert retry_error is None
+    assert job.state == Job.JobStateChoices.FAILED
+    assert job.metrics["crash"]["signal"] == "SIGSEGV"
+    assert "Segmentation fault" in job.metrics["crash"]["traceback"]
+    assert span.status == "error"
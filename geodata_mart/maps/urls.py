@@ -14,6 +14,12 @@ urlpatterns = [
     path("job/<job_id>", views.job, name="job"),
     path("checkout/<job_id>", views.checkout, name="checkout"),
     path("cancel/<job_id>", views.cancel_job, name="cancel_job"),
+    path(
+        "results/<int:result_id>/download/",
+        views.download_result,
+        name="download_result",
+    ),
     path("home/", views.results, name="results"),
+    path("status/", views.jobs_status, name="jobs_status"),
     path("search/", views.search, name="search"),
 ]
@@ -1,10 +1,14 @@
-from django.http import Http404, HttpResponseRedirect
+from django.http import Http404, HttpResponseRedirect, JsonResponse
 from django.shortcuts import get_object_or_404, render
 from django.urls import reverse
 from django.contrib import messages
 from django.contrib.auth.decorators import login_required
+from django.core.exceptions import ValidationError
 from django.contrib.postgres.search import SearchQuery, SearchRank, SearchVector
-from django.db.models import Func, F, Value
+from django.db import transaction
+from django.db.models import Count, Q
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
 
 from django.core.paginator import (
     Paginator,
@@ -12,8 +16,12 @@ from django.core.paginator import (
     PageNotAnInteger,
 )
 
+from geodata_mart.maps.control import request_cancel
 from geodata_mart.maps.forms import JobForm
-from geodata_mart.maps.tasks import process_job_gdmclip
+from geodata_mart.maps.dispatch import dispatch_job
+from geodata_mart.maps.progress import get_jobs_progress
+from geodata_mart.maps.renditions import get_webp_names
+from geodata_mart.maps.retention import queue_regeneration
 from geodata_mart.maps.models import (
     Project,
     DownloadableDataItem,
@@ -22,6 +30,7 @@ from geodata_mart.maps.models import (
     ResultFile,
     SpatialReferenceSystem,
 )
+from geodata_mart.utils.tracing import trace
 
 import json
 from itertools import chain
@@ -67,7 +76,9 @@ def gallery(request):
         )
     else:
         search = False
-        projects_list = Project.objects.order_by("id")
+        projects_list = Project.objects.defer(
+            "coverage", "coverage_simplified", "coverage_extent"
+        ).order_by("id")
         data_list = DownloadableDataItem.objects.order_by("id")
     items_list = list(chain(projects_list, data_list))
     items_list.sort(key=lambda x: x.id, reverse=False)
@@ -110,7 +121,9 @@ def projects(request):
         )
     else:
         search = False
-        projects_list = Project.objects.order_by("id")
+        projects_list = Project.objects.defer(
+            "coverage", "coverage_simplified", "coverage_extent"
+        ).order_by("id")
     items_per_page = request.GET.get("items", 6)
     try:
         items_per_page = int(items_per_page)
@@ -168,24 +181,38 @@ def data(request):
     return render(request, "maps/gallery.html", context)
 
 
-@login_required
-def map(request, project_id):
-    project = get_object_or_404(Project, pk=project_id)
-    project_layers = Layer.objects.filter(project_id=project)
+def get_project_layers(project):
+    """Split the layers of a project into map, base, and excluded layers
+
+    Layer class filtering is done in the database so that each list is
+    resolved with a single indexed query on (project_id, lyr_class, state)."""
     std_classes = [
         Layer.LayerClass.UNSPECIFIED,
         Layer.LayerClass.STANDARD,
         Layer.LayerClass.OTHER,
     ]
-    map_layers = [layer for layer in project_layers if layer.lyr_class in std_classes]
-    base_layers = [
-        layer for layer in project_layers if layer.lyr_class == Layer.LayerClass.BASE
-    ]
-    excluded_layers = [
-        layer for layer in project_layers if layer.lyr_class == Layer.LayerClass.EXCLUDE
-    ]
-    coverage = project.coverage.geojson if project.coverage else None
-    allowed_srs = project.allowed_srs.all()
+    project_layers = Layer.objects.filter(project_id=project).order_by("id")
+    map_layers = list(project_layers.filter(lyr_class__in=std_classes))
+    base_layers = list(project_layers.filter(lyr_class=Layer.LayerClass.BASE))
+    excluded_layers = list(project_layers.filter(lyr_class=Layer.LayerClass.EXCLUDE))
+    return map_layers, base_layers, excluded_layers
+
+
+def get_display_coverage(project):
+    """GeoJSON of the simplified project coverage, or the full coverage if
+    the coverage has not been simplified"""
+    coverage = project.coverage_simplified or project.coverage
+    return coverage.geojson if coverage else None
+
+
+@login_required
+def map(request, project_id):
+    project = get_object_or_404(
+        Project.objects.select_related("vendor_id").defer("coverage"), pk=project_id
+    )
+    map_layers, base_layers, excluded_layers = get_project_layers(project)
+    coverage = get_display_coverage(project)
+    allowed_srs = list(project.allowed_srs.all())
     if not allowed_srs:
         srs_list = SpatialReferenceSystem.objects.all()
     else:
@@ -203,21 +230,11 @@ def map(request, project_id):
 
 @login_required
 def project_detail(request, project_id):
-    project = get_object_or_404(Project, pk=project_id)
-    project_layers = Layer.objects.filter(project_id=project)
-    std_classes = [
-        Layer.LayerClass.UNSPECIFIED,
-        Layer.LayerClass.STANDARD,
-        Layer.LayerClass.OTHER,
-    ]
-    map_layers = [layer for layer in project_layers if layer.lyr_class in std_classes]
-    base_layers = [
-        layer for layer in project_layers if layer.lyr_class == Layer.LayerClass.BASE
-    ]
-    excluded_layers = [
-        layer for layer in project_layers if layer.lyr_class == Layer.LayerClass.EXCLUDE
-    ]
-    coverage = project.coverage.geojson if project.coverage else None
+    project = get_object_or_404(
+        Project.objects.select_related("vendor_id").defer("coverage"), pk=project_id
+    )
+    map_layers, base_layers, excluded_layers = get_project_layers(project)
+    coverage = get_display_coverage(project)
     context = {
         "type": "project",
         "project": project,
@@ -225,16 +242,20 @@ def project_detail(request, project_id):
         "map_layers": map_layers,
         "base_layers": base_layers,
         "excluded_layers": excluded_layers,
+        "webp_names": get_webp_names(project),
     }
     return render(request, "maps/detail.html", context)
 
 
 @login_required
 def data_detail(request, item_id):
-    item = get_object_or_404(DownloadableDataItem, pk=item_id)
+    item = get_object_or_404(
+        DownloadableDataItem.objects.select_related("vendor_id"), pk=item_id
+    )
     context = {
         "type": "download",
         "item": item,
+        "webp_names": get_webp_names(item),
     }
     return render(request, "maps/detail.html", context)
 
@@ -248,6 +269,7 @@ def cancel_job(request, job_id):
     if request.method == "POST":
         job.state = abandoned_state
         job.save()
+        request_cancel(job)
         return HttpResponseRedirect(reverse("maps:results"))
     else:
         return render(request, "maps/cancel.html", {"job": job})
@@ -266,7 +288,10 @@ def create_job(request):
                 logger.error(f"{form.errors}")
 
             if form.is_valid():
-                instance = form.save()
+                with trace("create_job") as span:
+                    form.instance.trace_parent = span.traceparent
+                    instance = form.save()
+                    span.attributes["job_id"] = str(instance.job_id)
                 job = Job.objects.get(pk=instance.pk)
                 return HttpResponseRedirect(
                     reverse(
@@ -275,8 +300,9 @@ def create_job(request):
                     )
                 )
             else:
+                errors = " ".join(form.non_field_errors())
                 messages.add_message(
-                    request, messages.ERROR, "The submission was invalid."
+                    request, messages.ERROR, errors or "The submission was invalid."
                 )
                 return HttpResponseRedirect(
                     reverse(
@@ -294,51 +320,158 @@ def checkout(request, job_id):
         job = Job.objects.get(job_id=job_id)
         if not job:
             raise Http404("Job does not exist")
+        if job.has_pending_task():
+            return HttpResponseRedirect(reverse("maps:job", kwargs={"job_id": job_id}))
         form = JobForm(instance=job)
         parameters = json.loads(form["parameters"].value())
         context = {"job": job, "form": form, "parameters": parameters}
         return render(request, "maps/checkout.html", context)
     elif request.method == "POST":
-        job = Job.objects.get(job_id=job_id)
-        if not job:
-            raise Http404("Job does not exist")
-        try:
-            # task = process_job_gdmclip.delay(job.job_id)
-            task = process_job_gdmclip.apply_async(
-                args=[
-                    job.job_id,
-                ],
-                countdown=10,
-            )
-            messages.add_message(request, messages.INFO, f"Processing {job.job_id}")
-        except Exception as e:
-            messages.add_message(request, messages.ERROR, f"Error processing task {e}")
-        finally:
-            # job.tasks.append(task)
-            job.tasks = Func(F("tasks"), Value(task.id), function="array_append")
-            job.save()
-            return HttpResponseRedirect(reverse("maps:job", kwargs={"job_id": job_id}))
+        with transaction.atomic():
+            # lock the job so that concurrent submissions dispatch it once
+            job = get_object_or_404(Job.objects.select_for_update(), job_id=job_id)
+            if job.has_pending_task():
+                messages.add_message(
+                    request, messages.INFO, f"{job.job_id} is already queued"
+                )
+            else:
+                with trace("checkout", parent=job.trace_parent, job_id=str(job.job_id)):
+                    dispatch_job(job)
+                messages.add_message(request, messages.INFO, f"Processing {job.job_id}")
+        return HttpResponseRedirect(reverse("maps:job", kwargs={"job_id": job_id}))
 
 
 @login_required
 def job(request, job_id):
     if request.method == "GET":
-        job = Job.objects.get(job_id=job_id)
-        if not job:
-            raise Http404("Job does not exist")
+        job = get_object_or_404(
+            Job.objects.select_related("project_id", "project_id__vendor_id"),
+            job_id=job_id,
+        )
         results = ResultFile.objects.filter(job_id=job.id)
         context = {"job": job, "results": results}
         return render(request, "maps/job.html", context)
 
 
+@login_required
+def download_result(request, result_id):
+    """Download a result file, recording the download for retention
+
+    Evicted results are queued for regeneration and the user is sent to the
+    job page to follow its progress.
+    """
+    result = get_object_or_404(
+        ResultFile.objects.select_related("job_id"), pk=result_id
+    )
+    if not request.user.is_staff and (
+        result.job_id is None or result.job_id.user_id_id != request.user.id
+    ):
+        raise Http404("Result does not exist")
+
+    if result.evicted_date is None and result.file_available():
+        ResultFile.objects.filter(pk=result.pk).update(
+            last_downloaded_date=timezone.now()
+        )
+        return HttpResponseRedirect(result.file_object.url)
+
+    if result.job_id is None:
+        raise Http404("Result is no longer available")
+    queue_regeneration(result)
+    messages.add_message(
+        request,
+        messages.INFO,
+        "This result has expired and is being generated again.",
+    )
+    return HttpResponseRedirect(
+        reverse("maps:job", kwargs={"job_id": result.job_id.job_id})
+    )
+
+
+def encode_job_cursor(job):
+    """Encode the keyset position of a job for the results page"""
+    return f"{job.created_date.isoformat()}_{job.id}"
+
+
+def decode_job_cursor(cursor):
+    """Decode a results page cursor into a (created_date, id) tuple"""
+    try:
+        created_date, pk = cursor.rsplit("_", 1)
+        created_date = parse_datetime(created_date)
+        pk = int(pk)
+    except (AttributeError, ValueError):
+        return None
+    if not created_date:
+        return None
+    return created_date, pk
+
+
 @login_required
 def results(request):
     if request.method == "GET":
+        jobs_per_page = request.GET.get("items", 25)
         try:
-            jobs = Job.objects.filter(user_id=request.user.id).order_by("-created_date")
-        except Job.DoesNotExist:
-            raise Http404("There are no jobs for this user")
-        ids = [job.id for job in jobs]
-        results = ResultFile.objects.filter(job_id__in=ids)
-        context = {"jobs": jobs, "results": results}
+            jobs_per_page = min(max(int(jobs_per_page), 1), 100)
+        except ValueError:
+            jobs_per_page = 25
+        jobs = (
+            Job.objects.filter(user_id=request.user.id)
+            .select_related("project_id")
+            .prefetch_related("results")
+            .annotate(result_count=Count("results"))
+        )
+        before = decode_job_cursor(request.GET.get("before"))
+        after = decode_job_cursor(request.GET.get("after"))
+        if after:
+            created_date, pk = after
+            jobs = jobs.filter(
+                Q(created_date__gt=created_date)
+                | Q(created_date=created_date, id__gt=pk)
+            ).order_by("created_date", "id")
+        else:
+            if before:
+                created_date, pk = before
+                jobs = jobs.filter(
+                    Q(created_date__lt=created_date)
+                    | Q(created_date=created_date, id__lt=pk)
+                )
+            jobs = jobs.order_by("-created_date", "-id")
+        # Fetch one extra row to determine whether another page exists
+        jobs = list(jobs[: jobs_per_page + 1])
+        has_more = len(jobs) > jobs_per_page
+        jobs = jobs[:jobs_per_page]
+        if after:
+            jobs.reverse()
+            has_next, has_previous = True, has_more
+        else:
+            has_next, has_previous = has_more, bool(before)
+        context = {
+            "jobs": jobs,
+            "items_per_page": jobs_per_page,
+            "next_cursor": encode_job_cursor(jobs[-1]) if jobs and has_next else None,
+            "previous_cursor": encode_job_cursor(jobs[0])
+            if jobs and has_previous
+            else None,
+        }
         return render(request, "maps/results.html", context)
+
+
+@login_required
+def jobs_status(request):
+    """Return the state and progress of a batch of the users jobs
+
+    Accepts a comma separated list of job ids in the ``jobs`` query parameter,
+    and resolves the task progress of all of them with one database query and
+    one result backend lookup."""
+    job_ids = [
+        job_id.strip()
+        for job_id in request.GET.get("jobs", "").split(",")
+        if job_id.strip()
+    ][:100]
+    try:
+        jobs = Job.objects.filter(user_id=request.user.id, job_id__in=job_ids).values(
+            "job_id", "state", "tasks"
+        )
+        progress = get_jobs_progress(jobs)
+    except ValidationError:
+        return JsonResponse({"error": "Invalid job identifier"}, status=400)
+    return JsonResponse({"jobs": progress})
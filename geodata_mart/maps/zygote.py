@@ -0,0 +1,185 @@
+"""Forked processes for crash isolated processing jobs
+
+Starting QGIS and loading the processing framework takes seconds, while a
+crash in QGIS takes down the process it runs in. A zygote loads that state
+once, in the worker process, and runs each job in a process forked from it.
+The fork starts with QGIS ready to use, shares the loaded state copy on
+write, and returns all memory used by the job when it exits, while a crash
+only ends the forked process and is reported back to the worker.
+
+The function run in the fork returns a JSON serialisable result, which is
+sent back through a pipe. A Python traceback is written by faulthandler
+if the forked process is killed by a fatal signal such as a segmentation
+fault.
+"""
+import ctypes
+import faulthandler
+import json
+import logging
+import os
+import signal
+import tempfile
+import time
+import traceback
+
+from django.db import connections
+
+logger = logging.getLogger(__name__)
+
+PR_SET_PDEATHSIG = 1
+# characters of a crash traceback kept in the diagnostics
+TRACEBACK_LIMIT = 20000
+
+
+def set_parent_death_signal(signum=signal.SIGKILL):
+    """Have the kernel kill this process if its parent exits, on Linux"""
+    try:
+        ctypes.CDLL(None, use_errno=True).prctl(PR_SET_PDEATHSIG, signum)
+    except (AttributeError, OSError):
+        pass
+
+
+class ForkOutcome:
+    """Result or failure of a function run in a forked process"""
+
+    def __init__(self, pid, status, payload, crash_log, seconds):
+        self.pid = pid
+        self.status = status
+        self.payload = payload
+        self.crash_log = crash_log
+        self.seconds = round(seconds, 6)
+
+    @property
+    def signal(self):
+        if os.WIFSIGNALED(self.status):
+            return signal.Signals(os.WTERMSIG(self.status)).name
+        return None
+
+    @property
+    def exit_code(self):
+        return os.WEXITSTATUS(self.status) if os.WIFEXITED(self.status) else None
+
+    @property
+    def crashed(self):
+        return (
+            self.signal is not None
+            or self.exit_code != 0
+            or self.payload is None
+            or "error" in self.payload
+        )
+
+    @property
+    def result(self):
+        return (self.payload or {}).get("result")
+
+    def describe(self):
+        if self.signal:
+            return f"process {self.pid} was killed by {self.signal}"
+        if self.payload and "error" in self.payload:
+            return f"process {self.pid} raised {self.payload['error']}"
+        return f"process {self.pid} exited with code {self.exit_code}"
+
+    def diagnostics(self):
+        """Serializable details of a crash for the job record"""
+        return {
+            "pid": self.pid,
+            "signal": self.signal,
+            "exit_code": self.exit_code,
+            "error": self.describe(),
+            "traceback": (
+                (self.payload or {}).get("traceback") or self.crash_log or ""
+            )[-TRACEBACK_LIMIT:],
+            "seconds": self.seconds,
+        }
+
+
+def run_forked(function, *args):
+    """Run a function in a forked process and wait for it to finish
+
+    Database connections are closed first, so the forked process opens its
+    own rather than sharing sockets with this process. The forked process is
+    killed if this process exits or is interrupted while waiting, such as by
+    a task time limit.
+
+    Returns:
+        ForkOutcome: the result of the function, or how the process failed
+    """
+    connections.close_all()
+    crash_fd, crash_path = tempfile.mkstemp(prefix="gdm-crash-", suffix=".log")
+    read_fd, write_fd = os.pipe()
+    started = time.perf_counter()
+    pid = os.fork()
+    if pid == 0:
+        os.close(read_fd)
+        exit_code = 0
+        try:
+            set_parent_death_signal()
+            faulthandler.enable(file=crash_fd, all_threads=True)
+            payload = {"result": function(*args)}
+        except BaseException as e:
+            payload = {
+                "error": f"{type(e).__name__}: {e}",
+                "traceback": traceback.format_exc(),
+            }
+            exit_code = 1
+        try:
+            connections.close_all()
+            with os.fdopen(write_fd, "w") as pipe:
+                json.dump(payload, pipe)
+        finally:
+            os._exit(exit_code)
+
+    os.close(write_fd)
+    os.close(crash_fd)
+    try:
+        with os.fdopen(read_fd) as pipe:
+            data = pipe.read()
+        _, status = os.waitpid(pid, 0)
+    except BaseException:
+        logger.warning(f"Stopping forked process {pid}")
+        try:
+            os.kill(pid, signal.SIGKILL)
+            os.waitpid(pid, 0)
+        except (ProcessLookupError, ChildProcessError):
+            pass
+        os.unlink(crash_path)
+        raise
+    seconds = time.perf_counter() - started
+    with open(crash_path, errors="replace") as f:
+        crash_log = f.read()
+    os.unlink(crash_path)
+    try:
+        payload = json.loads(data) if data else None
+    except ValueError:
+        payload = None
+    return ForkOutcome(pid, status, payload, crash_log, seconds)
+
+
+class Zygote:
+    """State loaded once per process and shared with forked processes"""
+
+    def __init__(self, load):
+        """
+        Args:
+            load: callable returning the state, such as a started QGIS
+                application
+        """
+        self.load = load
+        self.state = None
+        self.pid = None
+
+    def get(self):
+        """Load the state in this process if it is not loaded yet"""
+        if self.pid != os.getpid():
+            logger.info(f"Loading zygote in process {os.getpid()}")
+            self.state = self.load()
+            self.pid = os.getpid()
+        return self.state
+
+    def run(self, function):
+        """Run a function with the loaded state in a forked process
+
+        Returns:
+            ForkOutcome: the result of the function, or how the process failed
+        """
+        return run_forked(function, self.get())
@@ -0,0 +1,328 @@
+"""Clip algorithm benchmarks on synthetic projects
+
+Generates a QGIS project with point, line and polygon layers and a raster of
+configurable sizes, runs the clip algorithm against it for a matrix of AOI
+sizes and output CRSs, and records the time and memory used by each stage
+the algorithm reports progress for.
+"""
+import importlib.util
+import os
+import platform
+import random
+import resource
+import time
+
+import numpy
+from osgeo import gdal, osr
+from qgis.core import (
+    Qgis,
+    QgsCoordinateReferenceSystem,
+    QgsFeature,
+    QgsField,
+    QgsGeometry,
+    QgsPointXY,
+    QgsProcessingContext,
+    QgsProcessingFeedback,
+    QgsProject,
+    QgsRasterLayer,
+    QgsVectorFileWriter,
+    QgsVectorLayer,
+)
+from qgis.PyQt.QtCore import QVariant
+
+# synthetic data extent in WGS84 (xmin, ymin, xmax, ymax)
+EXTENT = (28.0, -29.0, 30.0, -27.0)
+PAGE_SIZE = os.sysconf("SC_PAGE_SIZE")
+
+
+def getRss():
+    """Current resident set size of this process in bytes"""
+    with open("/proc/self/statm") as f:
+        return int(f.read().split()[1]) * PAGE_SIZE
+
+
+def getPeakRss():
+    """Peak resident set size of this process in bytes"""
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+class StageRecorder:
+    """Progress recorder that times the stages reported by the algorithm
+
+    The clip algorithm accepts a pickled progress recorder, so each call to
+    set_progress marks the end of a stage with its description.
+    """
+
+    def __init__(self):
+        self.stages = []
+        self.last = time.perf_counter()
+
+    def set_progress(self, current, total, description=""):
+        now = time.perf_counter()
+        self.stages.append(
+            {
+                "name": description,
+                "seconds": round(now - self.last, 6),
+                "rss_bytes": getRss(),
+                "peak_rss_bytes": getPeakRss(),
+            }
+        )
+        self.last = now
+
+
+def randomPoint(rng, extent=EXTENT):
+    xmin, ymin, xmax, ymax = extent
+    return QgsPointXY(rng.uniform(xmin, xmax), rng.uniform(ymin, ymax))
+
+
+def randomGeometry(rng, geometryType):
+    """Random point, short line, or small square within the extent"""
+    point = randomPoint(rng)
+    if geometryType == "Point":
+        return QgsGeometry.fromPointXY(point)
+    if geometryType == "LineString":
+        points = [point]
+        for vertex in range(rng.randint(1, 4)):
+            points.append(
+                QgsPointXY(
+                    points[-1].x() + rng.uniform(-0.01, 0.01),
+                    points[-1].y() + rng.uniform(-0.01, 0.01),
+                )
+            )
+        return QgsGeometry.fromPolylineXY(points)
+    size = rng.uniform(0.001, 0.01)
+    return QgsGeometry.fromWkt(
+        f"POLYGON(({point.x()} {point.y()}, {point.x() + size} {point.y()}, "
+        f"{point.x() + size} {point.y() + size}, {point.x()} {point.y() + size}, "
+        f"{point.x()} {point.y()}))"
+    )
+
+
+def writeVectorLayer(path, name, geometryType, count, rng):
+    """Write a synthetic vector layer to a layer of a geopackage"""
+    layer = QgsVectorLayer(f"{geometryType}?crs=epsg:4326", name, "memory")
+    provider = layer.dataProvider()
+    provider.addAttributes(
+        [QgsField("id", QVariant.Int), QgsField("name", QVariant.String)]
+    )
+    layer.updateFields()
+    features = []
+    for i in range(count):
+        feature = QgsFeature(layer.fields())
+        feature.setAttributes([i, f"{name}_{i}"])
+        feature.setGeometry(randomGeometry(rng, geometryType))
+        features.append(feature)
+    provider.addFeatures(features)
+
+    options = QgsVectorFileWriter.SaveVectorOptions()
+    options.driverName = "GPKG"
+    options.layerName = name
+    if os.path.exists(path):
+        options.actionOnExistingFile = QgsVectorFileWriter.CreateOrOverwriteLayer
+    error = QgsVectorFileWriter.writeAsVectorFormatV3(
+        layer, path, QgsProject.instance().transformContext(), options
+    )
+    if error[0] != QgsVectorFileWriter.NoError:
+        raise RuntimeError(f"Unable to write {name}: {error}")
+    return f"{path}|layername={name}"
+
+
+def writeRaster(path, size, rng):
+    """Write a synthetic single band GeoTIFF covering the extent"""
+    xmin, ymin, xmax, ymax = EXTENT
+    dataset = gdal.GetDriverByName("GTiff").Create(
+        path, size, size, 1, gdal.GDT_Byte, ["TILED=YES", "COMPRESS=DEFLATE"]
+    )
+    dataset.SetGeoTransform(
+        (xmin, (xmax - xmin) / size, 0, ymax, 0, -(ymax - ymin) / size)
+    )
+    srs = osr.SpatialReference()
+    srs.ImportFromEPSG(4326)
+    dataset.SetProjection(srs.ExportToWkt())
+    generator = numpy.random.default_rng(rng.randint(0, 2**32 - 1))
+    dataset.GetRasterBand(1).WriteArray(
+        generator.integers(0, 255, size=(size, size), dtype=numpy.uint8)
+    )
+    dataset.FlushCache()
+    del dataset
+    return path
+
+
+def buildProject(workdir, points, lines, polygons, rasterSize, seed=0):
+    """Generate synthetic layers and a project referencing them
+
+    Returns:
+        tuple: the project path and the short names of its layers
+    """
+    rng = random.Random(seed)
+    os.makedirs(workdir, exist_ok=True)
+    gpkg = os.path.join(workdir, "synthetic.gpkg")
+    if os.path.exists(gpkg):
+        os.remove(gpkg)
+
+    project = QgsProject()
+    project.setCrs(QgsCoordinateReferenceSystem("EPSG:4326"))
+    layers = []
+    for name, geometryType, count in [
+        ("points", "Point", points),
+        ("lines", "LineString", lines),
+        ("polygons", "Polygon", polygons),
+    ]:
+        if count:
+            uri = writeVectorLayer(gpkg, name, geometryType, count, rng)
+            layers.append(QgsVectorLayer(uri, name, "ogr"))
+    if rasterSize:
+        path = writeRaster(os.path.join(workdir, "raster.tif"), rasterSize, rng)
+        layers.append(QgsRasterLayer(path, "raster", "gdal"))
+
+    for layer in layers:
+        layer.setShortName(layer.name())
+        project.addMapLayer(layer)
+    projectPath = os.path.join(workdir, "synthetic.qgs")
+    project.write(projectPath)
+    names = [layer.name() for layer in layers]
+    project.clear()
+    return projectPath, names
+
+
+def getAoiWkt(fraction):
+    """Square AOI centred on the extent covering a fraction of its area"""
+    xmin, ymin, xmax, ymax = EXTENT
+    cx, cy = (xmin + xmax) / 2, (ymin + ymax) / 2
+    half = (xmax - xmin) * fraction**0.5 / 2
+    return (
+        f"POLYGON(({cx - half} {cy - half}, {cx + half} {cy - half}, "
+        f"{cx + half} {cy + half}, {cx - half} {cy + half}, {cx - half} {cy - half}))"
+    )
+
+
+def loadClipAlgorithm(scriptPath):
+    """Load the clip algorithm class from its processing script"""
+    spec = importlib.util.spec_from_file_location("gdm_clip_project", scriptPath)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module.GdmClipProjectLayers()
+
+
+def runCase(algorithm, projectPath, layers, workdir, name, fraction, outputCrs):
+    """Run the clip algorithm once and time each reported stage"""
+    import codecs  # pylint: disable=import-outside-toplevel
+    import pickle  # pylint: disable=import-outside-toplevel
+
+    recorder = StageRecorder()
+    started = time.perf_counter()
+    QgsProject.instance().read(projectPath)
+    recorder.set_progress(0, 100, description="Project loaded")
+
+    context = QgsProcessingContext()
+    context.setProject(QgsProject.instance())
+    feedback = QgsProcessingFeedback()
+    params = {
+        "PROGRESS_RECORDER": codecs.encode(pickle.dumps(recorder), "base64").decode(),
+        "JOBID": name,
+        "LAYERS": ",".join(layers),
+        "CLIP_GEOM": getAoiWkt(fraction),
+        "OUTPUT_CRS": QgsCoordinateReferenceSystem(outputCrs) if outputCrs else None,
+        "PROJECT_CRS": None,
+        "OUTPUT": os.path.join(workdir, "output", name, "result"),
+    }
+    task = algorithm.create()
+    task.prepare(params, context, feedback)
+    task.runPrepared(params, context, feedback)
+    # the algorithm records stages on its own unpickled copy of the recorder,
+    # which carries over the project loading stage recorded above
+    stages = task.progress_recorder.stages
+    QgsProject.instance().clear()
+
+    return {
+        "name": name,
+        "aoi_fraction": fraction,
+        "output_crs": outputCrs or None,
+        "seconds": round(time.perf_counter() - started, 6),
+        "peak_rss_bytes": getPeakRss(),
+        "stages": stages,
+    }
+
+
+def runBenchmark(
+    scriptPath,
+    workdir,
+    points=10000,
+    lines=2000,
+    polygons=2000,
+    rasterSize=2048,
+    fractions=(0.01, 0.1, 0.5),
+    crsList=(None, "EPSG:3857"),
+    repeat=1,
+    seed=0,
+):
+    """Run the clip benchmark matrix
+
+    QGIS must already be initialised, see startQgisApplication.
+
+    Returns:
+        dict: environment, configuration, and results for each case
+    """
+    from processing.core.Processing import (  # pylint: disable=import-outside-toplevel
+        Processing,
+    )
+
+    Processing.initialize()
+    fixtureStarted = time.perf_counter()
+    projectPath, layers = buildProject(
+        workdir, points, lines, polygons, rasterSize, seed
+    )
+    fixtureSeconds = time.perf_counter() - fixtureStarted
+    algorithm = loadClipAlgorithm(scriptPath)
+
+    cases = []
+    for fraction in fractions:
+        for outputCrs in crsList:
+            name = f"aoi-{fraction}_crs-{(outputCrs or 'native').replace(':', '')}"
+            runs = [
+                runCase(
+                    algorithm, projectPath, layers, workdir, name, fraction, outputCrs
+                )
+                for run in range(repeat)
+            ]
+            # report the fastest run, which is least affected by noise
+            cases.append(min(runs, key=lambda run: run["seconds"]))
+
+    return {
+        "environment": {
+            "qgis": Qgis.QGIS_VERSION,
+            "gdal": gdal.__version__,
+            "python": platform.python_version(),
+            "machine": platform.machine(),
+        },
+        "config": {
+            "points": points,
+            "lines": lines,
+            "polygons": polygons,
+            "raster_size": rasterSize,
+            "repeat": repeat,
+            "seed": seed,
+        },
+        "fixture_seconds": round(fixtureSeconds, 6),
+        "cases": cases,
+    }
+
+
+def compareToBaseline(results, baseline, tolerance=0.2):
+    """Compare case timings and peak memory against a baseline run
+
+    Returns:
+        list: descriptions of metrics that regressed beyond the tolerance
+    """
+    baselineCases = {case["name"]: case for case in baseline.get("cases", [])}
+    regressions = []
+    for case in results["cases"]:
+        previous = baselineCases.get(case["name"])
+        if not previous:
+            continue
+        for metric in ["seconds", "peak_rss_bytes"]:
+            if previous[metric] and case[metric] > previous[metric] * (1 + tolerance):
+                regressions.append(
+                    f"{case['name']} {metric}: {case[metric]} > {previous[metric]}"
+                )
+    return regressions
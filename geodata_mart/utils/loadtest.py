@@ -0,0 +1,469 @@
+"""Load tests for the web tier
+
+Seeds a catalog of projects, layers, users and processed jobs with result
+files, then drives the gallery, map, job creation, checkout, results and
+download views with concurrent simulated users against a running server.
+Each request is timed, and latency percentiles and throughput are reported
+per endpoint.
+
+Job dispatch must be stubbed on the server under test with
+``JOB_DISPATCH_STUB``, so that checkouts are recorded without queueing work
+for the clip workers.
+"""
+import json
+import random
+import string
+import threading
+import time
+import uuid
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+from http.cookies import SimpleCookie
+from importlib import import_module
+from urllib.error import HTTPError
+from urllib.parse import urlencode, urljoin, urlparse
+from urllib.request import HTTPRedirectHandler, Request, build_opener
+
+from django.conf import settings
+from django.contrib.auth import BACKEND_SESSION_KEY, HASH_SESSION_KEY, SESSION_KEY
+from django.contrib.gis.geos import MultiPolygon, Polygon
+from django.core.files.base import ContentFile
+from django.urls import reverse
+from django.utils import translation
+from django.utils.crypto import get_random_string
+
+from geodata_mart.maps.models import Job, Layer, Project, ResultFile, project_storage
+from geodata_mart.users.models import User
+from geodata_mart.vendors.models import Vendor
+
+VENDOR_NAME = "Load Test"
+USER_PREFIX = "loadtest"
+USER_PASSWORD = "loadtest"
+# catalog coverage in WGS84 (xmin, ymin, xmax, ymax)
+EXTENT = (28.0, -29.0, 30.0, -27.0)
+ENDPOINTS = [
+    "gallery",
+    "map",
+    "create_job",
+    "checkout",
+    "checkout_submit",
+    "results",
+    "download_result",
+    "geodata",
+]
+
+Sample = namedtuple("Sample", ["endpoint", "status", "seconds", "size", "error"])
+Catalog = namedtuple("Catalog", ["projects", "users"])
+
+
+def percentile(values, fraction):
+    """Linearly interpolated percentile of a list of numbers"""
+    if not values:
+        return None
+    values = sorted(values)
+    position = (len(values) - 1) * fraction
+    lower = int(position)
+    upper = min(lower + 1, len(values) - 1)
+    return values[lower] + (values[upper] - values[lower]) * (position - lower)
+
+
+def summarize(samples, elapsed):
+    """Latency percentiles and throughput of the samples for each endpoint
+
+    Args:
+        samples (list): timed requests
+        elapsed (float): wall clock seconds the load test ran for
+
+    Returns:
+        dict: summary statistics keyed by endpoint
+    """
+    by_endpoint = {}
+    for sample in samples:
+        by_endpoint.setdefault(sample.endpoint, []).append(sample)
+
+    summary = {}
+    for endpoint in sorted(by_endpoint, key=_endpoint_order):
+        endpoint_samples = by_endpoint[endpoint]
+        latencies = [sample.seconds * 1000 for sample in endpoint_samples]
+        errors = [sample for sample in endpoint_samples if sample.error]
+        summary[endpoint] = {
+            "requests": len(endpoint_samples),
+            "errors": len(errors),
+            "throughput": round(len(endpoint_samples) / elapsed, 3)
+            if elapsed
+            else None,
+            "mean_ms": round(sum(latencies) / len(latencies), 3),
+            "p50_ms": round(percentile(latencies, 0.5), 3),
+            "p90_ms": round(percentile(latencies, 0.9), 3),
+            "p99_ms": round(percentile(latencies, 0.99), 3),
+            "max_ms": round(max(latencies), 3),
+            "bytes": sum(sample.size for sample in endpoint_samples),
+            "statuses": _count_statuses(endpoint_samples),
+        }
+    return summary
+
+
+def _endpoint_order(name):
+    return ENDPOINTS.index(name) if name in ENDPOINTS else len(ENDPOINTS)
+
+
+def _count_statuses(samples):
+    statuses = {}
+    for sample in samples:
+        statuses[str(sample.status)] = statuses.get(str(sample.status), 0) + 1
+    return statuses
+
+
+def get_extent_polygon(extent=EXTENT):
+    xmin, ymin, xmax, ymax = extent
+    return Polygon.from_bbox((xmin, ymin, xmax, ymax))
+
+
+def get_random_aoi(rng, extent=EXTENT, size=0.05):
+    """Square AOI WKT placed at random within the extent"""
+    xmin, ymin, xmax, ymax = extent
+    x = rng.uniform(xmin, xmax - size)
+    y = rng.uniform(ymin, ymax - size)
+    return Polygon.from_bbox((x, y, x + size, y + size)).wkt
+
+
+def seed_catalog(projects=6, layers=20, users=10, jobs=25, result_size=1024 * 1024):
+    """Create the load test catalog, reusing any previously seeded records
+
+    Each user is given processed jobs with a result file of the given size,
+    so the results page and downloads have realistic data to serve.
+
+    Returns:
+        Catalog: project ids with their layer ids, and user ids with the ids
+            of their result files
+    """
+    vendor, _ = Vendor.objects.get_or_create(
+        name=VENDOR_NAME, defaults={"abstract": "Synthetic catalog for load tests"}
+    )
+    coverage = MultiPolygon(get_extent_polygon(), srid=4326)
+    project_list = list(Project.objects.filter(vendor_id=vendor).order_by("id"))
+    for i in range(len(project_list), projects):
+        project_list.append(
+            Project.objects.create(
+                project_name=f"{USER_PREFIX}-project-{i}",
+                vendor_id=vendor,
+                abstract=f"Load test project {i}",
+                description="Synthetic project for load tests",
+                coverage=coverage,
+                coverage_simplified=coverage,
+                coverage_extent=get_extent_polygon(),
+            )
+        )
+    project_list = project_list[:projects]
+
+    catalog_projects = {}
+    for project in project_list:
+        existing = Layer.objects.filter(project_id=project).count()
+        Layer.objects.bulk_create(
+            [
+                Layer(
+                    short_name=f"layer_{i}",
+                    layer_name=f"Layer {i}",
+                    abstract=f"Load test layer {i}",
+                    project_id=project,
+                    lyr_class=Layer.LayerClass.STANDARD,
+                    lyr_type=Layer.LayerType.VECTOR,
+                    bbox=get_extent_polygon(),
+                )
+                for i in range(existing, layers)
+            ]
+        )
+        catalog_projects[project.id] = list(
+            Layer.objects.filter(project_id=project)
+            .order_by("id")
+            .values_list("id", flat=True)[:layers]
+        )
+
+    catalog_users = {}
+    for i in range(users):
+        user, created = User.objects.get_or_create(
+            username=f"{USER_PREFIX}-{i}",
+            defaults={"email": f"{USER_PREFIX}-{i}@example.com"},
+        )
+        if created:
+            user.set_password(USER_PASSWORD)
+            user.save()
+        results = list(
+            ResultFile.objects.filter(
+                job_id__user_id=user, job_id__project_id__vendor_id=vendor
+            ).values_list("id", flat=True)
+        )
+        for j in range(len(results), jobs):
+            project = project_list[j % len(project_list)]
+            job = Job.objects.create(
+                user_id=user,
+                project_id=project,
+                state=Job.JobStateChoices.COMPLETED,
+                parameters={
+                    "LAYERS": "",
+                    "EXCLUDES": "",
+                    "CLIP_GEOM": get_random_aoi(random.Random(j)),
+                    "OUTPUT_CRS": "",
+                    "PROJECT_CRS": "",
+                },
+                tasks=[],
+            )
+            job.layers.set(catalog_projects[project.id])
+            result = ResultFile(file_name=f"{job.job_id}.zip", job_id=job)
+            result.file_object.save(
+                f"{job.job_id}.zip", ContentFile(b"0" * result_size), save=False
+            )
+            result.save()
+            results.append(result.id)
+        catalog_users[user.id] = results
+    return Catalog(catalog_projects, catalog_users)
+
+
+def clear_catalog():
+    """Remove the load test catalog and the jobs created against it
+
+    Users are kept along with their credit accounts, and reused when the
+    catalog is seeded again.
+
+    Returns:
+        int: number of jobs removed
+    """
+    vendor = Vendor.objects.filter(name=VENDOR_NAME).first()
+    if not vendor:
+        return 0
+    jobs = Job.objects.filter(project_id__vendor_id=vendor)
+    for result in ResultFile.objects.filter(job_id__in=jobs):
+        if result.file_object:
+            result.file_object.delete(save=False)
+        result.delete()
+    removed, _ = jobs.delete()
+    Project.objects.filter(vendor_id=vendor).delete()
+    vendor.delete()
+    return removed
+
+
+def create_session(user_id):
+    """Create an authenticated session for a user, bypassing the login form
+
+    Returns:
+        str: the session key
+    """
+    user = User.objects.get(pk=user_id)
+    engine = import_module(settings.SESSION_ENGINE)
+    session = engine.SessionStore()
+    session[SESSION_KEY] = user._meta.pk.value_to_string(user)
+    session[BACKEND_SESSION_KEY] = settings.AUTHENTICATION_BACKENDS[0]
+    session[HASH_SESSION_KEY] = user.get_session_auth_hash()
+    session.save()
+    return session.session_key
+
+
+class NoRedirectHandler(HTTPRedirectHandler):
+    """Return redirects as responses so each request is timed on its own"""
+
+    def redirect_request(self, req, fp, code, msg, headers, newurl):
+        return None
+
+
+class SimulatedUser:
+    """HTTP client holding the cookies of one signed in user"""
+
+    def __init__(self, base_url, user_id, session_key, timeout=30):
+        self.base_url = base_url
+        self.user_id = user_id
+        self.timeout = timeout
+        self.opener = build_opener(NoRedirectHandler)
+        self.csrf_token = get_random_string(64, string.ascii_letters + string.digits)
+        self.cookies = {
+            settings.SESSION_COOKIE_NAME: session_key,
+            settings.CSRF_COOKIE_NAME: self.csrf_token,
+        }
+        self.samples = []
+
+    def request(self, endpoint, path, data=None):
+        """Time a request, recording it as a sample for the endpoint
+
+        Returns:
+            tuple: response status and headers, or None and the error
+        """
+        body = None
+        if data is not None:
+            data = dict(data, csrfmiddlewaretoken=self.csrf_token)
+            body = urlencode(data, doseq=True).encode()
+        request = Request(urljoin(self.base_url, path), data=body)
+        request.add_header(
+            "Cookie", "; ".join(f"{key}={value}" for key, value in self.cookies.items())
+        )
+        # the CSRF middleware checks the referer of secure requests
+        request.add_header("Referer", urljoin(self.base_url, path))
+
+        started = time.perf_counter()
+        try:
+            response = self.opener.open(request, timeout=self.timeout)
+        except HTTPError as e:
+            response = e
+        except OSError as e:
+            self.samples.append(
+                Sample(endpoint, None, time.perf_counter() - started, 0, str(e))
+            )
+            return None, str(e)
+        with response:
+            size = len(response.read())
+        seconds = time.perf_counter() - started
+
+        status = response.status if hasattr(response, "status") else response.code
+        error = f"HTTP {status}" if status >= 400 else None
+        self.samples.append(Sample(endpoint, status, seconds, size, error))
+        for header in response.headers.get_all("Set-Cookie") or []:
+            for key, morsel in SimpleCookie(header).items():
+                self.cookies[key] = morsel.value
+        return status, response.headers
+
+
+def get_paths(catalog, language=None):
+    """Resolve the paths of the pages under test in the default language"""
+    with translation.override(language or settings.LANGUAGES[0][0]):
+        return {
+            "gallery": reverse("maps:gallery"),
+            "create_job": reverse("maps:create_job"),
+            "results": reverse("maps:results"),
+            "map": {
+                project_id: reverse("maps:map", kwargs={"project_id": project_id})
+                for project_id in catalog.projects
+            },
+            "download_result": {
+                result_id: reverse(
+                    "maps:download_result", kwargs={"result_id": result_id}
+                )
+                for results in catalog.users.values()
+                for result_id in results
+            },
+            "geodata": reverse("geodata", kwargs={"path": ""}),
+        }
+
+
+def run_scenario(client, catalog, paths, rng):
+    """Browse the catalog, order a clip, and download a previous result"""
+    client.request("gallery", paths["gallery"])
+    client.request("gallery", f"{paths['gallery']}?{urlencode({'page': 2})}")
+
+    project_id = rng.choice(list(catalog.projects))
+    client.request("map", paths["map"][project_id])
+
+    layers = catalog.projects[project_id]
+    job_id = str(uuid.uuid4())
+    parameters = {
+        "LAYERS": "",
+        "EXCLUDES": "",
+        "CLIP_GEOM": get_random_aoi(rng),
+        "BUFFER": 0,
+        "OUTPUT_CRS": "",
+        "PROJECT_CRS": "",
+    }
+    status, headers = client.request(
+        "create_job",
+        paths["create_job"],
+        {
+            "job_id": job_id,
+            "user_id": client.user_id,
+            "project_id": project_id,
+            "layers": rng.sample(layers, min(len(layers), rng.randint(1, 5))),
+            "state": Job.JobStateChoices.UNSPECIFIED,
+            "parameters": json.dumps(parameters),
+        },
+    )
+    location = headers.get("Location", "") if status == 302 else ""
+    if job_id in location:
+        checkout = urlparse(location).path
+        client.request("checkout", checkout)
+        client.request("checkout_submit", checkout, {})
+
+    client.request("results", paths["results"])
+
+    results = catalog.users[client.user_id]
+    if results:
+        status, headers = client.request(
+            "download_result", paths["download_result"][rng.choice(results)]
+        )
+        location = headers.get("Location", "") if status == 302 else ""
+        # result urls are not language prefixed, so request the prefixed path
+        # directly rather than timing the locale redirect
+        asset_path = urlparse(location).path
+        if asset_path.startswith(project_storage.base_url):
+            client.request(
+                "geodata",
+                paths["geodata"] + asset_path[len(project_storage.base_url) :],
+            )
+
+
+def run_load_test(base_url, catalog, concurrency=10, iterations=5, seed=0):
+    """Run the scenario for simulated users concurrently
+
+    Each simulated user signs in as one of the catalog users and runs the
+    scenario the given number of times.
+
+    Returns:
+        dict: configuration, elapsed time, and per endpoint summaries
+    """
+    paths = get_paths(catalog)
+    user_ids = list(catalog.users)
+    clients = [
+        SimulatedUser(base_url, user_id, create_session(user_id))
+        for user_id in (user_ids[i % len(user_ids)] for i in range(concurrency))
+    ]
+    start = threading.Barrier(concurrency)
+
+    def simulate(index):
+        rng = random.Random(seed + index)
+        start.wait()
+        for iteration in range(iterations):
+            run_scenario(clients[index], catalog, paths, rng)
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        list(executor.map(simulate, range(concurrency)))
+    elapsed = time.perf_counter() - started
+
+    samples = [sample for client in clients for sample in client.samples]
+    return {
+        "config": {
+            "base_url": base_url,
+            "concurrency": concurrency,
+            "iterations": iterations,
+            "projects": len(catalog.projects),
+            "users": len(catalog.users),
+            "seed": seed,
+        },
+        "elapsed_seconds": round(elapsed, 3),
+        "requests": len(samples),
+        "throughput": round(len(samples) / elapsed, 3) if elapsed else None,
+        "endpoints": summarize(samples, elapsed),
+        "errors": sorted({sample.error for sample in samples if sample.error}),
+    }
+
+
+def start_server(host="127.0.0.1", port=0):
+    """Serve the application from a thread of this process
+
+    Job dispatch is stubbed for the in process server.
+
+    Returns:
+        tuple: the server and its base url
+    """
+    from django.core.servers.basehttp import (  # pylint: disable=import-outside-toplevel
+        ThreadedWSGIServer,
+        WSGIRequestHandler,
+        get_internal_wsgi_application,
+    )
+
+    settings.JOB_DISPATCH_STUB = True
+
+    class QuietRequestHandler(WSGIRequestHandler):
+        def log_message(self, format, *args):
+            pass
+
+    server = ThreadedWSGIServer((host, port), QuietRequestHandler)
+    server.set_app(get_internal_wsgi_application())
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://{host}:{server.server_port}/"
@@ -0,0 +1,242 @@
+"""Prometheus metrics shared between web and worker processes
+
+Celery prefork children and web workers each run in their own process, so
+metrics are accumulated in Redis rather than in process memory. Every
+process records into the same hashes, and the metrics view renders them in
+the Prometheus exposition format along with the current queue depth.
+
+Recording and collection are best effort, and Redis failures are logged
+rather than raised so that metrics never interrupt requests or processing,
+and the metrics view still responds while Redis is unavailable.
+"""
+import json
+import logging
+import time
+from collections import namedtuple
+from functools import lru_cache
+
+import redis
+from django.conf import settings
+from prometheus_client import CollectorRegistry, generate_latest
+from prometheus_client.core import (
+    CounterMetricFamily,
+    GaugeMetricFamily,
+    HistogramMetricFamily,
+)
+from redis.exceptions import RedisError
+
+from geodata_mart.utils.redis_client import get_redis
+
+logger = logging.getLogger(__name__)
+
+PREFIX = "geodatamart"
+KEY_PREFIX = "geodatamart:metrics"
+# seconds to keep dispatch times of tasks that are never started
+DISPATCH_TTL = 24 * 60 * 60
+# the default celery queue, split by kombu into one list per priority step
+QUEUE_NAME = "celery"
+PRIORITY_STEPS = [0, 3, 6, 9]
+PRIORITY_SEPARATOR = "\x06\x16"
+
+Metric = namedtuple("Metric", ["kind", "documentation", "labels", "buckets"])
+
+METRICS = {
+    "job_duration_seconds": Metric(
+        "histogram",
+        "Wall time of clip job attempts",
+        ["project", "state"],
+        [5, 15, 30, 60, 120, 300, 600, 900, 1800, 3600],
+    ),
+    "layer_clip_seconds": Metric(
+        "histogram",
+        "Time taken to clip a single layer",
+        ["layer_type"],
+        [0.1, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300],
+    ),
+    "queue_wait_seconds": Metric(
+        "histogram",
+        "Time clip jobs wait in the queue before a worker starts them",
+        ["priority"],
+        [0.1, 0.5, 1, 5, 15, 30, 60, 300, 900, 3600],
+    ),
+    "result_size_bytes": Metric(
+        "histogram",
+        "Size of result archives",
+        [],
+        [1e5, 1e6, 1e7, 5e7, 1e8, 5e8, 1e9, 5e9],
+    ),
+    "download_bytes": Metric(
+        "counter", "Bytes of files served for download", ["kind"], None
+    ),
+    "cache_requests": Metric(
+        "counter",
+        "Lookups of reusable outputs by cache and whether they were hits",
+        ["cache", "result"],
+        None,
+    ),
+    "progress_watchers": Metric("gauge", "Open job progress event streams", [], None),
+}
+
+
+def metric_key(name):
+    return f"{KEY_PREFIX}:{name}"
+
+
+def dispatch_key(task_id):
+    return f"{KEY_PREFIX}:dispatched:{task_id}"
+
+
+def get_field(label_values, suffix):
+    """Hash field for a series, identified by its label values and suffix"""
+    return f"{json.dumps(label_values)}|{suffix}"
+
+
+def parse_field(field):
+    label_values, suffix = field.rsplit("|", 1)
+    return tuple(json.loads(label_values)), suffix
+
+
+def get_label_values(metric, labels):
+    return [str(labels.get(label, "")) for label in metric.labels]
+
+
+def observe(name, value, **labels):
+    """Record an observation of a histogram"""
+    metric = METRICS[name]
+    label_values = get_label_values(metric, labels)
+    try:
+        pipe = get_redis().pipeline(transaction=False)
+        key = metric_key(name)
+        for bound in metric.buckets:
+            if value <= bound:
+                pipe.hincrby(key, get_field(label_values, f"le:{bound}"), 1)
+        pipe.hincrby(key, get_field(label_values, "count"), 1)
+        pipe.hincrbyfloat(key, get_field(label_values, "sum"), value)
+        pipe.execute()
+    except RedisError as e:
+        logger.warning(f"Unable to record {name}: {e}")
+
+
+def increment(name, amount=1, **labels):
+    """Increment a counter, or move a gauge by a positive or negative amount"""
+    metric = METRICS[name]
+    field = get_field(get_label_values(metric, labels), "value")
+    try:
+        get_redis().hincrbyfloat(metric_key(name), field, amount)
+    except RedisError as e:
+        logger.warning(f"Unable to record {name}: {e}")
+
+
+def mark_dispatched(task_id):
+    """Record when a task was sent, to measure its wait in the queue"""
+    try:
+        get_redis().set(dispatch_key(task_id), time.time(), ex=DISPATCH_TTL)
+    except RedisError as e:
+        logger.warning(f"Unable to record dispatch of {task_id}: {e}")
+
+
+def observe_queue_wait(task_id, priority=None):
+    """Record the queue wait of a task when a worker starts it
+
+    The dispatch time is removed once read, so retries of the task, which
+    wait for their countdown rather than for a worker, are not counted.
+    """
+    try:
+        pipe = get_redis().pipeline()
+        pipe.get(dispatch_key(task_id))
+        pipe.delete(dispatch_key(task_id))
+        dispatched, _ = pipe.execute()
+    except RedisError as e:
+        logger.warning(f"Unable to read dispatch of {task_id}: {e}")
+        return
+    if dispatched is not None:
+        observe(
+            "queue_wait_seconds",
+            max(time.time() - float(dispatched), 0),
+            priority=priority or 0,
+        )
+
+
+@lru_cache(maxsize=None)
+def get_broker():
+    """Return a Redis client for the Celery broker"""
+    return redis.Redis.from_url(settings.CELERY_BROKER_URL)
+
+
+def get_queue_depths():
+    """Number of messages waiting in the queue for each priority step"""
+    pipe = get_broker().pipeline(transaction=False)
+    for step in PRIORITY_STEPS:
+        pipe.llen(f"{QUEUE_NAME}{PRIORITY_SEPARATOR}{step}" if step else QUEUE_NAME)
+    return dict(zip(PRIORITY_STEPS, pipe.execute()))
+
+
+class RedisMetricsCollector:
+    """Collect the metrics accumulated in Redis by all processes"""
+
+    def collect(self):
+        try:
+            recorded = self.get_recorded_values()
+        except RedisError as e:
+            logger.warning(f"Unable to read metrics: {e}")
+            recorded = {}
+        for name, metric in METRICS.items():
+            yield self.get_family(name, metric, recorded.get(name, {}))
+
+        depth = GaugeMetricFamily(
+            f"{PREFIX}_queue_depth",
+            "Clip jobs waiting in the broker queue",
+            labels=["priority"],
+        )
+        try:
+            for priority, length in get_queue_depths().items():
+                depth.add_metric([str(priority)], length)
+        except RedisError as e:
+            logger.warning(f"Unable to read queue depth: {e}")
+        yield depth
+
+    def get_recorded_values(self):
+        """Read the series of every metric, keyed by name and label values"""
+        client = get_redis()
+        recorded = {}
+        for name in METRICS:
+            values = recorded[name] = {}
+            for field, value in client.hgetall(metric_key(name)).items():
+                label_values, suffix = parse_field(field.decode())
+                values.setdefault(label_values, {})[suffix] = float(value)
+        return recorded
+
+    def get_family(self, name, metric, values):
+        full_name = f"{PREFIX}_{name}"
+        if metric.kind == "histogram":
+            family = HistogramMetricFamily(
+                full_name, metric.documentation, labels=metric.labels
+            )
+            for label_values, series in values.items():
+                buckets = [
+                    (str(float(bound)), series.get(f"le:{bound}", 0))
+                    for bound in metric.buckets
+                ]
+                buckets.append(("+Inf", series.get("count", 0)))
+                family.add_metric(
+                    list(label_values), buckets, sum_value=series.get("sum", 0)
+                )
+            return family
+        if metric.kind == "counter":
+            family = CounterMetricFamily(
+                full_name, metric.documentation, labels=metric.labels
+            )
+        else:
+            family = GaugeMetricFamily(
+                full_name, metric.documentation, labels=metric.labels
+            )
+        for label_values, series in values.items():
+            family.add_metric(list(label_values), series.get("value", 0))
+        return family
+
+
+def render_metrics():
+    """Render all metrics in the Prometheus text exposition format"""
+    registry = CollectorRegistry(auto_describe=False)
+    registry.register(RedisMetricsCollector())
+    return generate_latest(registry)
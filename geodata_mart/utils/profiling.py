@@ -0,0 +1,238 @@
+"""Sampling profiler for requests and jobs
+
+A background thread periodically reads the current stack of the profiled
+thread and counts identical stacks. Nothing is hooked into the profiled code,
+so the overhead is limited to the sampling thread and can be tuned with the
+sampling interval.
+
+Stacks are kept in the collapsed (folded) format, one ``frame;frame;frame
+count`` line per distinct stack, which flamegraph.pl, speedscope and
+similar tools render as flame graphs directly.
+
+``StackSampler`` runs in the profiled process and only sees Python frames,
+while ``ProcessSampler`` runs py-spy alongside it to include native frames.
+"""
+import os
+import shutil
+import signal
+import subprocess
+import sys
+import threading
+import time
+from collections import Counter
+
+
+def get_frame_label(frame):
+    """Name of the function running in a frame, qualified by its module"""
+    module = frame.f_globals.get("__name__", "?")
+    return f"{module}:{frame.f_code.co_name}"
+
+
+def collapse_stack(frame, max_depth=None):
+    """Collapse a stack into a single root-first string
+
+    Args:
+        frame: innermost frame of the stack
+        max_depth (int): number of innermost frames to keep
+
+    Returns:
+        str: frame labels separated by semicolons
+    """
+    labels = []
+    while frame is not None:
+        labels.append(get_frame_label(frame).replace(";", ":"))
+        frame = frame.f_back
+    if max_depth:
+        labels = labels[:max_depth]
+    return ";".join(reversed(labels))
+
+
+class StackSampler:
+    """Sample the stack of a thread at a fixed interval
+
+    Use as a context manager around the code to profile, or call ``start``
+    and ``stop`` explicitly. The profiled thread defaults to the thread that
+    creates the sampler.
+    """
+
+    def __init__(self, interval=0.005, thread_id=None, max_depth=128):
+        """
+        Args:
+            interval (float): seconds between samples
+            thread_id (int): identifier of the thread to sample
+            max_depth (int): number of innermost frames kept for each stack
+        """
+        self.interval = interval
+        self.thread_id = thread_id or threading.get_ident()
+        self.max_depth = max_depth
+        self.stacks = Counter()
+        self.samples = 0
+        self.started = None
+        self.stopped = None
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        self.started = time.perf_counter()
+        self._thread = threading.Thread(
+            target=self.run, name="stack-sampler", daemon=True
+        )
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+        self.stopped = time.perf_counter()
+        return self
+
+    def run(self):
+        while not self._stop.wait(self.interval):
+            self.sample()
+
+    def sample(self):
+        frame = sys._current_frames().get(self.thread_id)
+        if frame is None:
+            return
+        self.stacks[collapse_stack(frame, self.max_depth)] += 1
+        self.samples += 1
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *args):
+        self.stop()
+
+    @property
+    def duration(self):
+        if self.started is None:
+            return 0
+        return round((self.stopped or time.perf_counter()) - self.started, 6)
+
+    def folded(self):
+        """Sampled stacks in the collapsed format, most frequent first"""
+        return "\n".join(
+            f"{stack} {count}" for stack, count in self.stacks.most_common()
+        )
+
+
+def parse_folded(folded):
+    """Read collapsed stacks back into counts by stack"""
+    stacks = Counter()
+    for line in (folded or "").splitlines():
+        stack, _, count = line.rpartition(" ")
+        if stack and count.isdigit():
+            stacks[stack] += int(count)
+    return stacks
+
+
+def get_top_functions(folded, count=20):
+    """Functions that were running in the most samples
+
+    Returns:
+        list: tuples of the function, the samples in which it was running
+        (self) and the samples in which it was on the stack (total)
+    """
+    own = Counter()
+    total = Counter()
+    for stack, samples in parse_folded(folded).items():
+        frames = stack.split(";")
+        own[frames[-1]] += samples
+        for frame in set(frames):
+            total[frame] += samples
+    return [
+        (function, samples, total[function])
+        for function, samples in own.most_common(count)
+    ]
+
+
+class ProcessSampler:
+    """Sample a whole process with py-spy, including native frames
+
+    py-spy reads the stacks of the process from outside, so frames inside
+    C and C++ extensions are included and code holding the GIL is still
+    sampled. It needs permission to trace the process, such as the
+    ``SYS_PTRACE`` capability in a container.
+    """
+
+    def __init__(self, path, interval=0.01, pid=None, executable="py-spy"):
+        """
+        Args:
+            path (str): file py-spy writes the collapsed stacks to
+            interval (float): seconds between samples
+            pid (int): process to sample, defaults to the current process
+            executable (str): py-spy command
+        """
+        self.path = path
+        self.interval = interval
+        self.pid = pid or os.getpid()
+        self.executable = executable
+        self.started = None
+        self.stopped = None
+        self._process = None
+
+    @classmethod
+    def is_available(cls, executable="py-spy"):
+        return shutil.which(executable) is not None
+
+    def start(self):
+        self.started = time.perf_counter()
+        self._process = subprocess.Popen(
+            [
+                self.executable,
+                "record",
+                "--pid",
+                str(self.pid),
+                "--rate",
+                str(max(int(1 / self.interval), 1)),
+                "--format",
+                "raw",
+                "--native",
+                "--output",
+                self.path,
+            ],
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.PIPE,
+        )
+        return self
+
+    def stop(self, timeout=30):
+        """Stop sampling, which writes the collected stacks to the output file
+
+        Raises:
+            RuntimeError: if py-spy failed rather than being stopped
+        """
+        self.stopped = time.perf_counter()
+        if self._process.poll() is None:
+            self._process.send_signal(signal.SIGINT)
+        try:
+            _, stderr = self._process.communicate(timeout=timeout)
+        except subprocess.TimeoutExpired:
+            self._process.kill()
+            _, stderr = self._process.communicate()
+        if not os.path.exists(self.path):
+            raise RuntimeError(f"py-spy failed: {stderr.decode(errors='replace')}")
+        return self
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *args):
+        self.stop()
+
+    @property
+    def duration(self):
+        if self.started is None:
+            return 0
+        return round((self.stopped or time.perf_counter()) - self.started, 6)
+
+    @property
+    def samples(self):
+        return sum(parse_folded(self.folded()).values())
+
+    def folded(self):
+        if not os.path.exists(self.path):
+            return ""
+        with open(self.path) as f:
+            return f.read()
@@ -2,7 +2,19 @@ import os.path
 import shutil
 import glob
 from pathlib import Path
-from qgis.core import QgsApplication
+from qgis.core import (
+    QgsApplication,
+    QgsCoordinateReferenceSystem,
+    QgsCoordinateTransform,
+    QgsCsException,
+    QgsMeshLayer,
+    QgsProject,
+    QgsProviderRegistry,
+    QgsRasterLayer,
+    QgsVectorLayer,
+    QgsVectorTileLayer,
+    QgsWkbTypes,
+)
 from processing.script import ScriptUtils
 
 def migrateProcessingScripts():
@@ -23,3 +35,125 @@ def migrateProcessingScripts():
     # Refresh algorithms
     if count and QgsApplication.processingRegistry().providerById("script"):
         QgsApplication.processingRegistry().providerById("script").refreshAlgorithms()
+
+
+def startQgisApplication(profileFolder="/root/.local/share/profiles/default/"):
+    """Start a headless QGIS application for worker side processing
+
+    Returns:
+        QgsApplication: the initialised application, to be closed with exitQgis()
+    """
+    os.environ["QT_QPA_PLATFORM"] = "offscreen"
+    qgs = QgsApplication(
+        argv=[],
+        GUIenabled=False,
+        profileFolder=profileFolder,
+        platformName="external",
+    )
+    qgs.setPrefixPath("/usr", useDefaultPaths=True)
+    qgs.setMaxThreads(1)
+    qgs.initQgis()
+    return qgs
+
+
+def getLayerKind(layer):
+    """Classify a map layer by its layer type and data provider
+
+    Returns:
+        string: one of vector, table, wfs, raster, wms, xyz, mesh, vectortile, other
+    """
+    provider = layer.providerType()
+    if isinstance(layer, QgsVectorLayer):
+        if provider in ("WFS", "wfs", "oapif"):
+            return "wfs"
+        if not layer.isSpatial():
+            return "table"
+        return "vector"
+    if isinstance(layer, QgsRasterLayer):
+        if provider == "wms":
+            return "xyz" if "type=xyz" in layer.source() else "wms"
+        return "raster"
+    if isinstance(layer, QgsMeshLayer):
+        return "mesh"
+    if isinstance(layer, QgsVectorTileLayer):
+        return "vectortile"
+    return "other"
+
+
+def getLayerSourceSize(layer):
+    """Size in bytes of a file based layer source, or None for other sources"""
+    uri = QgsProviderRegistry.instance().decodeUri(layer.providerType(), layer.source())
+    path = uri.get("path")
+    if path and os.path.isfile(path):
+        return os.path.getsize(path)
+    return None
+
+
+def getLayerSummary(layer, project):
+    """Describe a map layer for the layer catalog
+
+    Extents are transformed to WGS84 so that they can be compared with job
+    clip geometries and project coverage.
+
+    Returns:
+        dict: short_name, layer_name, abstract, kind, crs, bbox (xmin, ymin,
+            xmax, ymax or None), geometry_type, feature_count, pixel_count,
+            and source_size
+    """
+    summary = {
+        "short_name": layer.shortName() or layer.name(),
+        "layer_name": layer.name(),
+        "abstract": layer.abstract(),
+        "kind": getLayerKind(layer),
+        "crs": layer.crs().authid() or None,
+        "bbox": None,
+        "geometry_type": None,
+        "feature_count": None,
+        "pixel_count": None,
+        "source_size": getLayerSourceSize(layer),
+    }
+
+    extent = layer.extent()
+    if layer.isValid() and not extent.isNull() and not extent.isEmpty():
+        try:
+            transform = QgsCoordinateTransform(
+                layer.crs(),
+                QgsCoordinateReferenceSystem("EPSG:4326"),
+                project.transformContext(),
+            )
+            extent = transform.transformBoundingBox(extent)
+            summary["bbox"] = (
+                extent.xMinimum(),
+                extent.yMinimum(),
+                extent.xMaximum(),
+                extent.yMaximum(),
+            )
+        except QgsCsException:
+            pass
+
+    if isinstance(layer, QgsVectorLayer):
+        summary["geometry_type"] = QgsWkbTypes.displayString(layer.wkbType())
+        feature_count = layer.featureCount()
+        summary["feature_count"] = feature_count if feature_count >= 0 else None
+    elif isinstance(layer, QgsRasterLayer) and summary["kind"] == "raster":
+        summary["pixel_count"] = layer.width() * layer.height()
+
+    return summary
+
+
+def readProjectLayers(projectPath):
+    """Open a QGIS project file once and summarise each of its layers
+
+    Returns:
+        list: layer summaries from getLayerSummary
+    """
+    readflags = QgsProject.ReadFlags()
+    readflags |= QgsProject.FlagDontLoadLayouts | QgsProject.FlagTrustLayerMetadata
+    project = QgsProject()
+    if not project.read(projectPath, readflags):
+        raise ValueError(f"Unable to read QGIS project {projectPath}")
+    summaries = [
+        getLayerSummary(layer, project) for layer in project.mapLayers().values()
+    ]
+    project.clear()
+    return summaries
@@ -0,0 +1,26 @@
+"""Shared Redis connections for job events and coordination
+
+Connections are created lazily and cached per process. redis-py connection
+pools detect forked processes and reconnect, so the cached clients are safe
+to use from Celery prefork children.
+"""
+from functools import lru_cache
+
+import redis
+from django.conf import settings
+
+
+@lru_cache(maxsize=None)
+def get_redis():
+    """Return the synchronous Redis client for this process"""
+    return redis.Redis.from_url(settings.REDIS_URL)
+
+
+def get_async_redis():
+    """Return a new asyncio Redis client
+
+    Async clients are bound to the running event loop, so they are not cached.
+    """
+    from redis import asyncio as aioredis  # pylint: disable=import-outside-toplevel
+
+    return aioredis.Redis.from_url(settings.REDIS_URL)
@@ -0,0 +1,70 @@
+"""Stage timers for processing jobs
+
+Records how long each stage of a job takes, so slow jobs can be traced to
+QGIS start up, project loading, individual layers, packaging or storage
+rather than only to their total duration.
+"""
+import time
+from contextlib import contextmanager
+
+from geodata_mart.utils.tracing import record_span
+
+
+class StageTimer:
+    """Record consecutive and nested stage durations
+
+    ``lap`` closes the stage running since the previous lap, which suits
+    linear task code, while ``stage`` times a block on its own. When given
+    a span, each stage is also recorded as a child span of it.
+    """
+
+    def __init__(self, span=None):
+        self.started = time.perf_counter()
+        self.last = self.started
+        self.stages = {}
+        self.span = span
+        self.spans = {}
+
+    def record(self, name, seconds):
+        """Add a duration ending now to a stage, accumulating stages that repeat"""
+        self.stages[name] = round(self.stages.get(name, 0) + seconds, 6)
+        if self.span is not None:
+            end = time.time()
+            self.spans[name] = record_span(name, end - seconds, end, parent=self.span)
+
+    def lap(self, name):
+        """Record the time since the previous lap as a stage"""
+        now = time.perf_counter()
+        self.record(name, now - self.last)
+        self.last = now
+
+    @contextmanager
+    def stage(self, name):
+        """Time the enclosed block as a stage"""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(name, time.perf_counter() - started)
+
+    def elapsed(self):
+        return round(time.perf_counter() - self.started, 6)
+
+    def as_dict(self, **extra):
+        """Serializable summary of the recorded stages
+
+        Args:
+            extra: additional metrics to include in the summary
+
+        Returns:
+            dict: stage durations in seconds and the total elapsed time
+        """
+        return dict(stages=dict(self.stages), total_seconds=self.elapsed(), **extra)
+
+
+def get_slowest_layers(metrics, count=5):
+    """Return the slowest layers recorded in job metrics"""
+    layers = (metrics or {}).get("algorithm", {}).get("layers", [])
+    return sorted(layers, key=lambda layer: layer.get("seconds", 0), reverse=True)[
+        :count
+    ]
@@ -0,0 +1,189 @@
+"""Trace spans for jobs from submission through processing
+
+A trace is started when a job is submitted and its W3C ``traceparent`` is
+stored on the job. Dispatching the job sends the context in the Celery
+message headers, so the task, the queue wait and the spans reported by the
+clip algorithm are all recorded in the same trace as the web requests.
+
+Finished spans are handed to the exporter named by ``TRACING_EXPORTER``.
+The file exporter appends spans as JSON lines for local use, and other
+exporters only need an ``export(span)`` method.
+"""
+import json
+import logging
+import os
+import secrets
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import lru_cache
+
+from django.conf import settings
+from django.utils.module_loading import import_string
+
+logger = logging.getLogger(__name__)
+
+TRACEPARENT_HEADER = "traceparent"
+current_span = ContextVar("current_span", default=None)
+
+
+def parse_traceparent(traceparent):
+    """Split a W3C traceparent into its trace and parent span ids
+
+    Returns:
+        tuple: trace id and span id, or None if the value is not valid
+    """
+    try:
+        version, trace_id, span_id, flags = traceparent.split("-")
+        int(trace_id, 16), int(span_id, 16)
+    except (AttributeError, ValueError):
+        return None
+    if len(trace_id) != 32 or len(span_id) != 16 or set(trace_id) == {"0"}:
+        return None
+    return trace_id, span_id
+
+
+def format_traceparent(trace_id, span_id):
+    return f"00-{trace_id}-{span_id}-01"
+
+
+class Span:
+    """A timed operation within a trace"""
+
+    def __init__(self, name, parent=None, start=None, **attributes):
+        """
+        Args:
+            name (str): operation name
+            parent (Span or str): parent span, or the traceparent of a span
+                in another process; a new trace is started without one
+            start (float): start time in epoch seconds, defaults to now
+            attributes: details recorded with the span
+        """
+        if isinstance(parent, Span):
+            self.trace_id, self.parent_id = parent.trace_id, parent.span_id
+        else:
+            self.trace_id, self.parent_id = parse_traceparent(parent) or (
+                secrets.token_hex(16),
+                None,
+            )
+        self.span_id = secrets.token_hex(8)
+        self.name = name
+        self.start = start if start is not None else time.time()
+        self.end = None
+        self.status = "ok"
+        self.attributes = attributes
+
+    @property
+    def traceparent(self):
+        return format_traceparent(self.trace_id, self.span_id)
+
+    def set_error(self, error):
+        self.status = "error"
+        self.attributes["error"] = str(error)
+
+    def finish(self, end=None):
+        """End the span and export it"""
+        if self.end is not None:
+            return
+        self.end = end if end is not None else time.time()
+        export_span(self)
+
+    def as_dict(self):
+        return {
+            "trace_id": self.trace_id,
+            "span_id": self.span_id,
+            "parent_id": self.parent_id,
+            "name": self.name,
+            "start": self.start,
+            "end": self.end,
+            "duration": round(self.end - self.start, 6) if self.end else None,
+            "status": self.status,
+            "attributes": self.attributes,
+        }
+
+
+@contextmanager
+def trace(name, parent=None, **attributes):
+    """Run the enclosed block in a span, parented to the current span
+
+    Yields:
+        Span: the active span
+    """
+    span = Span(name, parent=parent or current_span.get(), **attributes)
+    token = current_span.set(span)
+    try:
+        yield span
+    except Exception as e:
+        span.set_error(e)
+        raise
+    finally:
+        current_span.reset(token)
+        span.finish()
+
+
+def record_span(name, start, end, parent=None, **attributes):
+    """Export a span for an operation that has already completed
+
+    Returns:
+        Span: the recorded span
+    """
+    span = Span(name, parent=parent, start=start, **attributes)
+    span.finish(end)
+    return span
+
+
+def get_current_traceparent():
+    span = current_span.get()
+    return span.traceparent if span else None
+
+
+class NullExporter:
+    """Discard spans when tracing is not configured"""
+
+    def export(self, span):
+        pass
+
+
+class LoggingExporter:
+    """Log spans, for collection with the application logs"""
+
+    def export(self, span):
+        logger.info(f"span {json.dumps(span.as_dict())}")
+
+
+class FileExporter:
+    """Append spans as JSON lines to a file
+
+    Each span is written with a single append, so web and worker processes
+    can share a file.
+    """
+
+    def __init__(self, path=None):
+        self.path = path or settings.TRACING_FILE
+        self.lock = threading.Lock()
+
+    def export(self, span):
+        line = (json.dumps(span.as_dict()) + "\n").encode()
+        with self.lock:
+            fd = os.open(self.path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+            try:
+                os.write(fd, line)
+            finally:
+                os.close(fd)
+
+
+@lru_cache(maxsize=None)
+def get_exporter():
+    """Return the configured span exporter for this process"""
+    if not settings.TRACING_EXPORTER:
+        return NullExporter()
+    return import_string(settings.TRACING_EXPORTER)()
+
+
+def export_span(span):
+    """Export a finished span, logging rather than raising failures"""
+    try:
+        get_exporter().export(span)
+    except Exception as e:
+        logger.warning(f"Unable to export span {span.name}: {e}")
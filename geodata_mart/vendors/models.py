@@ -5,7 +5,6 @@ from django.utils.translation import gettext_lazy as _
 
 import uuid
 from versatileimagefield.fields import VersatileImageField
-from PIL import Image
 
 from django.core.files.storage import FileSystemStorage
 from django.conf import settings
@@ -93,43 +92,11 @@ class Vendor(models.Model):
 
 
 @receiver(post_save, sender=Vendor)
-def resize_logo(sender, instance, **kwargs):
-    """Resize the provided image to a maximum size of 600x600"""
-    try:
-        record_instance = sender.objects.get(pk=instance.pk)
-    except sender.DoesNotExist:
-        return
+def queue_image_renditions(sender, instance, **kwargs):
+    """Queue background resizing and renditions for new or replaced images"""
+    from geodata_mart.maps.renditions import queue_renditions
 
-    if not record_instance.logo or not project_storage.exists(
-        record_instance.logo.path
-    ):
-        return
-
-    logo_size = (600, 600)
-    logo_image = Image.open(record_instance.logo.path)
-    if logo_image.size[0] > logo_size[0] or logo_image.size[1] > logo_size[1]:
-        logo_image.thumbnail(logo_size, resample=Image.Resampling.BICUBIC)
-        logo_image.save(record_instance.logo.path)
-
-
-@receiver(post_save, sender=Vendor)
-def resize_media(sender, instance, **kwargs):
-    """Resize the provided image to a maximum size of 1200x1200"""
-    try:
-        record_instance = sender.objects.get(pk=instance.pk)
-    except sender.DoesNotExist:
-        return
-
-    if not record_instance.media or not project_storage.exists(
-        record_instance.media.path
-    ):
-        return
-
-    media_size = (1200, 1200)
-    media_image = Image.open(record_instance.media.path)
-    if media_image.size[0] > media_size[0] or media_image.size[1] > media_size[1]:
-        media_image.thumbnail(media_size, resample=Image.Resampling.BICUBIC)
-        media_image.save(record_instance.media.path)
+    queue_renditions(instance)
 
 
 class VendorMessage(models.Model):
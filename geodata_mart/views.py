@@ -2,17 +2,49 @@ from django.http import Http404, HttpResponse, HttpResponseForbidden
 from django.core.exceptions import PermissionDenied
 from django.contrib.auth.decorators import login_required
 
+import hmac
 import mimetypes
 from pathlib import Path
 from urllib.parse import unquote
 from django.conf import settings
 from geodata_mart.maps.models import project_storage
+from geodata_mart.utils.metrics import increment, render_metrics
 
 import logging
 
 logger = logging.getLogger(__name__)
 
 
+def record_download(filepath, base_dir):
+    """Count the bytes served, by the top level directory of the file"""
+    try:
+        kind = filepath.relative_to(base_dir).parts[0]
+    except (ValueError, IndexError):
+        kind = "other"
+    increment("download_bytes", project_storage.size(filepath), kind=kind)
+
+
+def metrics(request):
+    """Expose application metrics for Prometheus
+
+    Scrapers authenticate with the configured bearer token, otherwise the
+    metrics are only shown to staff.
+    """
+    token = settings.METRICS_TOKEN
+    authorization = request.headers.get("Authorization", "")
+    # compared as bytes, since compare_digest rejects non-ASCII strings
+    authorized = token and hmac.compare_digest(
+        authorization.encode(), f"Bearer {token}".encode()
+    )
+    if not authorized and not (
+        request.user.is_authenticated and request.user.is_staff
+    ):
+        return HttpResponseForbidden()
+    return HttpResponse(
+        render_metrics(), content_type="text/plain; version=0.0.4; charset=utf-8"
+    )
+
+
 def geodata(request, path):
     if request.method == "GET":
         BASE_DIR = Path(settings.QGIS_DATA_ROOT)
@@ -44,6 +76,7 @@ def geodata(request, path):
             response = HttpResponse(result, content_type=mime_type)
             response["Content-Disposition"] = f"attachment; filename={filename}"
             logger.info(f"{filename} downloaded by {request.user.id}")
+            record_download(filepath, BASE_DIR)
             return response
         elif project_storage.exists(filepath) and not is_public:
             raise PermissionDenied()
@@ -55,6 +88,7 @@ def geodata(request, path):
             response = HttpResponse(result, content_type=mime_type)
             response["Content-Disposition"] = f"attachment; filename={filename}"
             logger.info(f"{filename} downloaded by {request.user.id}")
+            record_download(filepath, BASE_DIR)
             return response
         else:
             raise Http404("File does not exist")
@@ -0,0 +1,51 @@
+from django.contrib import admin
+from django.utils import timezone
+from django.utils.translation import gettext_lazy as _
+
+from geodata_mart.webhooks import models
+
+
+@admin.register(models.WebhookEndpoint)
+class WebhookEndpointAdmin(admin.ModelAdmin):
+    """Registered webhook endpoints"""
+
+    list_display = ("id", "url", "user", "job", "is_active", "created_date")
+    list_display_links = ("id", "url")
+    list_filter = ("is_active",)
+    search_fields = ("url", "user__username", "job__job_id")
+    raw_id_fields = ("user", "job")
+    readonly_fields = ("created_date", "updated_date")
+
+
+@admin.register(models.WebhookDelivery)
+class WebhookDeliveryAdmin(admin.ModelAdmin):
+    """Queued and completed webhook deliveries"""
+
+    list_display = (
+        "id",
+        "endpoint",
+        "event",
+        "state",
+        "attempts",
+        "response_code",
+        "next_attempt_date",
+        "delivered_date",
+    )
+    list_display_links = ("id",)
+    list_filter = ("state", "event")
+    search_fields = ("endpoint__url",)
+    raw_id_fields = ("endpoint",)
+    ordering = ("-created_date",)
+    actions = ["retry_deliveries"]
+
+    @admin.action(description=_("Retry selected deliveries"))
+    def retry_deliveries(self, request, queryset):
+        from geodata_mart.webhooks.tasks import deliver_webhooks
+
+        queryset.exclude(
+            state=models.WebhookDelivery.DeliveryStateChoices.DELIVERED
+        ).update(
+            state=models.WebhookDelivery.DeliveryStateChoices.RETRYING,
+            next_attempt_date=timezone.now(),
+        )
+        deliver_webhooks.delay()
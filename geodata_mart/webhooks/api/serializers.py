@@ -0,0 +1,23 @@
+from rest_framework import serializers
+
+from geodata_mart.maps.models import Job
+from geodata_mart.webhooks.models import WebhookEndpoint
+
+
+class WebhookEndpointSerializer(serializers.ModelSerializer):
+    job = serializers.SlugRelatedField(
+        slug_field="job_id",
+        queryset=Job.objects.all(),
+        required=False,
+        allow_null=True,
+    )
+
+    class Meta:
+        model = WebhookEndpoint
+        fields = ["id", "url", "job", "secret", "is_active", "created_date"]
+        read_only_fields = ["secret", "created_date"]
+
+    def validate_job(self, job):
+        if job is not None and job.user_id_id != self.context["request"].user.id:
+            raise serializers.ValidationError("Job not found.")
+        return job
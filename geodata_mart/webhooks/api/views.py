@@ -0,0 +1,16 @@
+from rest_framework.viewsets import ModelViewSet
+
+from geodata_mart.webhooks.models import WebhookEndpoint
+
+from .serializers import WebhookEndpointSerializer
+
+
+class WebhookEndpointViewSet(ModelViewSet):
+    serializer_class = WebhookEndpointSerializer
+    queryset = WebhookEndpoint.objects.select_related("job")
+
+    def get_queryset(self, *args, **kwargs):
+        return self.queryset.filter(user=self.request.user)
+
+    def perform_create(self, serializer):
+        serializer.save(user=self.request.user)
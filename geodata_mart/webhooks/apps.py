@@ -0,0 +1,14 @@
+from django.apps import AppConfig
+from django.utils.translation import gettext_lazy as _
+
+
+class WebhooksConfig(AppConfig):
+    default_auto_field = "django.db.models.BigAutoField"
+    name = "geodata_mart.webhooks"
+    verbose_name = _("Webhooks")
+
+    def ready(self):
+        try:
+            import geodata_mart.webhooks.signals  # noqa F401
+        except ImportError:
+            pass
@@ -0,0 +1,62 @@
+# Generated by Django 3.2.13 on 2026-10-19 11:02
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+import django.utils.timezone
+import geodata_mart.webhooks.models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('maps', '0005_layer_job_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='WebhookEndpoint',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('url', models.URLField(max_length=1024, verbose_name='Callback URL')),
+                ('secret', models.CharField(default=geodata_mart.webhooks.models.generate_secret, max_length=128, verbose_name='Signing Secret')),
+                ('is_active', models.BooleanField(default=True, verbose_name='Active')),
+                ('created_date', models.DateTimeField(auto_now_add=True, verbose_name='Created Date')),
+                ('updated_date', models.DateTimeField(auto_now=True, verbose_name='Updated Date')),
+                ('job', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='webhook_endpoints', to='maps.job', verbose_name='Job')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='webhook_endpoints', to=settings.AUTH_USER_MODEL, verbose_name='User')),
+            ],
+            options={
+                'verbose_name': 'Webhook Endpoint',
+                'verbose_name_plural': 'Webhook Endpoints',
+            },
+        ),
+        migrations.CreateModel(
+            name='WebhookDelivery',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('event', models.CharField(max_length=64, verbose_name='Event')),
+                ('payload', models.JSONField(verbose_name='Payload')),
+                ('state', models.IntegerField(choices=[(0, 'Pending'), (1, 'Delivered'), (2, 'Retrying'), (3, 'Failed')], default=0)),
+                ('attempts', models.PositiveIntegerField(default=0, verbose_name='Attempts')),
+                ('response_code', models.IntegerField(blank=True, null=True, verbose_name='Response Code')),
+                ('last_error', models.TextField(blank=True, null=True, verbose_name='Last Error')),
+                ('next_attempt_date', models.DateTimeField(default=django.utils.timezone.now, verbose_name='Next Attempt Date')),
+                ('delivered_date', models.DateTimeField(blank=True, null=True, verbose_name='Delivered Date')),
+                ('created_date', models.DateTimeField(auto_now_add=True, verbose_name='Created Date')),
+                ('updated_date', models.DateTimeField(auto_now=True, verbose_name='Updated Date')),
+                ('endpoint', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='deliveries', to='webhooks.webhookendpoint', verbose_name='Endpoint')),
+            ],
+            options={
+                'verbose_name': 'Webhook Delivery',
+                'verbose_name_plural': 'Webhook Deliveries',
+            },
+        ),
+        migrations.AddIndex(
+            model_name='webhookdelivery',
+            index=models.Index(fields=['state', 'next_attempt_date'], name='webhooks_delivery_due_idx'),
+        ),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 3.2.13 on 2026-10-19 18:20
+
+import django.core.validators
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('webhooks', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='webhookendpoint',
+            name='url',
+            field=models.URLField(max_length=1024, validators=[django.core.validators.URLValidator(schemes=['http', 'https'])], verbose_name='Callback URL'),
+        ),
+    ]
@@ -0,0 +1,107 @@
+import secrets
+
+from django.core.validators import URLValidator
+from django.db import models
+from django.utils import timezone
+from django.utils.translation import gettext_lazy as _
+
+
+def generate_secret():
+    """Generate a signing secret for a webhook endpoint"""
+    return secrets.token_hex(32)
+
+
+class WebhookEndpoint(models.Model):
+    """Callback registrations for job state changes
+
+    Endpoints without a job receive events for every job belonging to the
+    user, while endpoints with a job only receive events for that job.
+    """
+
+    user = models.ForeignKey(
+        "users.User",
+        on_delete=models.CASCADE,
+        verbose_name=_("User"),
+        related_name="webhook_endpoints",
+    )
+    job = models.ForeignKey(
+        "maps.Job",
+        on_delete=models.CASCADE,
+        verbose_name=_("Job"),
+        related_name="webhook_endpoints",
+        blank=True,
+        null=True,
+    )
+    url = models.URLField(
+        _("Callback URL"),
+        max_length=1024,
+        validators=[URLValidator(schemes=["http", "https"])],
+    )
+    secret = models.CharField(
+        _("Signing Secret"), max_length=128, default=generate_secret
+    )
+    is_active = models.BooleanField(_("Active"), default=True)
+    created_date = models.DateTimeField(
+        auto_now_add=True, verbose_name=_("Created Date")
+    )
+    updated_date = models.DateTimeField(auto_now=True, verbose_name=_("Updated Date"))
+
+    class Meta:
+        verbose_name = _("Webhook Endpoint")
+        verbose_name_plural = _("Webhook Endpoints")
+
+    def __str__(self):
+        return self.url
+
+
+class WebhookDelivery(models.Model):
+    """Queued callback for a single job event
+
+    Deliveries that are due are grouped by endpoint and sent as one batch,
+    and failed deliveries are retried with exponential backoff.
+    """
+
+    class DeliveryStateChoices(models.IntegerChoices):
+        """State choices for webhook deliveries"""
+
+        PENDING = 0, _("Pending")
+        DELIVERED = 1, _("Delivered")
+        RETRYING = 2, _("Retrying")
+        FAILED = 3, _("Failed")
+
+    endpoint = models.ForeignKey(
+        WebhookEndpoint,
+        on_delete=models.CASCADE,
+        verbose_name=_("Endpoint"),
+        related_name="deliveries",
+    )
+    event = models.CharField(_("Event"), max_length=64)
+    payload = models.JSONField(_("Payload"))
+    state = models.IntegerField(
+        choices=DeliveryStateChoices.choices,
+        default=DeliveryStateChoices.PENDING,
+    )
+    attempts = models.PositiveIntegerField(_("Attempts"), default=0)
+    response_code = models.IntegerField(_("Response Code"), blank=True, null=True)
+    last_error = models.TextField(_("Last Error"), blank=True, null=True)
+    next_attempt_date = models.DateTimeField(
+        _("Next Attempt Date"), default=timezone.now
+    )
+    delivered_date = models.DateTimeField(_("Delivered Date"), blank=True, null=True)
+    created_date = models.DateTimeField(
+        auto_now_add=True, verbose_name=_("Created Date")
+    )
+    updated_date = models.DateTimeField(auto_now=True, verbose_name=_("Updated Date"))
+
+    class Meta:
+        verbose_name = _("Webhook Delivery")
+        verbose_name_plural = _("Webhook Deliveries")
+        indexes = [
+            models.Index(
+                fields=["state", "next_attempt_date"],
+                name="webhooks_delivery_due_idx",
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.event} ({self.endpoint})"
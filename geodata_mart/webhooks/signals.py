@@ -0,0 +1,35 @@
+from django.db import transaction
+from django.db.models.signals import post_save, pre_save
+from django.dispatch import receiver
+
+from geodata_mart.maps.models import Job
+
+# Job states which are reported to registered webhook endpoints
+NOTIFY_STATES = (
+    Job.JobStateChoices.PROCESSED,
+    Job.JobStateChoices.FAILED,
+    Job.JobStateChoices.UNKNOWN,
+)
+
+
+@receiver(pre_save, sender=Job)
+def track_job_state(sender, instance, **kwargs):
+    """Record the stored job state so that state changes can be detected"""
+    instance._previous_state = (
+        sender.objects.filter(pk=instance.pk).values_list("state", flat=True).first()
+        if instance.pk
+        else None
+    )
+
+
+@receiver(post_save, sender=Job)
+def queue_job_webhooks(sender, instance, **kwargs):
+    """Queue webhook deliveries when a job changes to a reported state"""
+    previous_state = getattr(instance, "_previous_state", None)
+    if instance.state not in NOTIFY_STATES or instance.state == previous_state:
+        return
+
+    from geodata_mart.webhooks.tasks import queue_job_event
+
+    job_pk, state = instance.pk, instance.state
+    transaction.on_commit(lambda: queue_job_event.delay(job_pk, state))
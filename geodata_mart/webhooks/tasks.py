@@ -0,0 +1,278 @@
+import hashlib
+import hmac
+import http.client
+import ipaddress
+import json
+import socket
+import time
+from collections import defaultdict
+from datetime import timedelta
+from urllib.error import HTTPError, URLError
+from urllib.parse import urlsplit
+from urllib.request import (
+    HTTPHandler,
+    HTTPRedirectHandler,
+    HTTPSHandler,
+    ProxyHandler,
+    Request,
+    build_opener,
+)
+
+from celery.utils.log import get_task_logger
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from config import celery_app
+from geodata_mart.maps.models import Job
+from geodata_mart.webhooks.models import WebhookDelivery, WebhookEndpoint
+
+logger = get_task_logger(__name__)
+
+DUE_STATES = (
+    WebhookDelivery.DeliveryStateChoices.PENDING,
+    WebhookDelivery.DeliveryStateChoices.RETRYING,
+)
+
+
+class BlockedDestinationError(URLError):
+    """Webhook URL that resolves to an address workers must not call"""
+
+
+class NoRedirectHandler(HTTPRedirectHandler):
+    """Fail deliveries that redirect, since the target was not checked"""
+
+    def redirect_request(self, req, fp, code, msg, headers, newurl):
+        raise HTTPError(req.full_url, code, f"Redirected to {newurl}", headers, fp)
+
+
+def pin_connection(connection_class, address):
+    """Connection factory which connects to a resolved address for any host
+
+    The host name is still used for the Host header and for TLS server name
+    indication and certificate checks.
+    """
+
+    def connect(host, **kwargs):
+        connection = connection_class(host, **kwargs)
+        connection._create_connection = lambda host_port, *args: (
+            socket.create_connection((address, host_port[1]), *args)
+        )
+        return connection
+
+    return connect
+
+
+class PinnedHTTPHandler(HTTPHandler):
+    def __init__(self, address):
+        super().__init__()
+        self.address = address
+
+    def http_open(self, req):
+        return self.do_open(
+            pin_connection(http.client.HTTPConnection, self.address), req
+        )
+
+
+class PinnedHTTPSHandler(HTTPSHandler):
+    def __init__(self, address):
+        super().__init__()
+        self.address = address
+
+    def https_open(self, req):
+        return self.do_open(
+            pin_connection(http.client.HTTPSConnection, self.address),
+            req,
+            context=self._context,
+        )
+
+
+def check_destination(url):
+    """Resolve the host of a webhook URL and reject internal addresses
+
+    Endpoints are registered by users, so deliveries must not reach the
+    loopback, link-local (including cloud metadata services), private or
+    other non-public addresses of the network the workers run in.
+
+    Returns:
+        str: the checked address to connect to
+
+    Raises:
+        BlockedDestinationError: if the URL is not an allowed destination
+    """
+    parts = urlsplit(url)
+    if parts.scheme not in ("http", "https") or not parts.hostname:
+        raise BlockedDestinationError(f"Unsupported webhook URL {url}")
+    port = parts.port or (443 if parts.scheme == "https" else 80)
+    try:
+        addresses = socket.getaddrinfo(parts.hostname, port, type=socket.SOCK_STREAM)
+    except socket.gaierror as e:
+        raise URLError(e)
+    for *_, sockaddr in addresses:
+        address = ipaddress.ip_address(sockaddr[0].split("%")[0])
+        if not address.is_global or address.is_multicast:
+            raise BlockedDestinationError(
+                f"{parts.hostname} resolves to the non-public address {address}"
+            )
+    return addresses[0][4][0]
+
+
+def sign_payload(secret, timestamp, body):
+    """Return the HMAC-SHA256 signature for a timestamped request body"""
+    message = f"{timestamp}.".encode() + body
+    return hmac.new(secret.encode(), message, hashlib.sha256).hexdigest()
+
+
+def send_webhook(endpoint, events):
+    """POST a batch of events to an endpoint and return the response code
+
+    The request carries a timestamp and a signature over the timestamp and
+    body so that receivers can verify the sender and reject replays. The
+    destination is checked before each delivery and the request is sent to
+    the checked address, so the host cannot be resolved again to another
+    address. Redirects and proxies are not followed.
+    """
+    address = check_destination(endpoint.url)
+    body = json.dumps({"events": events}).encode()
+    timestamp = str(int(time.time()))
+    request = Request(
+        endpoint.url,
+        data=body,
+        method="POST",
+        headers={
+            "Content-Type": "application/json",
+            "User-Agent": "GeodataMart-Webhooks/1.0",
+            "X-GeodataMart-Timestamp": timestamp,
+            "X-GeodataMart-Signature": "sha256="
+            + sign_payload(endpoint.secret, timestamp, body),
+        },
+    )
+    opener = build_opener(
+        ProxyHandler({}),
+        PinnedHTTPHandler(address),
+        PinnedHTTPSHandler(address),
+        NoRedirectHandler,
+    )
+    with opener.open(request, timeout=settings.WEBHOOK_TIMEOUT) as response:
+        return response.status
+
+
+def get_retry_delay(attempts):
+    """Exponential backoff delay for the given number of failed attempts"""
+    delay = settings.WEBHOOK_RETRY_DELAY * (2 ** (attempts - 1))
+    return timedelta(seconds=min(delay, settings.WEBHOOK_RETRY_MAX_DELAY))
+
+
+def get_job_payload(job, state):
+    return {
+        "event": "job.state_changed",
+        "job_id": str(job.job_id),
+        "project": job.project_id.project_name,
+        "state": state,
+        "state_label": Job.JobStateChoices(state).label,
+        "updated_date": job.updated_date.isoformat(),
+    }
+
+
+@celery_app.task()
+def queue_job_event(job_pk, state):
+    """Create deliveries for a job state change and start delivery"""
+    job = Job.objects.select_related("project_id").filter(pk=job_pk).first()
+    if job is None:
+        return 0
+    endpoints = WebhookEndpoint.objects.filter(
+        Q(job__isnull=True) | Q(job=job), user_id=job.user_id_id, is_active=True
+    )
+    payload = get_job_payload(job, state)
+    deliveries = WebhookDelivery.objects.bulk_create(
+        [
+            WebhookDelivery(endpoint=endpoint, event=payload["event"], payload=payload)
+            for endpoint in endpoints
+        ]
+    )
+    if deliveries:
+        deliver_webhooks.delay()
+    return len(deliveries)
+
+
+def claim_due_deliveries():
+    """Lock a batch of due deliveries so that concurrent runs skip them
+
+    Claimed deliveries are pushed back for as long as sending the batch can
+    take, one request timeout per endpoint with a margin for connecting, so
+    that they are not claimed again while in flight, while a worker lost
+    mid-delivery does not hold them indefinitely.
+    """
+    now = timezone.now()
+    with transaction.atomic():
+        deliveries = list(
+            WebhookDelivery.objects.select_for_update(skip_locked=True)
+            .select_related("endpoint")
+            .filter(
+                state__in=DUE_STATES,
+                next_attempt_date__lte=now,
+                endpoint__is_active=True,
+            )
+            .order_by("next_attempt_date")[: settings.WEBHOOK_BATCH_SIZE]
+        )
+        requests = len({delivery.endpoint_id for delivery in deliveries})
+        lease = timedelta(seconds=settings.WEBHOOK_TIMEOUT * 2 * (requests + 1))
+        WebhookDelivery.objects.filter(pk__in=[d.pk for d in deliveries]).update(
+            next_attempt_date=now + lease
+        )
+    return deliveries
+
+
+@celery_app.task()
+def deliver_webhooks():
+    """Send due deliveries in one request per endpoint
+
+    Returns:
+        int: number of deliveries attempted
+    """
+    deliveries = claim_due_deliveries()
+    batches = defaultdict(list)
+    for delivery in deliveries:
+        batches[delivery.endpoint].append(delivery)
+
+    now = timezone.now()
+    for endpoint, batch in batches.items():
+        response_code, error = None, None
+        try:
+            response_code = send_webhook(endpoint, [d.payload for d in batch])
+        except HTTPError as e:
+            response_code, error = e.code, str(e)
+        except (URLError, OSError) as e:
+            error = str(e)
+
+        for delivery in batch:
+            delivery.attempts += 1
+            delivery.response_code = response_code
+            delivery.last_error = error
+            if error is None:
+                delivery.state = WebhookDelivery.DeliveryStateChoices.DELIVERED
+                delivery.delivered_date = now
+            elif delivery.attempts >= settings.WEBHOOK_MAX_ATTEMPTS:
+                delivery.state = WebhookDelivery.DeliveryStateChoices.FAILED
+            else:
+                delivery.state = WebhookDelivery.DeliveryStateChoices.RETRYING
+                delivery.next_attempt_date = now + get_retry_delay(delivery.attempts)
+        WebhookDelivery.objects.bulk_update(
+            batch,
+            [
+                "attempts",
+                "response_code",
+                "last_error",
+                "state",
+                "delivered_date",
+                "next_attempt_date",
+            ],
+        )
+        if error:
+            logger.warning(f"Webhook delivery to {endpoint.url} failed: {error}")
+
+    if len(deliveries) == settings.WEBHOOK_BATCH_SIZE:
+        # More deliveries may be due, continue with the next batch
+        deliver_webhooks.delay()
+    return len(deliveries)
@@ -0,0 +1,14 @@
+from factory import Faker, SubFactory
+from factory.django import DjangoModelFactory
+
+from geodata_mart.users.tests.factories import UserFactory
+from geodata_mart.webhooks.models import WebhookEndpoint
+
+
+class WebhookEndpointFactory(DjangoModelFactory):
+
+    user = SubFactory(UserFactory)
+    url = Faker("url")
+
+    class Meta:
+        model = WebhookEndpoint
@@ -0,0 +1,190 @@
+import hashlib
+import hmac
+import threading
+from datetime import timedelta
+from http.server import BaseHTTPRequestHandler, HTTPServer
+from urllib.error import URLError
+
+import pytest
+from django.core.exceptions import ValidationError
+from django.utils import timezone
+
+from geodata_mart.maps.models import Job
+from geodata_mart.maps.tests.factories import JobFactory
+from geodata_mart.webhooks import tasks
+from geodata_mart.webhooks.models import WebhookDelivery
+from geodata_mart.webhooks.tests.factories import WebhookEndpointFactory
+
+pytestmark = pytest.mark.django_db
+
+
+@pytest.fixture
+def sent(monkeypatch):
+    """Record webhook requests instead of sending them"""
+    sent = []
+
+    def fake_send(endpoint, events):
+        sent.append((endpoint, events))
+        return 200
+
+    monkeypatch.setattr(tasks, "send_webhook", fake_send)
+    monkeypatch.setattr(tasks.deliver_webhooks, "delay", lambda: None)
+    return sent
+
+
+def test_sign_payload():
+    body = b'{"events": []}'
+    expected = hmac.new(b"secret", b"1700000000." + body, hashlib.sha256).hexdigest()
+    assert tasks.sign_payload("secret", "1700000000", body) == expected
+
+
+def test_state_change_queues_deliveries(
+    user, monkeypatch, django_capture_on_commit_callbacks
+):
+    queued = []
+    monkeypatch.setattr(
+        tasks.queue_job_event, "delay", lambda *args: queued.append(args)
+    )
+    job = JobFactory(user_id=user, state=Job.JobStateChoices.PROCESSING)
+
+    with django_capture_on_commit_callbacks(execute=True):
+        job.state = Job.JobStateChoices.PROCESSING
+        job.save()
+    assert queued == []
+
+    with django_capture_on_commit_callbacks(execute=True):
+        job.state = Job.JobStateChoices.FAILED
+        job.save()
+    assert queued == [(job.pk, Job.JobStateChoices.FAILED)]
+
+
+def test_deliveries_batched_per_endpoint(user, sent):
+    user_endpoint = WebhookEndpointFactory(user=user)
+    jobs = JobFactory.create_batch(3, user_id=user)
+    job_endpoint = WebhookEndpointFactory(user=user, job=jobs[0])
+    WebhookEndpointFactory(user=user, is_active=False)
+    WebhookEndpointFactory()
+
+    for job in jobs:
+        tasks.queue_job_event(job.pk, Job.JobStateChoices.PROCESSED)
+    assert tasks.deliver_webhooks() == 4
+
+    batches = {endpoint: events for endpoint, events in sent}
+    assert len(sent) == 2
+    assert len(batches[user_endpoint]) == 3
+    assert batches[job_endpoint][0]["job_id"] == str(jobs[0].job_id)
+    assert not WebhookDelivery.objects.exclude(
+        state=WebhookDelivery.DeliveryStateChoices.DELIVERED
+    ).exists()
+
+
+def test_failed_delivery_backs_off(user, monkeypatch, settings, sent):
+    settings.WEBHOOK_MAX_ATTEMPTS = 2
+
+    def failing_send(endpoint, events):
+        raise URLError("connection refused")
+
+    monkeypatch.setattr(tasks, "send_webhook", failing_send)
+    WebhookEndpointFactory(user=user)
+    tasks.queue_job_event(JobFactory(user_id=user).pk, Job.JobStateChoices.FAILED)
+
+    tasks.deliver_webhooks()
+    delivery = WebhookDelivery.objects.get()
+    assert delivery.state == WebhookDelivery.DeliveryStateChoices.RETRYING
+    assert delivery.attempts == 1
+    # The retry is not yet due
+    assert tasks.deliver_webhooks() == 0
+
+    WebhookDelivery.objects.update(next_attempt_date=delivery.created_date)
+    tasks.deliver_webhooks()
+    delivery.refresh_from_db()
+    assert delivery.state == WebhookDelivery.DeliveryStateChoices.FAILED
+    assert delivery.attempts == 2
+
+
+def test_retry_delay_is_exponential(settings):
+    settings.WEBHOOK_RETRY_DELAY = 10
+    settings.WEBHOOK_RETRY_MAX_DELAY = 60
+    delays = [tasks.get_retry_delay(n).total_seconds() for n in range(1, 6)]
+    assert delays == [10, 20, 40, 60, 60]
+
+
+def resolve_to(monkeypatch, address):
+    monkeypatch.setattr(
+        tasks.socket,
+        "getaddrinfo",
+        lambda host, port, **kwargs: [(None, None, None, "", (address, port))],
+    )
+
+
+@pytest.mark.parametrize(
+    "address",
+    ["127.0.0.1", "169.254.169.254", "10.0.0.5", "192.168.1.1", "::1", "fd00::1"],
+)
+def test_internal_destinations_blocked(monkeypatch, address):
+    resolve_to(monkeypatch, address)
+    with pytest.raises(tasks.BlockedDestinationError):
+        tasks.check_destination("https://hooks.example.com/callback")
+
+
+def test_public_destination_allowed(monkeypatch):
+    resolve_to(monkeypatch, "93.184.216.34")
+    tasks.check_destination("https://hooks.example.com/callback")
+
+
+def test_blocked_delivery_not_sent(user, monkeypatch):
+    resolve_to(monkeypatch, "169.254.169.254")
+    monkeypatch.setattr(tasks.deliver_webhooks, "delay", lambda: None)
+    monkeypatch.setattr(
+        tasks, "build_opener", lambda *args: pytest.fail("request was sent")
+    )
+    WebhookEndpointFactory(user=user, url="http://metadata.example.com/")
+    tasks.queue_job_event(JobFactory(user_id=user).pk, Job.JobStateChoices.FAILED)
+
+    tasks.deliver_webhooks()
+    delivery = WebhookDelivery.objects.get()
+    assert delivery.state == WebhookDelivery.DeliveryStateChoices.RETRYING
+    assert "169.254.169.254" in delivery.last_error
+
+
+def test_endpoint_url_scheme_validated(user):
+    endpoint = WebhookEndpointFactory.build(user=user, url="ftp://example.com/hook")
+    with pytest.raises(ValidationError):
+        endpoint.full_clean()
+
+
+def test_request_sent_to_checked_address(monkeypatch):
+    hosts = []
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_POST(self):
+            hosts.append(self.headers["Host"])
+            self.send_response(204)
+            self.end_headers()
+
+        def log_message(self, *args):
+            pass
+
+    server = HTTPServer(("127.0.0.1", 0), Handler)
+    threading.Thread(target=server.handle_request, daemon=True).start()
+    # the host name does not resolve, so the request can only reach the
+    # server through the address returned by the destination check
+    monkeypatch.setattr(tasks, "check_destination", lambda url: "127.0.0.1")
+    url = f"http://hooks.example.invalid:{server.server_port}/callback"
+    endpoint = WebhookEndpointFactory.build(url=url)
+
+    assert tasks.send_webhook(endpoint, []) == 204
+    assert hosts == [f"hooks.example.invalid:{server.server_port}"]
+    server.server_close()
+
+
+def test_claim_lease_covers_batch(user, settings):
+    settings.WEBHOOK_TIMEOUT = 10
+    for endpoint in WebhookEndpointFactory.create_batch(3, user=user):
+        WebhookDelivery.objects.create(endpoint=endpoint, event="test", payload={})
+
+    before = timezone.now()
+    assert len(tasks.claim_due_deliveries()) == 3
+    # one timeout per request, so a concurrent run cannot claim them in flight
+    for delivery in WebhookDelivery.objects.all():
+        assert delivery.next_attempt_date >= before + timedelta(seconds=60)